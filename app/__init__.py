@@ -1,8 +1,6 @@
 import os
 from flask import Flask
 from .db import init_app as init_db_app
-from .services.seed_service import seed_admin_if_needed
-from .services.user_service import get_user_by_id
 
 
 def create_app():
@@ -23,6 +21,14 @@ def create_app():
     )
 
 
+    # =========================
+    # Client address behind a reverse proxy (login throttling keys on it)
+    # =========================
+    if app.config["TRUSTED_PROXY_COUNT"] > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        n = app.config["TRUSTED_PROXY_COUNT"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=n, x_proto=n, x_host=n)
+
     # =========================
     # Ensure folders exist
     # =========================
@@ -41,8 +47,39 @@ def create_app():
     # The database and its records must remain untouched unless user actions occur.
     # If your project requires an admin account, ensure it already exists in instance/app.db.
     # with app.app_context():
+    #     from .services.seed_service import seed_admin_if_needed
     #     seed_admin_if_needed()
 
+    # =========================
+    # Request/DB/queue metrics (/metrics)
+    # =========================
+    from .metrics import init_app as init_metrics
+    init_metrics(app)
+
+    # =========================
+    # Sampling profiler (armed via CLI or /admin/profiler)
+    # =========================
+    from .profiler import init_app as init_profiler
+    init_profiler(app)
+
+    # =========================
+    # SQL instrumentation (Server-Timing, slow-query log, debug panel)
+    # =========================
+    from .sql_instrumentation import init_app as init_sql_instrumentation
+    init_sql_instrumentation(app)
+
+    # =========================
+    # Static asset fingerprinting (static_url() in templates)
+    # =========================
+    from .assets import init_app as init_assets
+    init_assets(app)
+
+    # =========================
+    # Template bytecode cache + {% cache %} fragment cache
+    # =========================
+    from .template_cache import init_app as init_template_cache
+    init_template_cache(app)
+
     # =========================
     # Cache-control (prevent navigating back to public pages while authenticated)
     # =========================
@@ -51,6 +88,11 @@ def create_app():
     @app.after_request
     def _add_no_cache_headers(response):
         # Helps prevent accessing cached public pages via browser back button.
+        # Responses that already chose a cache policy (static assets, documents)
+        # keep it; everything else served to a logged-in user, JSON included, is no-store.
+        cc = response.cache_control
+        if cc.public or cc.private or cc.immutable or "Cache-Control" in response.headers:
+            return response
         if session.get("user_id"):
             response.headers.setdefault("Cache-Control", "no-store, no-cache, must-revalidate, max-age=0")
             response.headers.setdefault("Pragma", "no-cache")
@@ -68,6 +110,9 @@ def create_app():
     from .routes.technician_routes import bp as technician_bp
     from .routes.business_routes import bp as business_bp
     from .routes.admin_routes import bp as admin_bp
+    from .routes.upload_routes import bp as upload_bp
+    from .routes.metrics_routes import bp as metrics_bp
+    from .routes.health_routes import bp as health_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(request_bp)
@@ -77,5 +122,20 @@ def create_app():
     app.register_blueprint(technician_bp)
     app.register_blueprint(business_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(upload_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(health_bp)
+
+    # =========================
+    # Response compression (gzip/brotli, precompressed static variants)
+    # =========================
+    from .compression import init_app as init_compression
+    init_compression(app)
+
+    # =========================
+    # CLI commands
+    # =========================
+    from .cli import register_cli
+    register_cli(app)
 
     return app
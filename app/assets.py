@@ -0,0 +1,89 @@
+"""Build-free static asset fingerprinting.
+
+At startup every file under static/ is hashed into an in-memory manifest.
+Templates call `static_url('app.css')`, which renders `/static/app.css?v=<hash>`.
+A request whose `v` matches the current hash is served with a one-year
+immutable cache policy; any change to the file changes the URL, so browsers
+never see a stale asset. Unversioned /static requests keep Flask's defaults.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+
+from flask import current_app, request, url_for
+
+
+IMMUTABLE_CACHE_SECONDS = 365 * 24 * 60 * 60
+
+
+class AssetManifest:
+    def __init__(self, static_folder: str, reload: bool = False):
+        self.static_folder = static_folder
+        self.reload = reload
+        self._entries: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        entries = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue  # precompressed variants (flask compress-static)
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, self.static_folder).replace(os.sep, "/")
+                entries[rel] = (os.path.getmtime(full), self._hash_file(full))
+        with self._lock:
+            self._entries = entries
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(64 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()[:12]
+
+    def version(self, filename: str) -> str | None:
+        filename = filename.lstrip("/")
+        entry = self._entries.get(filename)
+        # Debug is read per call: `app.run(debug=True)` turns it on after create_app().
+        if self.reload or current_app.debug:
+            full = os.path.join(self.static_folder, filename)
+            if not os.path.isfile(full):
+                return None
+            mtime = os.path.getmtime(full)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, self._hash_file(full))
+                with self._lock:
+                    self._entries[filename] = entry
+        return entry[1] if entry else None
+
+
+def init_app(app):
+    manifest = AssetManifest(app.static_folder, reload=app.config.get("ASSET_MANIFEST_RELOAD", False))
+    manifest.build()
+    app.extensions["asset_manifest"] = manifest
+
+    def static_url(filename: str) -> str:
+        version = manifest.version(filename)
+        if version is None:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    app.jinja_env.globals["static_url"] = static_url
+
+    @app.after_request
+    def _immutable_static(response):
+        if request.endpoint != "static" or response.status_code not in (200, 304):
+            return response
+        requested = request.args.get("v")
+        filename = (request.view_args or {}).get("filename", "")
+        if requested and requested == manifest.version(filename):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_CACHE_SECONDS
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,5 @@
+"""Benchmark tooling: synthetic data, load tests and micro-benchmarks.
+
+Run through the CLI (`flask bench ...`, see app/cli.py) against a scratch
+DATABASE, never against a real one.
+"""
@@ -0,0 +1,229 @@
+"""Concurrency stress test for the job state machine (services/job_state_service.py).
+
+Builds a scratch database with open jobs that each have several applicants,
+then lets many threads fire random transitions at the same few jobs: approve
+an application, request completion (as any applicant), confirm completion,
+delete. Afterwards it checks the invariants that the compare-and-swap updates
+must keep:
+
+  - a job's version equals the number of transitions that reported success
+  - each transition succeeded at most once per job
+  - ACTIVE / PENDING_CONFIRMATION / COMPLETED jobs have exactly one APPROVED
+    application, from the assigned technician; OUTGOING jobs have none
+  - deleted jobs left no applications or tasks, and were never approved
+  - technician_current_state matches a full rebuild
+
+Run with `flask bench job-race`; violations are reported and the command
+exits 1.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+TRANSITIONS = ("approve", "complete", "confirm", "delete")
+# Relative frequency of each transition in the random mix.
+WEIGHTS = (4, 4, 4, 1)
+
+
+def _seed(db_path: str, jobs: int, technicians: int, applicants: int, rng: random.Random) -> dict:
+    """Businesses, technicians and OUTGOING jobs with applications. Returns {job_id: (business_id, [(app_id, tech_id)])}."""
+    from ..services.technician_state_service import rebuild_technician_states
+
+    conn = sqlite3.connect(db_path)
+    now = int(time.time())
+    iso = datetime.utcnow().isoformat()
+    with conn:
+        business_ids = []
+        for i in range(max(1, jobs // 10)):
+            cur = conn.execute(
+                "INSERT INTO users (email, password_hash, role, is_verified, created_at) VALUES (?, 'x', 'BUSINESS', 1, ?)",
+                (f"race-business{i}@race.test", now),
+            )
+            business_ids.append(cur.lastrowid)
+        tech_ids = []
+        for i in range(technicians):
+            cur = conn.execute(
+                "INSERT INTO users (email, password_hash, role, is_verified, created_at) VALUES (?, 'x', 'TECHNICIAN', 1, ?)",
+                (f"race-tech{i}@race.test", now),
+            )
+            tech_ids.append(cur.lastrowid)
+            conn.execute(
+                "INSERT INTO technician_profiles (user_id, full_name, skills_json, created_at) VALUES (?, ?, '[]', ?)",
+                (cur.lastrowid, f"Race Tech {i}", now),
+            )
+        layout = {}
+        for i in range(jobs):
+            business_id = business_ids[i % len(business_ids)]
+            cur = conn.execute(
+                """
+                INSERT INTO jobs (business_id, title, description, service_category, hourly_rate_min, hourly_rate_max,
+                                  status, created_at, updated_at)
+                VALUES (?, ?, 'race', 'General', 10, 20, 'OUTGOING', ?, ?)
+                """,
+                (business_id, f"Race job {i}", iso, iso),
+            )
+            job_id = cur.lastrowid
+            conn.execute("INSERT INTO job_tasks (job_id, title, created_at) VALUES (?, 'task', ?)", (job_id, now))
+            apps = []
+            for tech_id in rng.sample(tech_ids, min(applicants, len(tech_ids))):
+                cur = conn.execute(
+                    "INSERT INTO job_applications (job_id, technician_id, status, applied_at) VALUES (?, ?, 'APPLIED', ?)",
+                    (job_id, tech_id, iso),
+                )
+                apps.append((cur.lastrowid, tech_id))
+            layout[job_id] = (business_id, apps)
+        rebuild_technician_states(conn)
+    conn.close()
+    return layout
+
+
+def _worker(app, layout, ops: int, seed: int, successes: Counter, outcomes: Counter, errors: list, lock):
+    from ..services import job_state_service as jss
+
+    rng = random.Random(seed)
+    job_ids = list(layout)
+    with app.app_context():
+        for _ in range(ops):
+            job_id = rng.choice(job_ids)
+            business_id, apps = layout[job_id]
+            app_id, tech_id = rng.choice(apps)
+            action = rng.choices(TRANSITIONS, WEIGHTS)[0]
+            try:
+                if action == "approve":
+                    jss.approve_application(job_id, app_id, business_id)
+                elif action == "complete":
+                    jss.request_completion(job_id, tech_id)
+                elif action == "confirm":
+                    jss.approve_job_completion(job_id, business_id)
+                else:
+                    jss.delete_job(job_id, business_id)
+            except jss.JobConflict:
+                outcome = "gave-up"
+            except (PermissionError, LookupError, ValueError):
+                outcome = "refused"
+            except Exception as exc:  # anything else is a bug the report must show
+                outcome = "error"
+                with lock:
+                    errors.append(f"{action} job {job_id}: {exc!r}")
+            else:
+                outcome = "ok"
+            with lock:
+                outcomes[(action, outcome)] += 1
+                if outcome == "ok":
+                    successes[(job_id, action)] += 1
+
+
+def check_invariants(db_path: str, layout: dict, successes: Counter) -> list[str]:
+    from ..services.technician_state_service import rebuild_technician_states
+
+    conn = sqlite3.connect(db_path)
+    violations = []
+    jobs = {r[0]: r for r in conn.execute("SELECT id, status, assigned_technician_id, version FROM jobs")}
+    for job_id in layout:
+        made = {a: successes[(job_id, a)] for a in TRANSITIONS}
+        for action, n in made.items():
+            if n > 1:
+                violations.append(f"job {job_id}: {action} succeeded {n} times")
+        approved = conn.execute(
+            "SELECT technician_id FROM job_applications WHERE job_id = ? AND status = 'APPROVED'", (job_id,)
+        ).fetchall()
+        if job_id not in jobs:
+            if not made["delete"]:
+                violations.append(f"job {job_id}: vanished without a successful delete")
+            if made["approve"]:
+                violations.append(f"job {job_id}: deleted after an approval")
+            left = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM job_applications WHERE job_id = ?) + (SELECT COUNT(*) FROM job_tasks WHERE job_id = ?)",
+                (job_id, job_id),
+            ).fetchone()[0]
+            if left:
+                violations.append(f"job {job_id}: {left} application/task row(s) left after delete")
+            continue
+        _, status, assigned, version = jobs[job_id]
+        expected = made["approve"] + made["complete"] + made["confirm"]
+        if version != expected:
+            violations.append(f"job {job_id}: version {version} but {expected} successful transition(s)")
+        if made["delete"]:
+            violations.append(f"job {job_id}: delete reported success but the job exists")
+        if status == "OUTGOING":
+            if approved or assigned is not None:
+                violations.append(f"job {job_id}: OUTGOING with an approved/assigned technician")
+        elif len(approved) != 1 or approved[0][0] != assigned:
+            violations.append(f"job {job_id}: {status} assigned to {assigned} but approved {[a[0] for a in approved]}")
+
+    snapshot = lambda: set(conn.execute(
+        "SELECT user_id, verification_request_id, current_job_id, current_job_status FROM technician_current_state"
+    ).fetchall())
+    before = snapshot()
+    with conn:
+        rebuild_technician_states(conn)
+    after = snapshot()
+    for row in sorted(before ^ after, key=lambda r: (r[0], r in after)):
+        violations.append(f"technician_current_state {'stale' if row in before else 'expected'}: {row}")
+    conn.close()
+    return violations
+
+
+def run(app, *, jobs: int = 20, technicians: int = 30, applicants: int = 5, threads: int = 16,
+        ops: int = 200, seed: int = 1) -> dict:
+    """Hammer the transitions on a scratch database (app.config["DATABASE"] is pointed at it meanwhile)."""
+    from .. import metrics
+    from ..db import upgrade_db
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="job-race-") as tmp:
+        db_path = os.path.join(tmp, "race.db")
+        upgrade_db(db_path)
+        layout = _seed(db_path, jobs, technicians, applicants, rng)
+        successes, outcomes, errors, lock = Counter(), Counter(), [], threading.Lock()
+        busy_before = metrics.counter_total("db_busy_retries_total")
+        conflicts_before = metrics.counter_total("job_transition_conflicts_total")
+        saved = app.config["DATABASE"]
+        app.config["DATABASE"] = db_path
+        try:
+            workers = [
+                threading.Thread(target=_worker, args=(app, layout, ops, seed * 1000 + i, successes, outcomes, errors, lock))
+                for i in range(threads)
+            ]
+            started = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            app.config["DATABASE"] = saved
+        violations = errors + check_invariants(db_path, layout, successes)
+    return {
+        "jobs": jobs,
+        "threads": threads,
+        "operations": threads * ops,
+        "seconds": round(elapsed, 2),
+        "outcomes": {f"{a}/{o}": n for (a, o), n in sorted(outcomes.items())},
+        "busy_retries": metrics.counter_total("db_busy_retries_total") - busy_before,
+        "version_conflicts": metrics.counter_total("job_transition_conflicts_total") - conflicts_before,
+        "violations": violations,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['operations']} operations from {report['threads']} threads on {report['jobs']} jobs "
+        f"in {report['seconds']}s ({report['version_conflicts']} version-conflict and "
+        f"{report['busy_retries']} SQLITE_BUSY retries)",
+    ]
+    lines += [f"  {name:<28}{n:>8}" for name, n in report["outcomes"].items()]
+    if report["violations"]:
+        lines.append(f"{len(report['violations'])} invariant violation(s):")
+        lines += [f"  {v}" for v in report["violations"]]
+    else:
+        lines.append("All invariants hold.")
+    return "\n".join(lines)
@@ -0,0 +1,317 @@
+"""Load test driving the main user journeys.
+
+Virtual users (synthetic technicians, businesses and the synthetic admin, see
+synthetic.py) repeat their role's journey:
+
+  technician: search -> apply to an open job -> dashboard
+  business:   dashboard -> jobs list -> job detail
+  admin:      homepage -> review a pending request -> technicians -> audit logs
+
+Two transports:
+  client: Flask test client per virtual user (no network, session injected),
+          measures the app itself
+  http:   a local threaded WSGI server plus http.client, with a real login,
+          so it includes the WSGI layer and middleware
+
+The report gives throughput and latency percentiles per step and overall. Use
+gate() to turn thresholds into a pass/fail result.
+"""
+
+from __future__ import annotations
+
+import http.client
+import math
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urlsplit
+
+from .synthetic import DEFAULT_PASSWORD, SYNTHETIC_DOMAIN
+
+
+@dataclass
+class Step:
+    name: str
+    method: str
+    path: str
+    ok: tuple = (200,)
+    data: dict | None = None
+
+
+@dataclass
+class VirtualUser:
+    user_id: int
+    email: str
+    role: str
+    steps: list = field(default_factory=list)
+
+
+# =========================
+# Journeys
+# =========================
+
+def _pick_ids(conn, sql: str, params=(), limit: int = 500) -> list[int]:
+    return [r[0] for r in conn.execute(f"{sql} LIMIT {int(limit)}", params).fetchall()]
+
+
+def build_virtual_users(db_path: str, users: int, seed: int = 1) -> list[VirtualUser]:
+    """Pick approved synthetic accounts and build each one's journey."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    like = f"%@{SYNTHETIC_DOMAIN}"
+    approved = """
+        SELECT u.id, u.email FROM users u
+        WHERE u.role = ? AND u.email LIKE ?
+          AND (SELECT status FROM verification_requests vr WHERE vr.user_id = u.id
+               ORDER BY vr.submitted_at DESC, vr.id DESC LIMIT 1) = 'APPROVED'
+    """
+    techs = conn.execute(approved + " LIMIT 2000", ("TECHNICIAN", like)).fetchall()
+    businesses = conn.execute(approved + " LIMIT 2000", ("BUSINESS", like)).fetchall()
+    admin = conn.execute("SELECT id, email FROM users WHERE role = 'ADMIN' AND email LIKE ?", (like,)).fetchone()
+    open_jobs = _pick_ids(conn, "SELECT id FROM jobs WHERE status = 'OUTGOING' ORDER BY id DESC")
+    pending_requests = _pick_ids(conn, "SELECT id FROM verification_requests WHERE status = 'PENDING'")
+    if not techs or not businesses or admin is None:
+        conn.close()
+        raise RuntimeError("No synthetic accounts found. Run `flask bench seed` first.")
+
+    # Roughly the production mix: mostly technicians, some businesses, one admin seat per 20 users.
+    mix = [("TECHNICIAN", 70), ("BUSINESS", 25), ("ADMIN", 5)]
+    out = []
+    for _ in range(users):
+        role = rng.choices([m[0] for m in mix], weights=[m[1] for m in mix])[0]
+        if role == "TECHNICIAN":
+            uid, email = rng.choice(techs)
+            job = rng.choice(open_jobs) if open_jobs else None
+            steps = [Step("technician.search", "GET", "/technician/search")]
+            if job:
+                steps.append(Step("technician.apply", "POST", f"/technician/jobs/{job}/apply", ok=(201, 400, 409)))
+            steps.append(Step("technician.dashboard", "GET", "/technician/dashboard"))
+        elif role == "BUSINESS":
+            uid, email = rng.choice(businesses)
+            jobs = _pick_ids(conn, "SELECT id FROM jobs WHERE business_id = ?", (uid,), limit=20)
+            steps = [
+                Step("business.dashboard", "GET", "/business/dashboard"),
+                Step("business.jobs", "GET", "/business/jobs"),
+            ]
+            if jobs:
+                steps.append(Step("business.job_detail", "GET", f"/business/jobs/{rng.choice(jobs)}"))
+        else:
+            uid, email = admin
+            steps = [Step("admin.homepage", "GET", "/admin/homepage")]
+            if pending_requests:
+                steps.append(Step("admin.review", "GET", f"/admin/review/{rng.choice(pending_requests)}"))
+            steps += [
+                Step("admin.technicians", "GET", "/admin/technicians"),
+                Step("admin.audit_logs", "GET", "/admin/audit-logs"),
+            ]
+        out.append(VirtualUser(uid, email, role, steps))
+    conn.close()
+    return out
+
+
+# =========================
+# Transports
+# =========================
+
+class _ClientSession:
+    def __init__(self, app, vu: VirtualUser):
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["user_id"] = vu.user_id
+            sess["role"] = vu.role
+            sess["email"] = vu.email
+
+    def request(self, step: Step) -> int:
+        resp = self.client.open(step.path, method=step.method, data=step.data)
+        resp.close()
+        return resp.status_code
+
+
+class _HttpSession:
+    def __init__(self, host: str, port: int, vu: VirtualUser, password: str):
+        self.host, self.port = host, port
+        self.cookie = None
+        self.location = None
+        status = self._send("POST", "/login", {"email": vu.email, "password": password})
+        # A failed login also redirects (back to /login, with a flash message in the cookie).
+        if status != 302 or not self.location or self.location.endswith("/login"):
+            raise RuntimeError(f"Login failed for {vu.email} (HTTP {status}, redirected to {self.location}).")
+
+    def _send(self, method: str, path: str, data: dict | None = None) -> int:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        headers = {}
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            self.location = resp.getheader("Location")
+            for name, value in resp.getheaders():
+                if name.lower() == "set-cookie" and value.startswith("session="):
+                    self.cookie = value.split(";", 1)[0]
+            return resp.status
+        finally:
+            conn.close()
+
+    def request(self, step: Step) -> int:
+        return self._send(step.method, step.path, step.data)
+
+
+class _LocalServer:
+    def __init__(self, app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+# =========================
+# Runner
+# =========================
+
+def _run_users(sessions, vus, iterations: int):
+    samples: list[tuple[str, float, bool]] = []
+    lock = threading.Lock()
+
+    def worker(session, vu):
+        local = []
+        for _ in range(iterations):
+            for step in vu.steps:
+                start = time.perf_counter()
+                try:
+                    ok = session.request(step) in step.ok
+                except Exception:
+                    ok = False
+                local.append((step.name, time.perf_counter() - start, ok))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(s, vu)) for s, vu in zip(sessions, vus)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def run(app, db_path: str, *, users: int = 10, iterations: int = 5, transport: str = "client",
+        seed: int = 1, password: str = DEFAULT_PASSWORD, base_url: str | None = None) -> dict:
+    """Run the journeys. With base_url, drive an already running server (e.g. gunicorn)
+    over HTTP instead; that server must use the same DATABASE and allow the logins
+    (raise LOGIN_IP_BURST / LOGIN_EMAIL_BURST in its environment)."""
+    vus = build_virtual_users(db_path, users, seed=seed)
+    if base_url:
+        parsed = urlsplit(base_url)
+        sessions = [_HttpSession(parsed.hostname, parsed.port or 80, vu, password) for vu in vus]
+        samples, wall = _run_users(sessions, vus, iterations)
+        transport = base_url
+    elif transport == "client":
+        sessions = [_ClientSession(app, vu) for vu in vus]
+        samples, wall = _run_users(sessions, vus, iterations)
+    elif transport == "http":
+        # Every virtual user logs in from 127.0.0.1, often several with the same account:
+        # lift the login throttle for the run instead of measuring it.
+        saved = {k: app.config[k] for k in ("LOGIN_IP_BURST", "LOGIN_EMAIL_BURST")}
+        app.config.update(LOGIN_IP_BURST=users + 10, LOGIN_EMAIL_BURST=users + 10)
+        try:
+            with _LocalServer(app) as server:
+                sessions = [_HttpSession("127.0.0.1", server.port, vu, password) for vu in vus]
+                samples, wall = _run_users(sessions, vus, iterations)
+        finally:
+            app.config.update(saved)
+    else:
+        raise ValueError(f"Unknown transport {transport!r}.")
+    return build_report(samples, wall, transport=transport, users=users, iterations=iterations)
+
+
+# =========================
+# Reporting
+# =========================
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summary(durations: list[float], errors: int, wall: float) -> dict:
+    durations = sorted(durations)
+    ms = lambda v: round(v * 1000.0, 2)
+    return {
+        "requests": len(durations),
+        "errors": errors,
+        "rps": round(len(durations) / wall, 1) if wall > 0 else 0.0,
+        "p50_ms": ms(percentile(durations, 50)),
+        "p90_ms": ms(percentile(durations, 90)),
+        "p95_ms": ms(percentile(durations, 95)),
+        "p99_ms": ms(percentile(durations, 99)),
+        "max_ms": ms(durations[-1]) if durations else 0.0,
+    }
+
+
+def build_report(samples, wall: float, **meta) -> dict:
+    by_step: dict[str, list] = {}
+    for name, duration, ok in samples:
+        by_step.setdefault(name, []).append((duration, ok))
+    steps = {
+        name: _summary([d for d, _ in rows], sum(1 for _, ok in rows if not ok), wall)
+        for name, rows in sorted(by_step.items())
+    }
+    overall = _summary([d for _, d, _ in samples], sum(1 for *_, ok in samples if not ok), wall)
+    return dict(meta, wall_seconds=round(wall, 3), overall=overall, steps=steps)
+
+
+def format_report(report: dict) -> str:
+    header = f"{'step':<24}{'reqs':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    lines = [
+        f"transport={report['transport']} users={report['users']} iterations={report['iterations']} "
+        f"wall={report['wall_seconds']}s",
+        header,
+        "-" * len(header),
+    ]
+    rows = list(report["steps"].items()) + [("TOTAL", report["overall"])]
+    for name, s in rows:
+        lines.append(
+            f"{name:<24}{s['requests']:>7}{s['errors']:>6}{s['rps']:>9}{s['p50_ms']:>9}{s['p90_ms']:>9}"
+            f"{s['p95_ms']:>9}{s['p99_ms']:>9}{s['max_ms']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def gate(report: dict, *, max_p95_ms: float | None = None, max_error_rate: float | None = None,
+         min_rps: float | None = None) -> list[str]:
+    """Return the list of failed thresholds (empty = pass)."""
+    overall = report["overall"]
+    failures = []
+    if max_p95_ms is not None and overall["p95_ms"] > max_p95_ms:
+        failures.append(f"p95 {overall['p95_ms']} ms > {max_p95_ms} ms")
+    if max_error_rate is not None and overall["requests"]:
+        rate = overall["errors"] / overall["requests"]
+        if rate > max_error_rate:
+            failures.append(f"error rate {rate:.3f} > {max_error_rate}")
+    if min_rps is not None and overall["rps"] < min_rps:
+        failures.append(f"throughput {overall['rps']} rps < {min_rps} rps")
+    return failures
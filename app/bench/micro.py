@@ -0,0 +1,246 @@
+"""Micro-benchmarks for the hot service-layer functions.
+
+Each benchmark runs against a generated database of a given size
+(SIZES: ~1k, ~100k or ~1M rows in total, built once by synthetic.generate and
+kept in the bench directory). Arguments rotate over a fixed sample of ids so a
+single warm row does not decide the result.
+
+Results are plain JSON:
+
+    {"size": "100k", "rows": 110234, "python": "3.11.4", "sqlite": "3.40.1",
+     "results": {"get_user_by_id": {"calls": .., "median_us": .., "p95_us": .., "min_us": ..}, ...}}
+
+Save one as a baseline and compare() a later run against it; a benchmark
+regresses when its median grows by more than the tolerance.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import time
+
+from .synthetic import generate
+
+# Generator parameters giving roughly 1k / 100k / 1M rows across all tables.
+SIZES = {
+    "1k": {"businesses": 10, "technicians": 50},
+    "100k": {"businesses": 1000, "technicians": 5000},
+    "1m": {"businesses": 10000, "technicians": 50000},
+}
+
+SAMPLE_IDS = 50
+
+
+def database_path(bench_dir: str, size: str) -> str:
+    return os.path.join(bench_dir, f"bench-{size}.db")
+
+
+def ensure_database(bench_dir: str, size: str, seed: int = 42) -> str:
+    """Create and fill the database for `size` unless it already exists.
+
+    A cached database from an older checkout is migrated to the current schema;
+    one written by a newer checkout is rebuilt.
+    """
+    from ..db import SCHEMA_VERSION, schema_version, upgrade_db
+
+    if size not in SIZES:
+        raise ValueError(f"Unknown size {size!r} (choose from {', '.join(SIZES)}).")
+    path = database_path(bench_dir, size)
+    if os.path.exists(path):
+        current = schema_version(path)
+        if current < SCHEMA_VERSION:
+            upgrade_db(path)
+        if current <= SCHEMA_VERSION:
+            return path
+        os.remove(path)
+    os.makedirs(bench_dir, exist_ok=True)
+    tmp = f"{path}.partial"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    upgrade_db(tmp)
+    generate(tmp, os.path.join(bench_dir, "uploads"), seed=seed, **SIZES[size])
+    os.replace(tmp, path)
+    return path
+
+
+def count_rows(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables)
+    finally:
+        conn.close()
+
+
+# =========================
+# Benchmarks
+# =========================
+# Each entry builds a zero-argument callable from a sample of ids. They are
+# called inside an app context whose DATABASE is the benchmark database.
+
+def _sample(conn, sql: str, rng: random.Random) -> list:
+    rows = conn.execute(sql).fetchall()
+    if not rows:
+        return []
+    return rng.sample(rows, min(SAMPLE_IDS, len(rows)))
+
+
+def _rotating(fn, args_list):
+    if not args_list:
+        return None
+    state = {"i": 0}
+
+    def call():
+        args = args_list[state["i"] % len(args_list)]
+        state["i"] += 1
+        return fn(*args)
+
+    return call
+
+
+def _bench_get_user_by_id(conn, rng):
+    from ..services.user_service import get_user_by_id
+    return _rotating(get_user_by_id, _sample(conn, "SELECT id FROM users", rng))
+
+
+def _bench_get_latest_request_for_user(conn, rng):
+    from ..services.verification_service import get_latest_request_for_user
+    return _rotating(get_latest_request_for_user, _sample(conn, "SELECT id FROM users WHERE role != 'ADMIN'", rng))
+
+
+def _bench_list_notifications(conn, rng):
+    from ..services.notification_service import list_notifications
+    return _rotating(list_notifications, _sample(conn, "SELECT DISTINCT user_id FROM notifications", rng))
+
+
+def _bench_list_recommended_jobs(conn, rng):
+    from ..routes.technician_routes import list_recommended_jobs_for_technician
+    return _rotating(
+        list_recommended_jobs_for_technician,
+        _sample(conn, "SELECT id FROM users WHERE role = 'TECHNICIAN'", rng),
+    )
+
+
+def _bench_suggest_skills(conn, rng):
+    from ..services.skill_suggest_service import suggest_skills
+    queries = ["plumb", "electric wiring", "aircon", "cctv instal", "netwrk", "router", "xyz", "server maint"]
+    return _rotating(suggest_skills, [(q,) for q in queries])
+
+
+def _bench_compute_common_flags(conn, rng):
+    from ..services.flag_service import compute_common_flags
+    names = [(r[0],) for r in _sample(conn, "SELECT full_name FROM technician_profiles", rng)]
+    names += [(r[0],) for r in _sample(conn, "SELECT company_name FROM business_profiles", rng)]
+    names += [("Aaaaaa Engineering",), ("Acme $$$ Pte Ltd",), ("X" * 80,)]
+    return _rotating(compute_common_flags, names)
+
+
+def _bench_get_job_details_for_business(conn, rng):
+    from ..services.jobs import get_job_details_for_business
+    return _rotating(get_job_details_for_business, _sample(conn, "SELECT id, business_id FROM jobs", rng))
+
+
+def _bench_admin_technicians(conn, rng):
+    from ..db import get_db
+    from ..routes.admin_routes import list_technicians_for_admin
+    args = [("approved", ""), ("approved", "an"), ("rejected", "")]
+    return _rotating(lambda status, q: list_technicians_for_admin(get_db(), status, q), args)
+
+
+BENCHMARKS = {
+    "get_user_by_id": _bench_get_user_by_id,
+    "get_latest_request_for_user": _bench_get_latest_request_for_user,
+    "list_notifications": _bench_list_notifications,
+    "list_recommended_jobs_for_technician": _bench_list_recommended_jobs,
+    "suggest_skills": _bench_suggest_skills,
+    "compute_common_flags": _bench_compute_common_flags,
+    "get_job_details_for_business": _bench_get_job_details_for_business,
+    "admin_technicians_sql": _bench_admin_technicians,
+}
+
+
+# =========================
+# Runner
+# =========================
+
+def _time_calls(call, min_time: float, max_calls: int) -> list[float]:
+    for _ in range(3):
+        call()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_calls and (len(samples) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(app, db_path: str, size: str, *, only=None, min_time: float = 1.0, max_calls: int = 10000,
+        seed: int = 7) -> dict:
+    """Run the benchmarks with app.config["DATABASE"] pointed at db_path."""
+    selected = [name for name in BENCHMARKS if not only or name in only]
+    results = {}
+    saved = app.config["DATABASE"]
+    app.config["DATABASE"] = db_path
+    conn = sqlite3.connect(db_path)
+    try:
+        for name in selected:
+            rng = random.Random(seed)
+            with app.app_context():
+                call = BENCHMARKS[name](conn, rng)
+                if call is None:
+                    continue
+                samples = sorted(_time_calls(call, min_time, max_calls))
+            us = lambda v: round(v * 1e6, 1)
+            results[name] = {
+                "calls": len(samples),
+                "median_us": us(statistics.median(samples)),
+                "p95_us": us(samples[min(len(samples) - 1, int(len(samples) * 0.95))]),
+                "min_us": us(samples[0]),
+            }
+    finally:
+        conn.close()
+        app.config["DATABASE"] = saved
+    return {
+        "size": size,
+        "rows": count_rows(db_path),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "created_at": int(time.time()),
+        "results": results,
+    }
+
+
+def format_results(report: dict) -> str:
+    header = f"{'benchmark':<40}{'calls':>8}{'median us':>12}{'p95 us':>12}{'min us':>12}"
+    lines = [f"size={report['size']} rows={report['rows']}", header, "-" * len(header)]
+    for name, r in report["results"].items():
+        lines.append(f"{name:<40}{r['calls']:>8}{r['median_us']:>12}{r['p95_us']:>12}{r['min_us']:>12}")
+    return "\n".join(lines)
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.10) -> tuple[list[str], list[str]]:
+    """Compare median times. Returns (report lines, regressions)."""
+    lines, regressions = [], []
+    if baseline.get("size") != current.get("size"):
+        lines.append(f"warning: comparing size {current.get('size')} against a {baseline.get('size')} baseline")
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            lines.append(f"{name:<40} new ({cur['median_us']} us)")
+            continue
+        change = (cur["median_us"] - base["median_us"]) / base["median_us"] if base["median_us"] else 0.0
+        verdict = "ok"
+        if change > tolerance:
+            verdict = "REGRESSION"
+            regressions.append(f"{name}: {base['median_us']} -> {cur['median_us']} us ({change:+.1%})")
+        elif change < -tolerance:
+            verdict = "faster"
+        lines.append(f"{name:<40}{base['median_us']:>12}{cur['median_us']:>12}{change:>+10.1%}  {verdict}")
+    return lines, regressions
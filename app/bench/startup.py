@@ -0,0 +1,90 @@
+"""Boot-time report: where `from app import create_app; create_app()` spends its time.
+
+The boot runs in a fresh interpreter with `-X importtime` (so nothing is
+already imported), several times, and the fastest run counts against the
+budget. importtime adds a little overhead of its own, so the numbers are an
+upper bound.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+_BOOT = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "create_app_ms": (t2 - t1) * 1000}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, depth, self_us, cumulative_us) for each `import time:` line."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        out.append((raw_name.strip(), depth, self_us, cumulative_us))
+    return out
+
+
+def measure(project_root: str, runs: int = 3) -> dict:
+    best = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _BOOT],
+            cwd=project_root, capture_output=True, text=True, env=dict(os.environ),
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "boot failed")
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings["total_ms"] = timings["import_ms"] + timings["create_app_ms"]
+        if best is None or timings["total_ms"] < best["total_ms"]:
+            best = dict(timings, imports=_parse_importtime(proc.stderr))
+    return best
+
+
+def summarize(result: dict, top: int = 15) -> dict:
+    imports = result["imports"]
+    # Top-level packages pulled in (directly or not) by the boot, by cumulative time.
+    packages: dict[str, int] = {}
+    for name, _depth, self_us, _cum in imports:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    app_modules = sorted(
+        ((name, self_us, cum) for name, _d, self_us, cum in imports if name == "app" or name.startswith("app.")),
+        key=lambda m: m[2], reverse=True,
+    )
+    return {
+        "import_ms": round(result["import_ms"], 1),
+        "create_app_ms": round(result["create_app_ms"], 1),
+        "total_ms": round(result["total_ms"], 1),
+        "modules_imported": len(imports),
+        "packages": sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top],
+        "app_modules": app_modules[:top],
+    }
+
+
+def format_summary(summary: dict, budget_ms: float | None = None) -> str:
+    lines = [
+        f"boot total {summary['total_ms']} ms = imports {summary['import_ms']} ms "
+        f"+ create_app() {summary['create_app_ms']} ms ({summary['modules_imported']} modules)",
+    ]
+    if budget_ms is not None:
+        lines[0] += f"  [budget {budget_ms:g} ms: {'OK' if summary['total_ms'] <= budget_ms else 'OVER'}]"
+    lines += ["", f"{'package (self time of all its modules)':<44}{'ms':>8}"]
+    for name, us in summary["packages"]:
+        lines.append(f"{name:<44}{us / 1000:>8.1f}")
+    lines += ["", f"{'app module':<44}{'self ms':>8}{'cum ms':>8}"]
+    for name, self_us, cum in summary["app_modules"]:
+        lines.append(f"{name:<44}{self_us / 1000:>8.1f}{cum / 1000:>8.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,319 @@
+"""Synthetic data generator for load tests and micro-benchmarks.
+
+generate() adds N businesses and technicians with the rows that hang off them:
+verification requests and documents, profiles, skill items and certificates,
+jobs across all statuses, applications, tasks and notifications. The
+distributions are skewed the way real data is: most accounts are approved,
+a few categories get most jobs, most jobs have few applicants, and
+notifications per user follow a long tail.
+
+All generated accounts use emails at SYNTHETIC_DOMAIN and the same password,
+so a load test can log in as any of them. The output is deterministic for a
+given seed and starting database. Rows are written with executemany in
+batches on a dedicated connection with synchronous=OFF, so a million rows
+take seconds, not minutes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from ..services.skill_suggest_service import CANONICAL_SKILLS
+from ..services.technician_state_service import rebuild_technician_states
+
+
+SYNTHETIC_DOMAIN = "synthetic.test"
+DEFAULT_PASSWORD = "Password123!"
+SAMPLE_DOCUMENT = "synthetic-sample.pdf"
+
+FIRST_NAMES = [
+    "Aiden", "Bella", "Chen", "Divya", "Ethan", "Farah", "Gabriel", "Hui Min", "Irfan", "Jia Hui",
+    "Kumar", "Li Wei", "Mei Ling", "Nur", "Oliver", "Priya", "Qi", "Rahul", "Siti", "Tan",
+]
+LAST_NAMES = [
+    "Tan", "Lim", "Lee", "Ng", "Wong", "Goh", "Chua", "Ong", "Koh", "Teo",
+    "Rahman", "Singh", "Kumar", "Abdullah", "Lau", "Yeo", "Chong", "Ho", "Sim", "Chan",
+]
+COMPANY_SUFFIXES = ["Pte Ltd", "Engineering", "Facilities", "Solutions", "Services", "Holdings"]
+LOCATIONS = ["Jurong East", "Tampines", "Woodlands", "Bishan", "Raffles Place", "Changi", "Punggol", "Clementi"]
+TASK_TITLES = [
+    "Site inspection", "Replace faulty unit", "Run diagnostics", "Cable tidy-up",
+    "Configure device", "Test and sign off", "Clean filters", "Update firmware",
+]
+NOTIFICATION_TYPES = [
+    ("VERIFICATION_APPROVED", "Your account has been verified! You may now proceed."),
+    ("SKILL_APPROVED", "Skill approved."),
+    ("APPLICATION_APPROVED", "Your application was approved."),
+    ("JOB_COMPLETED", "A job was marked complete."),
+]
+
+# (status, weight)
+JOB_STATUSES = [("OUTGOING", 40), ("ACTIVE", 25), ("PENDING_CONFIRMATION", 10), ("COMPLETED", 20), ("CANCELLED", 5)]
+REQUEST_STATUSES = [("APPROVED", 80), ("PENDING", 12), ("REJECTED", 8)]
+SKILL_STATUSES = [("APPROVED", 70), ("PENDING", 20), ("REJECTED", 10)]
+
+_SAMPLE_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+class _Writer:
+    """Buffers rows per table and flushes them with executemany."""
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = 20000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending: dict[str, tuple[str, list]] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, table: str, columns: tuple, row: tuple) -> None:
+        sql, rows = self.pending.setdefault(
+            table,
+            (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", []),
+        )
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self._flush(table)
+
+    def _flush(self, table: str) -> None:
+        sql, rows = self.pending[table]
+        if rows:
+            self.conn.executemany(sql, rows)
+            self.counts[table] = self.counts.get(table, 0) + len(rows)
+            rows.clear()
+
+    def flush_all(self) -> None:
+        for table in list(self.pending):
+            self._flush(table)
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def _geometric(rng: random.Random, mean: float, cap: int) -> int:
+    # Long tail: most users get a few, some get many.
+    p = 1.0 / (1.0 + mean)
+    n = 0
+    while n < cap and rng.random() > p:
+        n += 1
+    return n
+
+
+def _next_id(conn, table: str) -> int:
+    return int(conn.execute(f"SELECT IFNULL(MAX(id), 0) FROM {table}").fetchone()[0]) + 1
+
+
+def generate(
+    db_path: str,
+    upload_folder: str,
+    *,
+    businesses: int,
+    technicians: int,
+    jobs_per_business: float = 5.0,
+    seed: int = 42,
+    password: str = DEFAULT_PASSWORD,
+    password_method: str = "pbkdf2:sha256:1000",
+) -> dict:
+    """Insert synthetic rows into an existing (already initialised) database. Returns row counts."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    epoch_now = datetime.utcfromtimestamp(now)
+    # A fast hash is fine here: these accounts only exist on scratch databases.
+    password_hash = generate_password_hash(password, password_method)
+
+    os.makedirs(upload_folder, exist_ok=True)
+    sample_path = os.path.join(upload_folder, SAMPLE_DOCUMENT)
+    if not os.path.exists(sample_path):
+        with open(sample_path, "wb") as fh:
+            fh.write(_SAMPLE_PDF)
+    sample_size = len(_SAMPLE_PDF)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    w = _Writer(conn)
+
+    user_id = _next_id(conn, "users")
+    request_id = _next_id(conn, "verification_requests")
+    skill_id = _next_id(conn, "technician_skill_items")
+    job_id = _next_id(conn, "jobs")
+
+    category_weights = [(c, 1.0 / (rank + 1)) for rank, c in enumerate(CANONICAL_SKILLS)]
+
+    def ts_days_ago(max_days: int) -> int:
+        return now - rng.randint(0, max_days * 86400)
+
+    def add_user(role: str, verified: bool, created: int) -> int:
+        nonlocal user_id
+        uid = user_id
+        user_id += 1
+        w.add(
+            "users",
+            ("id", "email", "password_hash", "role", "is_active", "is_verified", "created_at", "last_login_at"),
+            (uid, f"{role.lower()}{uid}@{SYNTHETIC_DOMAIN}", password_hash, role, 1, int(verified), created,
+             created + rng.randint(0, 30 * 86400) if verified else None),
+        )
+        return uid
+
+    def add_verification(uid: int, role: str, created: int, admin_id: int) -> str:
+        nonlocal request_id
+        status = _weighted(rng, REQUEST_STATUSES)
+        attempts = [status] if status != "APPROVED" or rng.random() > 0.1 else ["REJECTED", "APPROVED"]
+        submitted = created + rng.randint(60, 3600)
+        for attempt in attempts:
+            reviewed = submitted + rng.randint(3600, 3 * 86400) if attempt != "PENDING" else None
+            w.add(
+                "verification_requests",
+                ("id", "user_id", "user_role", "status", "submitted_at", "reviewed_at", "reviewed_by_admin_id",
+                 "rejection_reason", "rejected_at", "cooldown_until"),
+                (request_id, uid, role, attempt, submitted, reviewed, admin_id if reviewed else None,
+                 "Document unreadable" if attempt == "REJECTED" else None,
+                 reviewed if attempt == "REJECTED" else None,
+                 reviewed + 86400 if attempt == "REJECTED" else None),
+            )
+            for _ in range(rng.randint(1, 3)):
+                w.add(
+                    "uploaded_documents",
+                    ("verification_request_id", "uploaded_by_user_id", "document_type", "original_filename",
+                     "stored_filename", "file_extension", "file_size", "uploaded_at", "preview_status", "page_count"),
+                    (request_id, uid, "VERIFICATION", "certificate.pdf", SAMPLE_DOCUMENT, "pdf", sample_size,
+                     submitted, "READY", 1),
+                )
+            if reviewed:
+                w.add(
+                    "admin_actions",
+                    ("admin_user_id", "action_type", "target_verification_request_id", "timestamp", "notes"),
+                    (admin_id, "APPROVE" if attempt == "APPROVED" else "REJECT", request_id, reviewed, None),
+                )
+            request_id += 1
+            submitted = (reviewed or submitted) + rng.randint(86400, 3 * 86400)
+        return attempts[-1]
+
+    def add_notifications(uid: int, created: int) -> None:
+        for _ in range(_geometric(rng, 4.0, 60)):
+            type_, message = rng.choice(NOTIFICATION_TYPES)
+            at = rng.randint(created, now)
+            is_read = rng.random() < 0.7
+            w.add(
+                "notifications",
+                ("user_id", "type", "message", "is_read", "created_at", "read_at"),
+                (uid, type_, message, int(is_read), at, at + 600 if is_read else None),
+            )
+
+    admin_id = add_user("ADMIN", True, ts_days_ago(400))
+
+    # ---- Technicians
+    approved_techs = []
+    for _ in range(technicians):
+        created = ts_days_ago(365)
+        uid = add_user("TECHNICIAN", False, created)
+        skills = rng.sample(CANONICAL_SKILLS, rng.randint(1, 4))
+        w.add(
+            "technician_profiles",
+            ("user_id", "full_name", "skills_json", "bio", "created_at"),
+            (uid, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", json.dumps(skills), None, created),
+        )
+        status = add_verification(uid, "TECHNICIAN", created, admin_id)
+        if status == "APPROVED":
+            approved_techs.append(uid)
+            for skill in skills:
+                skill_status = _weighted(rng, SKILL_STATUSES)
+                skill_created = created + rng.randint(86400, 60 * 86400)
+                reviewed = skill_created + 86400 if skill_status != "PENDING" else None
+                w.add(
+                    "technician_skill_items",
+                    ("id", "user_id", "skill_name", "status", "created_at", "reviewed_at", "reviewed_by_admin_id",
+                     "rejection_reason"),
+                    (skill_id, uid, skill, skill_status, skill_created, reviewed, admin_id if reviewed else None,
+                     "Certificate expired" if skill_status == "REJECTED" else None),
+                )
+                for _ in range(rng.randint(1, 2)):
+                    w.add(
+                        "technician_skill_documents",
+                        ("skill_item_id", "original_filename", "stored_filename", "file_extension", "file_size",
+                         "uploaded_at", "preview_status", "page_count"),
+                        (skill_id, "cert.pdf", SAMPLE_DOCUMENT, "pdf", sample_size, skill_created, "READY", 1),
+                    )
+                skill_id += 1
+        add_notifications(uid, created)
+
+    # ---- Businesses and their jobs
+    for _ in range(businesses):
+        created = ts_days_ago(365)
+        uid = add_user("BUSINESS", False, created)
+        w.add(
+            "business_profiles",
+            ("user_id", "company_name", "registration_identifier", "created_at"),
+            (uid, f"{rng.choice(LAST_NAMES)} {rng.choice(COMPANY_SUFFIXES)}", f"UEN{uid:09d}", created),
+        )
+        status = add_verification(uid, "BUSINESS", created, admin_id)
+        add_notifications(uid, created)
+        if status != "APPROVED":
+            continue
+
+        for _ in range(rng.randint(0, max(0, int(round(2 * jobs_per_business))))):
+            job_status = _weighted(rng, JOB_STATUSES)
+            category = _weighted(rng, category_weights)
+            rate_min = rng.choice([15, 20, 25, 30, 40])
+            job_created = epoch_now - timedelta(seconds=rng.randint(0, 180 * 86400))
+            job_updated = job_created + timedelta(seconds=rng.randint(0, 14 * 86400))
+            assigned = None
+            applicants = rng.sample(approved_techs, min(len(approved_techs), _geometric(rng, 2.0, 12)))
+            if job_status in ("ACTIVE", "PENDING_CONFIRMATION", "COMPLETED") and approved_techs:
+                assigned = applicants[0] if applicants else rng.choice(approved_techs)
+                if assigned not in applicants:
+                    applicants.insert(0, assigned)
+            days = rng.randint(1, 14)
+            w.add(
+                "jobs",
+                ("id", "business_id", "title", "description", "service_category", "hourly_rate_min",
+                 "hourly_rate_max", "location", "start_date", "end_date", "status", "assigned_technician_id",
+                 "created_at", "updated_at"),
+                (job_id, uid, f"{category} job #{job_id}", f"{category} work needed at the {rng.choice(LOCATIONS)} site.",
+                 category, rate_min, rate_min + rng.choice([5, 10, 20]), rng.choice(LOCATIONS), 0, days * 86400,
+                 job_status, assigned, job_created.isoformat(), job_updated.isoformat()),
+            )
+            for tech in applicants:
+                if tech == assigned:
+                    app_status = "APPROVED"
+                elif assigned is not None:
+                    app_status = "DENIED"
+                else:
+                    app_status = "WITHDRAWN" if rng.random() < 0.1 else "APPLIED"
+                applied = job_created + timedelta(seconds=rng.randint(60, 3 * 86400))
+                w.add(
+                    "job_applications",
+                    ("job_id", "technician_id", "status", "applied_at"),
+                    (job_id, tech, app_status, applied.isoformat()),
+                )
+            for _ in range(rng.randint(0, 5)):
+                done = job_status == "COMPLETED" or (job_status != "OUTGOING" and rng.random() < 0.5)
+                w.add(
+                    "job_tasks",
+                    ("job_id", "title", "is_completed", "completed_at", "created_at"),
+                    (job_id, rng.choice(TASK_TITLES), int(done), now if done else None, job_created.isoformat()),
+                )
+            job_id += 1
+
+    w.flush_all()
+    conn.execute(
+        "UPDATE users SET is_verified = 1 WHERE email LIKE ? AND id IN "
+        "(SELECT user_id FROM verification_requests WHERE status = 'APPROVED')",
+        (f"%@{SYNTHETIC_DOMAIN}",),
+    )
+    w.counts["technician_current_state"] = rebuild_technician_states(conn)
+    conn.commit()
+    conn.close()
+    return dict(sorted(w.counts.items()))
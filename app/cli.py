@@ -0,0 +1,409 @@
+"""Flask CLI commands (`flask --app run <command>`)."""
+
+import json
+import os
+import time
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("build-previews")
+@click.option("--limit", type=int, default=None, help="Process at most this many documents per table.")
+@with_appcontext
+def build_previews_command(limit):
+    """Extract page count / text length / thumbnail for documents that have none yet."""
+    from .services.preview_service import build_missing_previews
+
+    done = build_missing_previews(limit=limit)
+    click.echo(f"Built previews for {done} document(s).")
+
+
+@click.command("cleanup-uploads")
+@click.option("--max-age", type=int, default=None, help="Idle seconds before an upload is dropped (default: CHUNKED_UPLOAD_TTL_SECONDS).")
+@with_appcontext
+def cleanup_uploads_command(max_age):
+    """Delete abandoned chunked uploads and their partial files."""
+    from .services.chunked_upload_service import cleanup_abandoned_uploads
+
+    removed = cleanup_abandoned_uploads(max_age)
+    click.echo(f"Removed {removed} abandoned upload(s).")
+
+
+@click.command("compress-static")
+@with_appcontext
+def compress_static_command():
+    """Write .gz/.br variants of static assets (run at deploy time)."""
+    from flask import current_app
+    from .compression import precompress_static
+
+    written = precompress_static(current_app.static_folder, int(current_app.config["COMPRESS_MIN_SIZE"]))
+    click.echo(f"Wrote {written} precompressed file(s).")
+
+
+@click.group("profiler")
+def profiler_group():
+    """Arm/disarm the sampling profiler (see app/profiler.py)."""
+
+
+@profiler_group.command("arm")
+@click.argument("endpoint")
+@click.option("-n", "--requests", "count", type=int, default=5, show_default=True, help="Number of requests to profile.")
+@click.option("--interval-ms", type=float, default=None, help="Sampling interval (default: PROFILER_INTERVAL_MS).")
+@with_appcontext
+def profiler_arm_command(endpoint, count, interval_ms):
+    """Profile the next N requests to ENDPOINT (e.g. admin.admin_technicians)."""
+    from flask import current_app
+    from .profiler import arm, profiler_dir
+
+    if endpoint not in current_app.view_functions:
+        raise click.BadParameter(f"Unknown endpoint {endpoint!r}.", param_hint="ENDPOINT")
+    if interval_ms is None:
+        interval_ms = float(current_app.config["PROFILER_INTERVAL_MS"])
+    try:
+        state = arm(profiler_dir(), endpoint, count, interval_ms)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(f"Armed for {state['remaining']} request(s) to {endpoint} every {state['interval_ms']:g} ms.")
+
+
+@profiler_group.command("disarm")
+@with_appcontext
+def profiler_disarm_command():
+    """Cancel a pending profiling run."""
+    from .profiler import disarm, profiler_dir
+
+    disarm(profiler_dir())
+    click.echo("Profiler disarmed.")
+
+
+@profiler_group.command("status")
+@with_appcontext
+def profiler_status_command():
+    """Show the armed endpoint and the collected profiles."""
+    from .profiler import list_profiles, profiler_dir, status
+
+    state = status(profiler_dir())
+    if state:
+        click.echo(f"Armed: {state['endpoint']} ({state['remaining']} request(s) left, every {state['interval_ms']:g} ms)")
+    else:
+        click.echo("Not armed.")
+    for p in list_profiles(profiler_dir()):
+        click.echo(f"  {p['name']}  {p['size']} bytes")
+
+
+@click.group("bench")
+def bench_group():
+    """Synthetic data and load tests (see app/bench/). Use a scratch DATABASE."""
+
+
+@bench_group.command("seed")
+@click.option("--businesses", type=int, default=200, show_default=True)
+@click.option("--technicians", type=int, default=1000, show_default=True)
+@click.option("--jobs-per-business", type=float, default=5.0, show_default=True, help="Mean jobs per approved business.")
+@click.option("--seed", type=int, default=42, show_default=True, help="Random seed (same seed = same data).")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+@with_appcontext
+def bench_seed_command(businesses, technicians, jobs_per_business, seed, yes):
+    """Fill DATABASE with synthetic accounts, documents, jobs and notifications."""
+    from flask import current_app
+    from .bench.synthetic import DEFAULT_PASSWORD, SYNTHETIC_DOMAIN, generate
+
+    db_path = current_app.config["DATABASE"]
+    if not yes:
+        click.confirm(f"Write synthetic data into {db_path}?", abort=True)
+    started = time.perf_counter()
+    counts = generate(
+        db_path,
+        current_app.config["UPLOAD_FOLDER"],
+        businesses=businesses,
+        technicians=technicians,
+        jobs_per_business=jobs_per_business,
+        seed=seed,
+    )
+    for table, n in counts.items():
+        click.echo(f"  {table:<28}{n:>10}")
+    click.echo(f"Done in {time.perf_counter() - started:.1f}s. Accounts: *@{SYNTHETIC_DOMAIN} / {DEFAULT_PASSWORD}")
+
+
+@bench_group.command("load")
+@click.option("--transport", type=click.Choice(["client", "http"]), default="client", show_default=True)
+@click.option("--users", type=int, default=20, show_default=True, help="Concurrent virtual users.")
+@click.option("--iterations", type=int, default=10, show_default=True, help="Journeys per virtual user.")
+@click.option("--seed", type=int, default=1, show_default=True)
+@click.option("--base-url", default=None, help="Target a running server (e.g. http://127.0.0.1:8000) instead.")
+@click.option("--json-out", type=click.Path(dir_okay=False), default=None, help="Also write the report as JSON.")
+@click.option("--max-p95-ms", type=float, default=None, help="Fail if overall p95 latency is above this.")
+@click.option("--max-error-rate", type=float, default=None, help="Fail if the error ratio (0-1) is above this.")
+@click.option("--min-rps", type=float, default=None, help="Fail if throughput is below this.")
+@with_appcontext
+def bench_load_command(transport, users, iterations, seed, base_url, json_out, max_p95_ms, max_error_rate, min_rps):
+    """Run the technician/business/admin journeys concurrently and report latency percentiles."""
+    from flask import current_app
+    from .bench import loadtest
+
+    app = current_app._get_current_object()
+    try:
+        report = loadtest.run(app, app.config["DATABASE"], users=users, iterations=iterations,
+                              transport=transport, seed=seed, base_url=base_url)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(loadtest.format_report(report))
+    if json_out:
+        with open(json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    failures = loadtest.gate(report, max_p95_ms=max_p95_ms, max_error_rate=max_error_rate, min_rps=min_rps)
+    for failure in failures:
+        click.echo(f"FAIL: {failure}", err=True)
+    if failures:
+        raise SystemExit(1)
+
+
+@bench_group.command("micro")
+@click.option("--size", type=click.Choice(["1k", "100k", "1m"]), default="1k", show_default=True,
+              help="Generated database size (built on first use).")
+@click.option("--bench-dir", type=click.Path(file_okay=False), default=None,
+              help="Where generated databases live (default: <instance>/bench).")
+@click.option("--only", multiple=True, help="Run only this benchmark (repeatable).")
+@click.option("--min-time", type=float, default=1.0, show_default=True, help="Seconds per benchmark.")
+@click.option("--save", "save_path", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+@click.option("--compare", "baseline_path", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Compare against a saved baseline and fail on regressions.")
+@click.option("--tolerance", type=float, default=0.10, show_default=True, help="Allowed median slowdown (0.10 = 10%).")
+@with_appcontext
+def bench_micro_command(size, bench_dir, only, min_time, save_path, baseline_path, tolerance):
+    """Time the hot service functions against a generated database."""
+    from flask import current_app
+    from .bench import micro
+
+    unknown = [name for name in only if name not in micro.BENCHMARKS]
+    if unknown:
+        raise click.BadParameter(f"Unknown benchmark(s): {', '.join(unknown)}.", param_hint="--only")
+    app = current_app._get_current_object()
+    bench_dir = bench_dir or os.path.join(app.instance_path, "bench")
+    db_path = micro.database_path(bench_dir, size)
+    if not os.path.exists(db_path):
+        click.echo(f"Generating {db_path} ...")
+    micro.ensure_database(bench_dir, size)
+    report = micro.run(app, db_path, size, only=set(only), min_time=min_time)
+    click.echo(micro.format_results(report))
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        _report_comparison(micro.compare(baseline, report, tolerance))
+
+
+@bench_group.command("compare")
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.option("--tolerance", type=float, default=0.10, show_default=True, help="Allowed median slowdown (0.10 = 10%).")
+def bench_compare_command(baseline, current, tolerance):
+    """Compare two saved micro-benchmark results; exit 1 on regressions."""
+    from .bench import micro
+
+    with open(baseline, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(current, encoding="utf-8") as fh:
+        cur = json.load(fh)
+    _report_comparison(micro.compare(base, cur, tolerance))
+
+
+def _report_comparison(result):
+    lines, regressions = result
+    click.echo(f"{'benchmark':<40}{'base us':>12}{'now us':>12}{'change':>10}")
+    for line in lines:
+        click.echo(line)
+    for regression in regressions:
+        click.echo(f"REGRESSION: {regression}", err=True)
+    if regressions:
+        raise SystemExit(1)
+
+
+@bench_group.command("startup")
+@click.option("--runs", type=int, default=3, show_default=True, help="Boots to time; the fastest counts.")
+@click.option("--top", type=int, default=15, show_default=True)
+@click.option("--budget-ms", type=float, default=None, help="Fail above this (default: STARTUP_BUDGET_MS).")
+@with_appcontext
+def bench_startup_command(runs, top, budget_ms):
+    """Show where app boot time goes (imports per package/module, create_app)."""
+    from flask import current_app
+    from .bench import startup
+
+    if budget_ms is None:
+        budget_ms = float(current_app.config["STARTUP_BUDGET_MS"])
+    project_root = os.path.dirname(current_app.root_path)
+    try:
+        summary = startup.summarize(startup.measure(project_root, runs), top)
+    except RuntimeError as e:
+        raise click.ClickException(f"Boot failed: {e}")
+    click.echo(startup.format_summary(summary, budget_ms))
+    if summary["total_ms"] > budget_ms:
+        raise SystemExit(1)
+
+
+@bench_group.command("job-race")
+@click.option("--jobs", type=int, default=20, show_default=True, help="Jobs fought over.")
+@click.option("--technicians", type=int, default=30, show_default=True)
+@click.option("--applicants", type=int, default=5, show_default=True, help="Applications per job.")
+@click.option("--threads", type=int, default=16, show_default=True)
+@click.option("--ops", type=int, default=200, show_default=True, help="Transitions attempted per thread.")
+@click.option("--seed", type=int, default=1, show_default=True)
+@with_appcontext
+def bench_job_race_command(jobs, technicians, applicants, threads, ops, seed):
+    """Race job state transitions from many threads on a scratch database and check invariants."""
+    from flask import current_app
+    from .bench import job_race
+
+    report = job_race.run(current_app._get_current_object(), jobs=jobs, technicians=technicians,
+                          applicants=applicants, threads=threads, ops=ops, seed=seed)
+    click.echo(job_race.format_report(report))
+    if report["violations"]:
+        raise SystemExit(1)
+
+
+@click.group("db")
+def db_group():
+    """Database schema (see SCHEMA_VERSION in app/db.py)."""
+
+
+@db_group.command("upgrade")
+@with_appcontext
+def db_upgrade_command():
+    """Create missing tables and apply migrations."""
+    from flask import current_app
+    from .db import upgrade_db
+
+    old, new = upgrade_db(current_app.config["DATABASE"])
+    click.echo(f"Schema v{old} -> v{new}." if old != new else f"Schema already at v{new}.")
+
+
+@db_group.command("status")
+@with_appcontext
+def db_status_command():
+    """Show the database schema version and the one this code expects."""
+    from flask import current_app
+    from .db import SCHEMA_VERSION, schema_version
+
+    current = schema_version(current_app.config["DATABASE"])
+    state = "up to date" if current == SCHEMA_VERSION else "upgrade needed" if current < SCHEMA_VERSION else "newer than code"
+    click.echo(f"{current_app.config['DATABASE']}: v{current} (code v{SCHEMA_VERSION}, {state})")
+
+
+@db_group.command("rebuild-technician-state")
+@with_appcontext
+def db_rebuild_technician_state_command():
+    """Recompute technician_current_state from verification requests and jobs."""
+    from .db import get_db
+    from .services.technician_state_service import rebuild_technician_states
+
+    db = get_db()
+    count = rebuild_technician_states(db)
+    db.commit()
+    click.echo(f"Rebuilt state for {count} technician(s).")
+
+
+@db_group.command("rebuild-review-queue")
+@with_appcontext
+def db_rebuild_review_queue_command():
+    """Recompute review-queue priorities and sort keys (run after changing REVIEW_QUEUE_AGE_STEP_SECONDS)."""
+    from flask import current_app
+    from .db import get_db
+    from .services.review_queue_service import install_review_queue
+
+    db = get_db()
+    step = current_app.config["REVIEW_QUEUE_AGE_STEP_SECONDS"]
+    install_review_queue(db, step)
+    db.commit()
+    click.echo(f"Review queue re-keyed with a {step}s age step.")
+
+
+@click.group("flags")
+def flags_group():
+    """Signup risk flag rules (app/services/flag_service.py)."""
+
+
+@flags_group.command("rescore")
+@click.option("--workers", type=int, default=os.cpu_count() or 1, show_default=True,
+              help="Processes evaluating the rules (1 = inline).")
+@click.option("--chunk-size", type=int, default=500, show_default=True, help="Requests per chunk / transaction.")
+@with_appcontext
+def flags_rescore_command(workers, chunk_size):
+    """Re-run the current rules over every verification request, replacing rule flags."""
+    from flask import current_app
+    from .services.flag_service import RULE_FLAG_TYPES, rescore
+
+    started = time.perf_counter()
+    stats = rescore(current_app.config["DATABASE"], workers=workers, chunk_size=chunk_size)
+    click.echo(
+        f"Rescored {stats['requests']} request(s): {stats['flags']} flag(s) of type "
+        f"{', '.join(RULE_FLAG_TYPES)} in {time.perf_counter() - started:.1f}s."
+    )
+
+
+@click.group("duplicates")
+def duplicates_group():
+    """Duplicate account / document index (app/services/duplicate_service.py)."""
+
+
+@duplicates_group.command("reindex")
+@click.option("--documents/--no-documents", default=True, show_default=True,
+              help="Also hash verification documents that have no sha256 yet.")
+@with_appcontext
+def duplicates_reindex_command(documents):
+    """Recompute name / registration-id keys for every account."""
+    from flask import current_app
+    from .db import get_db
+    from .services.duplicate_service import hash_missing_documents, rebuild_identity_keys
+
+    db = get_db()
+    keys = rebuild_identity_keys(db)
+    db.commit()
+    click.echo(f"Indexed {keys} name/registration key(s).")
+    if documents:
+        hashed = hash_missing_documents(db, current_app.config["UPLOAD_FOLDER"])
+        click.echo(f"Hashed {hashed} document(s).")
+
+
+@click.group("sweep")
+def sweep_group():
+    """Time-based transitions (app/services/sweeper_service.py)."""
+
+
+@sweep_group.command("run")
+@click.option("--only", "only", multiple=True,
+              type=click.Choice(["cooldown-expiry", "stale-outgoing", "auto-confirm", "idempotency-keys"]),
+              help="Run just this transition (repeatable).")
+@click.option("--loop", is_flag=True, help="Keep sweeping every --interval seconds instead of once (for a sidecar process).")
+@click.option("--interval", type=int, default=None, help="Seconds between sweeps with --loop (default: SWEEP_INTERVAL_SECONDS).")
+@with_appcontext
+def sweep_run_command(only, loop, interval):
+    """Notify expired cooldowns, close stale open jobs, auto-confirm old completions, purge idempotency keys."""
+    from flask import current_app
+    from .db import close_db
+    from .services.sweeper_service import run_sweep
+
+    interval = interval or current_app.config["SWEEP_INTERVAL_SECONDS"]
+    while True:
+        started = time.perf_counter()
+        counts = run_sweep(only)
+        close_db()
+        summary = ", ".join(f"{name}: {n}" for name, n in counts.items()) or "nothing enabled"
+        click.echo(f"Swept in {time.perf_counter() - started:.2f}s ({summary}).")
+        if not loop:
+            return
+        time.sleep(interval)
+
+
+def register_cli(app):
+    app.cli.add_command(build_previews_command)
+    app.cli.add_command(cleanup_uploads_command)
+    app.cli.add_command(compress_static_command)
+    app.cli.add_command(profiler_group)
+    app.cli.add_command(bench_group)
+    app.cli.add_command(db_group)
+    app.cli.add_command(flags_group)
+    app.cli.add_command(duplicates_group)
+    app.cli.add_command(sweep_group)
@@ -0,0 +1,222 @@
+"""Response compression.
+
+Two parts:
+ - CompressionMiddleware: WSGI middleware that gzip/brotli-encodes responses
+   whose type is on COMPRESS_MIMETYPES and whose size is at least
+   COMPRESS_MIN_SIZE. The body is compressed chunk by chunk as the app yields
+   it, so memory stays bounded even for streamed exports.
+ - Precompressed static files: `flask compress-static` writes .br/.gz files
+   next to each static asset at deploy time. The static view serves a variant
+   when the client accepts it and the variant is not older than the original.
+
+Brotli is used only if the optional `brotli` package is installed. Otherwise
+gzip is the only encoding offered.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import zlib
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli  # optional
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+PRECOMPRESS_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    accepted = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def choose_encoding(header: str, allow_br: bool = True) -> str | None:
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if allow_br and brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, *, min_size: int, mimetypes_allowed, gzip_level: int = 6, br_quality: int = 5):
+        self.wsgi_app = wsgi_app
+        self.min_size = int(min_size)
+        self.mimetypes_allowed = {m.lower() for m in mimetypes_allowed}
+        self.gzip_level = int(gzip_level)
+        self.br_quality = int(br_quality)
+
+    def _should_compress(self, status: str, headers) -> bool:
+        if not status.startswith("200"):
+            return False
+        lookup = {k.lower(): v for k, v in headers}
+        if "content-encoding" in lookup:
+            return False
+        if "no-transform" in lookup.get("cache-control", "").lower():
+            return False
+        mimetype = lookup.get("content-type", "").split(";", 1)[0].strip().lower()
+        if mimetype not in self.mimetypes_allowed:
+            return False
+        length = lookup.get("content-length")
+        if length is not None and length.isdigit() and int(length) < self.min_size:
+            return False
+        return True
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return self.wsgi_app(environ, start_response)
+        encoding = choose_encoding(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return self.wsgi_app(environ, start_response)
+
+        state = {}
+
+        def _start_response(status, headers, exc_info=None):
+            if self._should_compress(status, headers):
+                headers = [(k, v) for k, v in headers if k.lower() != "content-length"]
+                headers = [
+                    (k, (f"W/{v}" if not v.startswith("W/") else v)) if k.lower() == "etag" else (k, v)
+                    for k, v in headers
+                ]
+                vary = [v for k, v in headers if k.lower() == "vary"]
+                headers = [(k, v) for k, v in headers if k.lower() != "vary"]
+                vary_value = ", ".join(vary + ["Accept-Encoding"]) if vary else "Accept-Encoding"
+                headers += [("Content-Encoding", encoding), ("Vary", vary_value)]
+                state["compressor"] = (
+                    _BrotliStream(self.br_quality) if encoding == "br" else _GzipStream(self.gzip_level)
+                )
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, _start_response)
+        compressor = state.get("compressor")
+        if compressor is None:
+            return app_iter
+        return self._compress_iter(app_iter, compressor)
+
+    @staticmethod
+    def _compress_iter(app_iter, compressor):
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    out = compressor.compress(chunk)
+                    if out:
+                        yield out
+            tail = compressor.finish()
+            if tail:
+                yield tail
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                close()
+
+
+# =========================
+# Precompressed static files
+# =========================
+
+def _precompressible(path: str) -> bool:
+    mimetype, _ = mimetypes.guess_type(path)
+    allowed = current_app.config["COMPRESS_MIMETYPES"]
+    return mimetype is not None and mimetype in allowed
+
+
+def precompress_static(static_folder: str, min_size: int) -> int:
+    """Write .gz (and .br when available) variants for static assets. Returns files written."""
+    written = 0
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            src = os.path.join(root, name)
+            if os.path.getsize(src) < min_size or not _precompressible(src):
+                continue
+            with open(src, "rb") as fh:
+                data = fh.read()
+            with open(src + ".gz", "wb") as out:
+                out.write(gzip.compress(data, compresslevel=9, mtime=0))
+            written += 1
+            if brotli is not None:
+                with open(src + ".br", "wb") as out:
+                    out.write(brotli.compress(data, quality=11))
+                written += 1
+    return written
+
+
+def send_static_precompressed(filename: str):
+    """Replacement for Flask's static view that prefers .br/.gz variants."""
+    app = current_app
+    folder = app.static_folder
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is not None:
+        original = os.path.join(folder, filename)
+        variant = original + PRECOMPRESS_SUFFIXES[encoding]
+        if os.path.isfile(original) and os.path.isfile(variant) and os.path.getmtime(variant) >= os.path.getmtime(original):
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            rv = send_from_directory(
+                folder,
+                filename + PRECOMPRESS_SUFFIXES[encoding],
+                mimetype=mimetype,
+                max_age=app.get_send_file_max_age(filename),
+            )
+            rv.headers["Content-Encoding"] = encoding
+            rv.vary.add("Accept-Encoding")
+            return rv
+    return app.send_static_file(filename)
+
+
+def init_app(app):
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+    app.view_functions["static"] = send_static_precompressed
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config["COMPRESS_MIN_SIZE"],
+        mimetypes_allowed=app.config["COMPRESS_MIMETYPES"],
+        gzip_level=app.config["COMPRESS_GZIP_LEVEL"],
+        br_quality=app.config["COMPRESS_BR_QUALITY"],
+    )
@@ -1,6 +1,12 @@
 import sqlite3
+import time
 from flask import current_app, g
 
+from .sql_instrumentation import InstrumentedConnection
+
+# Bump when SCHEMA_SQL or _migrate() changes; stored in PRAGMA user_version.
+SCHEMA_VERSION = 12
+
 SCHEMA_SQL = '''
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,6 +45,11 @@ CREATE TABLE IF NOT EXISTS technician_skill_items (
     reviewed_at INTEGER,
     reviewed_by_admin_id INTEGER,
     rejection_reason TEXT,
+    -- review queue: age priority and the current admin's lease
+    priority INTEGER NOT NULL DEFAULT 0,
+    sort_key INTEGER NOT NULL DEFAULT 0,   -- priority with ageing baked in, set by trigger
+    claimed_by_admin_id INTEGER,
+    lease_expires INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY(user_id) REFERENCES users(id),
     FOREIGN KEY(reviewed_by_admin_id) REFERENCES users(id)
 );
@@ -51,6 +62,12 @@ CREATE TABLE IF NOT EXISTS technician_skill_documents (
     file_extension TEXT NOT NULL,
     file_size INTEGER NOT NULL,
     uploaded_at INTEGER NOT NULL,
+    -- preview metadata (filled in by preview_service after upload)
+    preview_status TEXT,
+    page_count INTEGER,
+    text_length INTEGER,
+    thumbnail_filename TEXT,
+    preview_generated_at INTEGER,
     FOREIGN KEY(skill_item_id) REFERENCES technician_skill_items(id)
 );
 
@@ -74,6 +91,12 @@ CREATE TABLE IF NOT EXISTS verification_requests (
     rejection_reason TEXT,
     rejected_at INTEGER,
     cooldown_until INTEGER,
+    cooldown_notified_at INTEGER,      -- set by the sweeper once the user is told the cooldown ended
+    -- review queue: flag-severity priority and the current admin's lease
+    priority INTEGER NOT NULL DEFAULT 0,
+    sort_key INTEGER NOT NULL DEFAULT 0,   -- priority with ageing baked in, set by trigger
+    claimed_by_admin_id INTEGER,
+    lease_expires INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY(user_id) REFERENCES users(id),
     FOREIGN KEY(reviewed_by_admin_id) REFERENCES users(id)
 );
@@ -98,6 +121,14 @@ CREATE TABLE IF NOT EXISTS uploaded_documents (
     file_extension TEXT NOT NULL,
     file_size INTEGER NOT NULL,
     uploaded_at INTEGER NOT NULL,
+    -- preview metadata (filled in by preview_service after upload)
+    preview_status TEXT,
+    page_count INTEGER,
+    text_length INTEGER,
+    thumbnail_filename TEXT,
+    preview_generated_at INTEGER,
+    -- content hash, for duplicate-document detection (services/duplicate_service.py)
+    sha256 TEXT,
     FOREIGN KEY(verification_request_id) REFERENCES verification_requests(id),
     FOREIGN KEY(uploaded_by_user_id) REFERENCES users(id)
 );
@@ -150,6 +181,8 @@ CREATE TABLE IF NOT EXISTS jobs (
     assigned_technician_id INTEGER,
     created_at INTEGER NOT NULL,
     updated_at INTEGER NOT NULL,
+    -- bumped by every status change; compare-and-swap guard (services/job_state_service.py)
+    version INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY(business_id) REFERENCES users(id),
     FOREIGN KEY(assigned_technician_id) REFERENCES users(id)
 );
@@ -186,12 +219,86 @@ CREATE TABLE IF NOT EXISTS job_tasks (
     created_at INTEGER NOT NULL,  -- Added for task creation timestamp
     FOREIGN KEY(job_id) REFERENCES jobs(id)
 );
+
+-- =========================
+-- CHUNKED UPLOADS (resumable, in progress)
+-- =========================
+CREATE TABLE IF NOT EXISTS chunked_uploads (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,           -- 0 for signup uploads made before the account exists
+    guest_key TEXT,                     -- owner of those guest uploads (session key)
+    original_filename TEXT NOT NULL,
+    file_extension TEXT NOT NULL,
+    total_size INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    received_bytes INTEGER NOT NULL DEFAULT 0,   -- chunk bytes on disk (guest quota counts these)
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL CHECK(status IN ('OPEN','COMPLETE')),
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES users(id)
+);
+CREATE INDEX IF NOT EXISTS idx_chunked_uploads_updated_at ON chunked_uploads(updated_at);
+
+-- =========================
+-- TECHNICIAN CURRENT STATE (denormalized, see services/technician_state_service.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS technician_current_state (
+    user_id INTEGER PRIMARY KEY,
+    verification_request_id INTEGER,
+    verification_status TEXT,
+    current_job_id INTEGER,
+    current_job_status TEXT,
+    updated_at INTEGER NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES users(id)
+);
+CREATE INDEX IF NOT EXISTS idx_technician_state_status ON technician_current_state(verification_status);
+CREATE INDEX IF NOT EXISTS idx_technician_profiles_full_name ON technician_profiles(full_name);
+CREATE INDEX IF NOT EXISTS idx_verification_requests_user_latest
+    ON verification_requests(user_id, submitted_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_jobs_assigned_status
+    ON jobs(assigned_technician_id, status, updated_at);
+-- covering index for the business dashboard version stamp (jobs_dashboard_version_for_business)
+CREATE INDEX IF NOT EXISTS idx_jobs_business_updated ON jobs(business_id, updated_at);
+
+-- =========================
+-- DUPLICATE DETECTION (normalized identity keys, see services/duplicate_service.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS identity_keys (
+    kind TEXT NOT NULL CHECK(kind IN ('REGISTRATION_ID','NAME','DOCUMENT')),
+    key TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, key, user_id),
+    FOREIGN KEY(user_id) REFERENCES users(id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_identity_keys_user ON identity_keys(user_id, kind);
+CREATE INDEX IF NOT EXISTS idx_uploaded_documents_request ON uploaded_documents(verification_request_id);
+
+-- =========================
+-- IDEMPOTENCY KEYS (stored responses of retried POSTs, see services/idempotency_service.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    scope TEXT NOT NULL,               -- "METHOD /path" the key was first used for
+    status_code INTEGER,               -- NULL while the first request is still running
+    response_body TEXT,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys(created_at);
 '''
 
 
+def connect(path, **kwargs):
+    """sqlite3.connect() with per-request query instrumentation (see sql_instrumentation.py)."""
+    return sqlite3.connect(path, factory=InstrumentedConnection, **kwargs)
+
+
 def get_db():
     if "db" not in g:
-        g.db = sqlite3.connect(current_app.config["DATABASE"])
+        g.db = connect(current_app.config["DATABASE"])
         g.db.row_factory = sqlite3.Row
     return g.db
 
@@ -201,12 +308,36 @@ def close_db(e=None):
         db.close()
 
 def init_db():
-    db = get_db()
+    _upgrade(get_db())
+
+
+def _upgrade(db):
     db.executescript(SCHEMA_SQL)
     _migrate(db)
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     db.commit()
 
 
+def schema_version(path: str) -> int:
+    """PRAGMA user_version of the database file (0 for a new or never-versioned one)."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def upgrade_db(path: str) -> tuple[int, int]:
+    """Create missing tables and apply migrations. Returns (old, new) schema version."""
+    old = schema_version(path)
+    conn = sqlite3.connect(path)
+    try:
+        _upgrade(conn)
+    finally:
+        conn.close()
+    return old, SCHEMA_VERSION
+
+
 def _has_column(db, table: str, column: str) -> bool:
     row = db.execute(f"PRAGMA table_info({table})").fetchall()
     return any(r[1] == column for r in row)
@@ -237,10 +368,127 @@ def _migrate(db):
     if not _has_column(db, "job_tasks", "created_at"):
         db.execute("ALTER TABLE job_tasks ADD COLUMN created_at INTEGER NOT NULL DEFAULT 0")
 
+    # document preview metadata (page count, text length, thumbnail)
+    for table in ("uploaded_documents", "technician_skill_documents"):
+        for column, decl in (
+            ("preview_status", "TEXT"),
+            ("page_count", "INTEGER"),
+            ("text_length", "INTEGER"),
+            ("thumbnail_filename", "TEXT"),
+            ("preview_generated_at", "INTEGER"),
+        ):
+            if not _has_column(db, table, column):
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    # technician_current_state: backfill once for databases that predate it
+    if db.execute("SELECT 1 FROM technician_current_state LIMIT 1").fetchone() is None:
+        from .services.technician_state_service import rebuild_technician_states
+        rebuild_technician_states(db)
+
+    # account_search: FTS5 trigram index over names/emails (skipped if this SQLite lacks it)
+    from .services.search_service import install_account_search
+    install_account_search(db)
+
+    # review queue: priority + claim lease columns, claim indexes, flag-priority and sort_key triggers
+    for table in ("verification_requests", "technician_skill_items"):
+        for column, decl in (
+            ("priority", "INTEGER NOT NULL DEFAULT 0"),
+            ("sort_key", "INTEGER NOT NULL DEFAULT 0"),
+            ("claimed_by_admin_id", "INTEGER"),
+            ("lease_expires", "INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if not _has_column(db, table, column):
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    from .services.review_queue_service import install_review_queue
+    install_review_queue(db)
+
+    # duplicate detection: document hashes (filled on upload / `flask duplicates reindex`), identity keys
+    if not _has_column(db, "uploaded_documents", "sha256"):
+        db.execute("ALTER TABLE uploaded_documents ADD COLUMN sha256 TEXT")
+    if db.execute("SELECT 1 FROM identity_keys LIMIT 1").fetchone() is None:
+        from .services.duplicate_service import rebuild_identity_keys
+        rebuild_identity_keys(db)
+
+    # sweeper (services/sweeper_service.py): cooldown-expiry marker and the indexes each transition walks.
+    # Cooldowns that ended before the upgrade are marked as notified so the first sweep does not announce them.
+    if not _has_column(db, "verification_requests", "cooldown_notified_at"):
+        db.execute("ALTER TABLE verification_requests ADD COLUMN cooldown_notified_at INTEGER")
+        db.execute(
+            "UPDATE verification_requests SET cooldown_notified_at = cooldown_until "
+            "WHERE status = 'REJECTED' AND cooldown_until <= ?",
+            (int(time.time()),),
+        )
+    db.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_verification_requests_cooldown_due
+            ON verification_requests(status, cooldown_notified_at, cooldown_until);
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs(status, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_job_applications_job_applied ON job_applications(job_id, applied_at);
+        """
+    )
+
+    # chunked_uploads.guest_key: resumable uploads from the signup forms (no account yet)
+    if not _has_column(db, "chunked_uploads", "guest_key"):
+        db.execute("ALTER TABLE chunked_uploads ADD COLUMN guest_key TEXT")
+    if not _has_column(db, "chunked_uploads", "received_bytes"):
+        db.execute("ALTER TABLE chunked_uploads ADD COLUMN received_bytes INTEGER NOT NULL DEFAULT 0")
+        db.execute("UPDATE chunked_uploads SET received_bytes = total_size WHERE status = 'COMPLETE'")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_chunked_uploads_owner ON chunked_uploads(user_id, guest_key)")
+
+    # jobs.version: optimistic concurrency for job state transitions
+    if not _has_column(db, "jobs", "version"):
+        db.execute("ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    # job_applications: one row per (job, technician). Keep the most advanced duplicate
+    # (APPROVED > APPLIED > DENIED > WITHDRAWN, then the newest) before adding the constraint.
+    if not db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_job_applications_job_technician'"
+    ).fetchone():
+        db.execute(
+            """
+            DELETE FROM job_applications WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY job_id, technician_id
+                        ORDER BY CASE status WHEN 'APPROVED' THEN 0 WHEN 'APPLIED' THEN 1 WHEN 'DENIED' THEN 2 ELSE 3 END,
+                                 id DESC
+                    ) AS rn
+                    FROM job_applications
+                ) WHERE rn > 1
+            )
+            """
+        )
+        db.execute("CREATE UNIQUE INDEX idx_job_applications_job_technician ON job_applications(job_id, technician_id)")
+
 def init_app(app):
+    """Register teardown and check the schema version.
+
+    Boot only reads PRAGMA user_version. Schema work happens in `flask db upgrade`,
+    or here when DB_AUTO_MIGRATE is on and the database is behind.
+    """
     app.teardown_appcontext(close_db)
-    with app.app_context():
-        init_db()
+    path = app.config["DATABASE"]
+    current = schema_version(path)
+    if current == SCHEMA_VERSION:
+        return
+    if current > SCHEMA_VERSION:
+        app.logger.warning("Database schema v%d is newer than this code (v%d).", current, SCHEMA_VERSION)
+        return
+    if not app.config.get("DB_AUTO_MIGRATE", False):
+        # Keep booting so `flask db upgrade` can run, but refuse traffic (and fail /readyz) until it has.
+        app.logger.error(
+            "Database schema is v%d, this code needs v%d. Run `flask --app run db upgrade`.", current, SCHEMA_VERSION
+        )
+        app.extensions["schema_outdated"] = (current, SCHEMA_VERSION)
+
+        @app.before_request
+        def _schema_outdated():
+            from flask import request
+            if request.blueprint != "health":
+                return "Service unavailable: database upgrade pending.", 503
+        return
+    upgrade_db(path)
+    app.logger.info("Upgraded database schema v%d -> v%d.", current, SCHEMA_VERSION)
 
 
 
@@ -0,0 +1,336 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms live in a dict in each worker; recording a
+value is a dict update under a lock. With several gunicorn workers, each one
+writes a JSON snapshot of its values to METRICS_DIR (at most once every
+METRICS_FLUSH_SECONDS, and on exit). /metrics merges all snapshots:
+ - counters and histograms are summed, including workers that have exited
+   (so totals never go backwards after a restart of one worker),
+ - gauges are summed over live workers only.
+A scrape folds the snapshots of exited workers into one archive.json (under
+a file lock) and deletes them, so worker recycling (max_requests) does not
+grow the directory or the work per scrape.
+Without METRICS_DIR, /metrics reports the serving process only.
+
+Usage from services:
+
+    from .. import metrics
+    metrics.inc("upload_bytes_total", size, kind="skill")
+    metrics.observe("notification_fanout_recipients", len(user_ids))
+    metrics.gauge_add("background_queue_depth", 1, queue="preview")
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+
+from flask import g, request
+
+try:
+    import fcntl
+except ImportError:  # Windows (waitress, single process): dead snapshots are simply kept
+    fcntl = None
+
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by blueprint, endpoint, method and status.", None),
+    "http_request_duration_seconds": (
+        "histogram", "Request latency by blueprint and endpoint.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "http_requests_in_flight": ("gauge", "Requests currently being handled.", None),
+    "db_connections_opened_total": ("counter", "SQLite connections opened.", None),
+    "db_connections_open": ("gauge", "SQLite connections currently open.", None),
+    "db_locked_errors_total": ("counter", "Statements that failed with database is locked/busy.", None),
+    "db_busy_retries_total": ("counter", "Statements retried after SQLITE_BUSY.", None),
+    "upload_bytes_total": ("counter", "Bytes received in document uploads, by kind.", None),
+    "notifications_created_total": ("counter", "Notifications created, by type.", None),
+    "notification_fanout_recipients": (
+        "histogram", "Recipients per notification fan-out.",
+        (1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    ),
+    "background_queue_depth": ("gauge", "Jobs submitted to a background pool and not finished yet.", None),
+    "signup_rule_eval_seconds": (
+        "histogram", "Time to evaluate the signup risk rules for one verification request, by role.",
+        (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.025),
+    ),
+    "signup_flags_total": ("counter", "Risk flags raised at signup, by flag type and severity.", None),
+    "job_transition_conflicts_total": ("counter", "Job transitions retried after a version conflict, by transition.", None),
+    "sweeper_transitions_total": ("counter", "Rows moved by the periodic sweeper, by transition.", None),
+}
+
+_lock = threading.Lock()
+_counters: dict[tuple, float] = {}
+_gauges: dict[tuple, float] = {}
+_histograms: dict[tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+_config = {"dir": None, "flush_seconds": 1.0}
+_last_flush = 0.0
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge_add(name: str, value: float, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        row = _histograms.get(key)
+        if row is None:
+            row = _histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        for i, upper in enumerate(buckets):
+            if value <= upper:
+                row[i] += 1
+                break
+        else:
+            row[len(buckets)] += 1
+        row[-1] += value
+
+
+def counter_total(name: str) -> float:
+    """This process's value of a counter, summed over all label sets."""
+    with _lock:
+        return sum(v for k, v in _counters.items() if k[0] == name)
+
+
+# =========================
+# Multi-process snapshots
+# =========================
+
+def _snapshot() -> dict:
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "counters": [[k[0], k[1], v] for k, v in _counters.items()],
+            "gauges": [[k[0], k[1], v] for k, v in _gauges.items()],
+            "histograms": [[k[0], k[1], list(v)] for k, v in _histograms.items()],
+        }
+
+
+def flush(force: bool = False) -> None:
+    global _last_flush
+    directory = _config["dir"]
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < _config["flush_seconds"]:
+        return
+    _last_flush = now
+    path = os.path.join(directory, f"worker-{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(_snapshot(), fh)
+    os.replace(tmp, path)
+
+
+def reset() -> None:
+    """Drop all values. Called in a worker right after fork, so values recorded
+    by a preloading parent (e.g. the boot-time DB connection) are not counted
+    once per worker."""
+    global _last_flush
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+    _last_flush = 0.0
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+ARCHIVE_FILE = "archive.json"
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None  # missing, or being replaced right now
+
+
+def _write_json(path: str, data) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _archive_dead(directory: str, names: list[str]) -> None:
+    """Add the counters/histograms of exited workers' snapshots to archive.json and delete them."""
+    if fcntl is None:
+        return
+    with open(os.path.join(directory, "archive.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            folded = []
+            for name in names:
+                path = os.path.join(directory, name)
+                snap = _read_json(path)  # None: another scrape archived it first
+                if snap is not None and not _pid_alive(int(snap["pid"])):
+                    folded.append((path, snap))
+            if not folded:
+                return
+            archive_path = os.path.join(directory, ARCHIVE_FILE)
+            archive = _read_json(archive_path) or {"counters": [], "gauges": [], "histograms": []}
+            counters, _, histograms = _merge([archive] + [snap for _, snap in folded])
+            _write_json(archive_path, {
+                "counters": [[k[0], [list(p) for p in k[1]], v] for k, v in counters.items()],
+                "gauges": [],
+                "histograms": [[k[0], [list(p) for p in k[1]], row] for k, row in histograms.items()],
+            })
+            for path, _ in folded:
+                os.remove(path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_snapshots() -> list[dict]:
+    directory = _config["dir"]
+    if not directory:
+        return [_snapshot()]
+    flush(force=True)
+    workers = [n for n in os.listdir(directory) if n.startswith("worker-") and n.endswith(".json")]
+    dead = [n for n in workers if not _pid_alive(int(n[len("worker-"):-len(".json")]))]
+    if dead:
+        _archive_dead(directory, dead)
+    snapshots = []
+    for name in os.listdir(directory):
+        if name == ARCHIVE_FILE or (name.startswith("worker-") and name.endswith(".json")):
+            snap = _read_json(os.path.join(directory, name))
+            if snap is not None:
+                snapshots.append(snap)
+    return snapshots
+
+
+def _merge(snapshots):
+    counters: dict[tuple, float] = {}
+    gauges: dict[tuple, float] = {}
+    histograms: dict[tuple, list] = {}
+    for snap in snapshots:
+        # archive.json has no pid: its gauges (none) belong to no live worker
+        alive = "pid" in snap and (snap["pid"] == os.getpid() or _pid_alive(int(snap["pid"])))
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(tuple(p) for p in labels))
+            counters[key] = counters.get(key, 0) + value
+        if alive:
+            for name, labels, value in snap["gauges"]:
+                key = (name, tuple(tuple(p) for p in labels))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, row in snap["histograms"]:
+            key = (name, tuple(tuple(p) for p in labels))
+            merged = histograms.setdefault(key, [0] * len(row))
+            for i, v in enumerate(row):
+                merged[i] += v
+    return counters, gauges, histograms
+
+
+# =========================
+# Exposition
+# =========================
+
+def _fmt_labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_latest() -> str:
+    counters, gauges, histograms = _merge(_load_snapshots())
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), row in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for upper, count in zip(list(buckets) + [math.inf], row[:-1]):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(upper) else _fmt_value(float(upper))
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(row[-1])}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+        else:
+            source = counters if kind == "counter" else gauges
+            for (metric, labels), value in sorted(source.items()):
+                if metric == name:
+                    lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# Request hooks
+# =========================
+
+def init_app(app):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    directory = app.config.get("METRICS_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        _config["dir"] = directory
+        atexit.register(flush, True)
+    _config["flush_seconds"] = float(app.config.get("METRICS_FLUSH_SECONDS", 1.0))
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+        gauge_add("http_requests_in_flight", 1)
+
+    @app.after_request
+    def _metrics_record(response):
+        started = g.get("metrics_started")
+        if started is not None:
+            blueprint = request.blueprint or ""
+            endpoint = request.endpoint or "<unmatched>"
+            inc("http_requests_total", blueprint=blueprint, endpoint=endpoint,
+                method=request.method, status=response.status_code)
+            observe("http_request_duration_seconds", time.perf_counter() - started,
+                    blueprint=blueprint, endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc=None):
+        if g.pop("metrics_started", None) is not None:
+            gauge_add("http_requests_in_flight", -1)
+        flush()
@@ -0,0 +1,211 @@
+"""Opt-in sampling profiler for production requests.
+
+An admin arms the profiler for the next N requests to one endpoint
+(`flask profiler arm admin.admin_technicians -n 5` or /admin/profiler). While such a
+request runs, a background thread samples the request thread's stack every
+PROFILER_INTERVAL_MS and counts identical stacks. When the request finishes,
+the counts are written to PROFILER_DIR as collapsed stacks
+("frame;frame;frame count" lines), which flamegraph.pl and speedscope read
+directly.
+
+The arm state is a small JSON file in PROFILER_DIR, so arming from the CLI or
+from any worker applies to all workers. Claiming a slot takes a file lock.
+When the profiler is disarmed, a request costs one cached check
+(the file is re-read at most once per PROFILER_POLL_SECONDS) and no thread is
+started.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app, g, request
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+
+ARM_FILE = "armed.json"
+PROFILE_SUFFIX = ".collapsed"
+
+
+def profiler_dir(app=None) -> str:
+    return (app or current_app).config["PROFILER_DIR"]
+
+
+@contextmanager
+def _locked(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_state(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, ARM_FILE), encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if state.get("remaining", 0) <= 0 or state.get("expires_at", 0) < time.time():
+        return None
+    return state
+
+
+def _write_state(directory: str, state: dict | None) -> None:
+    path = os.path.join(directory, ARM_FILE)
+    if state is None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+# =========================
+# Arming (admin page / CLI)
+# =========================
+
+def arm(directory: str, endpoint: str, requests: int, interval_ms: float, ttl_seconds: int = 3600) -> dict:
+    if requests <= 0:
+        raise ValueError("Number of requests must be positive.")
+    if interval_ms < 1:
+        raise ValueError("Sampling interval must be at least 1 ms.")
+    state = {
+        "endpoint": endpoint,
+        "remaining": int(requests),
+        "interval_ms": float(interval_ms),
+        "armed_at": int(time.time()),
+        "expires_at": int(time.time()) + int(ttl_seconds),
+    }
+    with _locked(directory):
+        _write_state(directory, state)
+    return state
+
+
+def disarm(directory: str) -> None:
+    with _locked(directory):
+        _write_state(directory, None)
+
+
+def status(directory: str) -> dict | None:
+    return _read_state(directory)
+
+
+def list_profiles(directory: str) -> list[dict]:
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for name in os.listdir(directory):
+        if name.endswith(PROFILE_SUFFIX):
+            path = os.path.join(directory, name)
+            out.append({"name": name, "size": os.path.getsize(path), "mtime": int(os.path.getmtime(path))})
+    return sorted(out, key=lambda p: p["mtime"], reverse=True)
+
+
+def _claim(directory: str, endpoint: str) -> dict | None:
+    with _locked(directory):
+        state = _read_state(directory)
+        if state is None or state["endpoint"] != endpoint:
+            return None
+        state["remaining"] -= 1
+        _write_state(directory, state if state["remaining"] > 0 else None)
+        return state
+
+
+# =========================
+# Sampling
+# =========================
+
+class _Sampler(threading.Thread):
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _write_profile(directory: str, endpoint: str, sampler: _Sampler, elapsed: float) -> str:
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+    name = f"{endpoint.replace('.', '_')}-{stamp}-{os.getpid()}{PROFILE_SUFFIX}"
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, count in sampler.stacks.most_common():
+            fh.write(f"{stack} {count}\n")
+    current_app.logger.info(
+        "Profiled %s: %d samples over %.1f ms -> %s", endpoint, sampler.samples, elapsed * 1000.0, path
+    )
+    return path
+
+
+def init_app(app):
+    directory = profiler_dir(app)
+    poll = float(app.config["PROFILER_POLL_SECONDS"])
+    cache = {"checked": 0.0, "endpoint": None}
+
+    def armed_endpoint():
+        now = time.monotonic()
+        if now - cache["checked"] >= poll:
+            state = _read_state(directory)
+            cache["endpoint"] = state["endpoint"] if state else None
+            cache["checked"] = now
+        return cache["endpoint"]
+
+    @app.before_request
+    def _maybe_start_profiler():
+        endpoint = armed_endpoint()
+        if endpoint is None or endpoint != request.endpoint:
+            return
+        state = _claim(directory, endpoint)
+        if state is None:
+            cache["checked"] = 0.0
+            return
+        sampler = _Sampler(threading.get_ident(), state["interval_ms"] / 1000.0)
+        g.profiler = (sampler, time.perf_counter())
+        sampler.start()
+
+    @app.teardown_request
+    def _maybe_stop_profiler(exc=None):
+        running = g.pop("profiler", None)
+        if running is None:
+            return
+        sampler, started = running
+        sampler.stop()
+        _write_profile(directory, request.endpoint, sampler, time.perf_counter() - started)
@@ -1,14 +1,16 @@
-import os
-
-from flask import Blueprint, render_template, redirect, url_for, request, flash, session, current_app, send_from_directory, send_file, abort
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session, current_app, abort, jsonify
 from ..auth.decorators import admin_required, login_required
 from ..services.verification_service import (
     list_pending_requests, list_requests_by_status, count_requests_by_status,
-    get_request_by_id, list_flags, approve_request, reject_request
+    get_request_by_id, list_flags, approve_request, reject_request,
+    review_queue_version, bulk_approve_requests, bulk_reject_requests,
 )
-from ..services.document_service import list_documents, get_document_by_id
+from ..services.document_service import list_documents, get_document_by_id, send_stored_document
 from ..services.notification_service import create_notification
 from ..services.user_service import get_user_by_id
+from ..services.search_service import matching_user_ids, search_accounts
+from ..services.export_service import FORMATS, stream_export
+from ..services.review_queue_service import claim_item, claim_next, list_claims, queue_depths, release_claim
 from ..db import get_db
 from ..services.skill_service import (
     get_skill_document_by_id,
@@ -17,6 +19,8 @@ from ..services.skill_service import (
     list_skill_documents,
     approve_skill_request,
     reject_skill_request,
+    bulk_approve_skill_requests,
+    bulk_reject_skill_requests,
 )
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -24,36 +28,22 @@ bp = Blueprint("admin", __name__, url_prefix="/admin")
 @bp.get("/homepage")
 @admin_required
 def homepage():
-    pending = list_pending_requests()
-    pending_skills = list_pending_skill_requests()
-
-    approved_count = count_requests_by_status("APPROVED")
-    rejected_count = count_requests_by_status("REJECTED")
-
-    retrieved_count = count_requests_by_status("RETRIEVED")
-
-    approved = list_requests_by_status("APPROVED")
-    rejected = list_requests_by_status("REJECTED")
-    retrieved = list_requests_by_status("RETRIEVED")
-
-    # Company-wide stats (UI-only)
-    db = get_db()
-    tech_count = db.execute("SELECT COUNT(1) AS c FROM users WHERE role='TECHNICIAN'").fetchone()["c"]
-    biz_count = db.execute("SELECT COUNT(1) AS c FROM users WHERE role='BUSINESS'").fetchone()["c"]
+    # Counters and pending lists are fragment-cached; they are only queried on a cache miss.
+    def load_overview():
+        db = get_db()
+        return {
+            "pending": list_pending_requests(),
+            "pending_skills": list_pending_skill_requests(),
+            "approved_count": count_requests_by_status("APPROVED"),
+            "rejected_count": count_requests_by_status("REJECTED"),
+            "tech_count": db.execute("SELECT COUNT(1) AS c FROM users WHERE role='TECHNICIAN'").fetchone()["c"],
+            "biz_count": db.execute("SELECT COUNT(1) AS c FROM users WHERE role='BUSINESS'").fetchone()["c"],
+        }
 
     return render_template(
         "admin_homepage.html",
-        pending=pending,
-        pending_skills=pending_skills,
-        approved=approved,
-        rejected=rejected,
-        retrieved=retrieved,
-        approved_count=int(approved_count),
-        rejected_count=int(rejected_count),
-        retrieved_count=int(retrieved_count),
-        tech_count=int(tech_count),
-        biz_count=int(biz_count),
-        
+        review_version=review_queue_version(),
+        load_overview=load_overview,
     )
 
 
@@ -73,6 +63,7 @@ def skills_review(skill_id: int):
     if skill is None:
         flash("Skill request not found.", "error")
         return redirect(url_for("admin.skills_pending"))
+    _claim_for_review("skill", skill_id)
     docs = list_skill_documents(skill_id)
     user = get_user_by_id(skill["user_id"])
     return render_template("admin_skill_review.html", skill=skill, docs=docs, user=user)
@@ -108,6 +99,54 @@ def skills_reject(skill_id: int):
     flash("Skill rejected.", "info")
     return redirect(url_for("admin.skills_review", skill_id=skill_id))
 
+# =========================
+# Review queue (claim leases, see services/review_queue_service.py)
+# =========================
+
+def _claim_for_review(queue: str, item_id: int) -> None:
+    """Opening a pending item leases it to this admin; warn if someone else holds it."""
+    holder = claim_item(queue, item_id, session["user_id"], current_app.config["REVIEW_LEASE_SECONDS"])
+    if holder is not None:
+        other = get_user_by_id(holder["claimed_by_admin_id"])
+        flash(
+            f"Claimed by {other['email'] if other else 'another admin'} until {_fmt_ts(holder['lease_expires'])}; "
+            "you cannot approve or reject it before then.",
+            "error",
+        )
+
+
+@bp.get("/queue")
+@admin_required
+def review_queue():
+    return render_template(
+        "admin_review_queue.html",
+        claims=list_claims(session["user_id"]),
+        depths=queue_depths(),
+        claim_size=current_app.config["REVIEW_QUEUE_CLAIM_SIZE"],
+        fmt_ts=_fmt_ts,
+    )
+
+
+@bp.post("/queue/<queue>/claim")
+@admin_required
+def review_queue_claim(queue: str):
+    if queue not in ("verification", "skill"):
+        abort(404)
+    n = request.form.get("n", type=int) or current_app.config["REVIEW_QUEUE_CLAIM_SIZE"]
+    ids = claim_next(queue, session["user_id"], max(1, min(n, 100)), current_app.config["REVIEW_LEASE_SECONDS"])
+    flash(f"You hold {len(ids)} {queue} item(s)." if ids else "Nothing left to claim.", "info")
+    return redirect(url_for("admin.review_queue"))
+
+
+@bp.post("/queue/<queue>/<int:item_id>/release")
+@admin_required
+def review_queue_release(queue: str, item_id: int):
+    if queue not in ("verification", "skill"):
+        abort(404)
+    release_claim(queue, item_id, session["user_id"])
+    return redirect(url_for("admin.review_queue"))
+
+
 @bp.get("/review/<int:request_id>")
 @admin_required
 def review_request(request_id: int):
@@ -115,6 +154,7 @@ def review_request(request_id: int):
     if req is None:
         flash("Request not found.", "error")
         return redirect(url_for("admin.homepage"))
+    _claim_for_review("verification", request_id)
     flags = list_flags(request_id)
     docs = list_documents(request_id)
     urow = get_user_by_id(req["user_id"]) or {}
@@ -138,7 +178,11 @@ def approve(request_id: int):
         flash("Invalid request state.", "error")
         return redirect(url_for("admin.homepage"))
 
-    approve_request(request_id, session["user_id"])
+    try:
+        approve_request(request_id, session["user_id"])
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin.review_request", request_id=request_id))
     create_notification(req["user_id"], "VERIFICATION_APPROVED", "🎉 Your account has been verified! You may now proceed.")
     flash("Approved.", "info")
     return redirect(url_for("admin.review_request", request_id=request_id))
@@ -152,20 +196,80 @@ def reject(request_id: int):
         return redirect(url_for("admin.homepage"))
 
     reason = request.form.get("reason", "").strip() or "Rejected by admin."
-    reject_request(request_id, session["user_id"], reason, current_app.config["COOLDOWN_DURATION_SECONDS"])
+    try:
+        reject_request(request_id, session["user_id"], reason, current_app.config["COOLDOWN_DURATION_SECONDS"])
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin.review_request", request_id=request_id))
     create_notification(req["user_id"], "VERIFICATION_REJECTED", f"Your account verification was rejected. Reason: {reason}")
     flash("Rejected (cooldown started).", "info")
     return redirect(url_for("admin.review_request", request_id=request_id))
 
 
+# =========================
+# Bulk review (form field `ids`, repeated or comma separated)
+# =========================
+
+def _bulk_ids() -> list[int]:
+    ids = []
+    for value in request.form.getlist("ids"):
+        ids += [int(v) for v in value.split(",") if v.strip().isdigit()]
+    return ids
+
+
+def _bulk_response(results: dict, outcome: str, redirect_to: str):
+    """JSON {id: outcome} for API callers, otherwise a flash summary and a redirect."""
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"results": {str(k): v for k, v in results.items()}})
+    done = sum(1 for v in results.values() if v == outcome)
+    skipped = len(results) - done
+    flash(f"{outcome.capitalize()} {done}." + (f" Skipped {skipped} (no longer pending, claimed by another admin, or not found)." if skipped else ""),
+          "info" if not skipped else "error")
+    return redirect(url_for(redirect_to))
+
+
+@bp.post("/bulk/approve")
+@admin_required
+def bulk_approve():
+    results = bulk_approve_requests(_bulk_ids(), session["user_id"], current_app.config["BULK_REVIEW_CHUNK_SIZE"])
+    return _bulk_response(results, "APPROVED", "admin.homepage")
+
+
+@bp.post("/bulk/reject")
+@admin_required
+def bulk_reject():
+    reason = request.form.get("reason", "").strip() or "Rejected by admin."
+    results = bulk_reject_requests(
+        _bulk_ids(), session["user_id"], reason,
+        current_app.config["COOLDOWN_DURATION_SECONDS"], current_app.config["BULK_REVIEW_CHUNK_SIZE"],
+    )
+    return _bulk_response(results, "REJECTED", "admin.homepage")
+
+
+@bp.post("/skills/bulk/approve")
+@admin_required
+def skills_bulk_approve():
+    results = bulk_approve_skill_requests(_bulk_ids(), session["user_id"], current_app.config["BULK_REVIEW_CHUNK_SIZE"])
+    return _bulk_response(results, "APPROVED", "admin.skills_pending")
+
+
+@bp.post("/skills/bulk/reject")
+@admin_required
+def skills_bulk_reject():
+    reason = request.form.get("reason", "").strip() or "Rejected by admin."
+    results = bulk_reject_skill_requests(
+        _bulk_ids(), session["user_id"], reason, current_app.config["BULK_REVIEW_CHUNK_SIZE"]
+    )
+    return _bulk_response(results, "REJECTED", "admin.skills_pending")
+
+
 @bp.get("/documents/download/<int:doc_id>")
 @login_required
 def download_document(doc_id: int):
     doc = get_document_by_id(doc_id)
     if doc is None:
         abort(404)
-    folder = current_app.config["UPLOAD_FOLDER"]
-    return send_from_directory(folder, doc["stored_filename"], as_attachment=True, download_name=doc["original_filename"])
+    return send_stored_document(doc, as_attachment=True)
 
 
 @bp.get("/documents/view/<int:doc_id>")
@@ -176,11 +280,22 @@ def view_document(doc_id: int):
         abort(404)
     if (doc["file_extension"] or "").lower() != "pdf":
         abort(404)
-    folder = current_app.config["UPLOAD_FOLDER"]
-    path = os.path.join(folder, doc["stored_filename"])
-    if not os.path.exists(path):
+    return send_stored_document(doc, mimetype="application/pdf")
+
+
+def _thumbnail_doc(doc):
+    # Thumbnails live next to the upload and are served like any other stored file.
+    name = doc["thumbnail_filename"]
+    return {"stored_filename": name, "original_filename": name}
+
+
+@bp.get("/documents/thumb/<int:doc_id>")
+@admin_required
+def document_thumbnail(doc_id: int):
+    doc = get_document_by_id(doc_id)
+    if doc is None or not doc["thumbnail_filename"]:
         abort(404)
-    return send_file(path, mimetype="application/pdf", as_attachment=False)
+    return send_stored_document(_thumbnail_doc(doc))
 
 
 @bp.get("/skills/documents/download/<int:doc_id>")
@@ -189,8 +304,7 @@ def download_skill_document(doc_id: int):
     doc = get_skill_document_by_id(doc_id)
     if doc is None:
         abort(404)
-    folder = current_app.config["UPLOAD_FOLDER"]
-    return send_from_directory(folder, doc["stored_filename"], as_attachment=True, download_name=doc["original_filename"])
+    return send_stored_document(doc, as_attachment=True)
 
 
 @bp.get("/skills/documents/view/<int:doc_id>")
@@ -201,13 +315,17 @@ def view_skill_document(doc_id: int):
         abort(404)
     if (doc["file_extension"] or "").lower() != "pdf":
         abort(404)
-    folder = current_app.config["UPLOAD_FOLDER"]
-    path = os.path.join(folder, doc["stored_filename"])
-    if not os.path.exists(path):
-        abort(404)
-    return send_file(path, mimetype="application/pdf", as_attachment=False)
+    return send_stored_document(doc, mimetype="application/pdf")
 
 
+@bp.get("/skills/documents/thumb/<int:doc_id>")
+@admin_required
+def skill_document_thumbnail(doc_id: int):
+    doc = get_skill_document_by_id(doc_id)
+    if doc is None or not doc["thumbnail_filename"]:
+        abort(404)
+    return send_stored_document(_thumbnail_doc(doc))
+
 
 # ===============================
 # Admin Listings + Search + Audit Logs (V4)
@@ -224,25 +342,34 @@ def _fmt_ts(ts: int | None) -> str:
     except Exception:
         return str(ts)
 
-@bp.get("/technicians")
-@admin_required
-def admin_technicians():
+ADMIN_TECHNICIANS_PER_PAGE = 50
+
 
+def _technician_listing_query(status: str, q: str = ""):
+    """(from+where sql, params) for technicians whose latest verification request has
+    `status`, optionally filtered by name or email (trigram index, see search_service)."""
+    where = """
+    WHERE s.verification_status = ?
+      AND u.role = 'TECHNICIAN'
+      AND u.is_active = 1
     """
-    List approved/active technicians.
-    Adds current job (description + status) if they are assigned to an ACTIVE / PENDING_CONFIRMATION job.
-    Supports optional ?q=<name> filtering.
+    params = [status.upper()]
+    if q:
+        ids_sql, ids_params = matching_user_ids(q, "TECHNICIAN")
+        where += f" AND tp.user_id IN ({ids_sql})"
+        params += ids_params
+    sql = f"""
+    FROM technician_profiles tp
+    JOIN technician_current_state s ON s.user_id = tp.user_id
+    JOIN users u ON u.id = tp.user_id
+    LEFT JOIN verification_requests vr ON vr.id = s.verification_request_id
+    LEFT JOIN jobs j ON j.id = s.current_job_id
+    {where}
     """
-    conn = get_db()
-    q = (request.args.get("q") or "").strip()
+    return sql, params
 
-    status = (request.args.get("status") or "approved").lower().strip()
-    if status not in ("approved","rejected"):
-        status = "approved"
 
-
-    sql = """
-    SELECT
+_TECHNICIAN_LISTING_COLUMNS = """
       tp.user_id AS technician_user_id,
       tp.full_name AS technician_name,
       u.email AS email,
@@ -255,42 +382,51 @@ def admin_technicians():
       vr.id AS latest_verification_request_id,
       vr.status AS verification_status,
       vr.rejection_reason AS rejection_reason
-    FROM technician_profiles tp
-    JOIN users u ON u.id = tp.user_id
-    LEFT JOIN verification_requests vr
-      ON vr.id = (
-        SELECT vr2.id
-        FROM verification_requests vr2
-        WHERE vr2.user_id = tp.user_id
-        ORDER BY vr2.submitted_at DESC
-        LIMIT 1
-      )
-    LEFT JOIN jobs j
-      ON j.id = (
-        SELECT j2.id
-        FROM jobs j2
-        WHERE j2.assigned_technician_id = tp.user_id
-          AND j2.status IN ('ACTIVE','PENDING_CONFIRMATION')
-        ORDER BY j2.updated_at DESC
-        LIMIT 1
-      )
-    WHERE u.role = 'TECHNICIAN'
-      AND u.is_active = 1
-      AND (
-            (? = 'approved' AND vr.status = 'APPROVED')
-         OR (? = 'rejected' AND vr.status = 'REJECTED')
-      )
+"""
+
+
+def list_technicians_for_admin(conn, status: str, q: str = "", page: int = 1,
+                               per_page: int = ADMIN_TECHNICIANS_PER_PAGE):
+    """One page of technicians whose latest verification request has `status`
+    ('approved' or 'rejected'), with their current ACTIVE / PENDING_CONFIRMATION job,
+    optionally filtered by name or email. Returns (rows, total).
+
+    Reads technician_current_state, so this is one indexed join per row instead of
+    two correlated subqueries.
     """
-    params = [status, status]
-    if q:
-        sql += " AND tp.full_name LIKE ?"
-        params.append(f"%{q}%")
+    sql, params = _technician_listing_query(status, q)
+    total = conn.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {_TECHNICIAN_LISTING_COLUMNS} {sql} ORDER BY tp.full_name ASC, tp.user_id ASC LIMIT ? OFFSET ?",
+        params + [int(per_page), (max(1, int(page)) - 1) * int(per_page)],
+    ).fetchall()
+    return rows, total
 
-    sql += " ORDER BY tp.full_name ASC"
 
-    technicians = conn.execute(sql, params).fetchall()
+@bp.get("/technicians")
+@admin_required
+def admin_technicians():
 
-    return render_template("admin/technicians.html", technicians=technicians, q=q, status=status, fmt_ts=_fmt_ts)
+    """
+    List approved/active technicians.
+    Adds current job (description + status) if they are assigned to an ACTIVE / PENDING_CONFIRMATION job.
+    Supports optional ?q=<name> filtering and ?page=<n> (ADMIN_TECHNICIANS_PER_PAGE per page).
+    """
+    conn = get_db()
+    q = (request.args.get("q") or "").strip()
+
+    status = (request.args.get("status") or "approved").lower().strip()
+    if status not in ("approved","rejected"):
+        status = "approved"
+
+    page = request.args.get("page", 1, type=int) or 1
+    technicians, total = list_technicians_for_admin(conn, status, q, page)
+    pages = max(1, -(-total // ADMIN_TECHNICIANS_PER_PAGE))
+
+    return render_template(
+        "admin/technicians.html", technicians=technicians, q=q, status=status, fmt_ts=_fmt_ts,
+        page=min(max(1, page), pages), pages=pages, total=total,
+    )
 
 
 
@@ -301,37 +437,29 @@ def admin_technicians():
 @bp.get("/technicians/search")
 @admin_required
 def admin_technician_search():
-    conn = get_db()
     q = (request.args.get("q") or "").strip()
-    if not q:
-        return jsonify([])
-
-    rows = conn.execute(
-        "SELECT tp.full_name AS name, vr.id AS request_id "
-        "FROM technician_profiles tp "
-        "JOIN users u ON u.id = tp.user_id "
-        "JOIN verification_requests vr ON vr.user_id = tp.user_id "
-        "WHERE u.role = 'TECHNICIAN' AND tp.full_name LIKE ? "
-        "ORDER BY tp.full_name ASC LIMIT 8",
-        (f"%{q}%",),
-    ).fetchall()
-
+    rows = search_accounts(q, role="TECHNICIAN")
     return jsonify([{"name": r["name"], "request_id": r["request_id"]} for r in rows if r["name"] and r["request_id"]])
 
-    
 
-
-@bp.get("/businesses")
+@bp.get("/accounts/search")
 @admin_required
-def admin_businesses():
-    status = (request.args.get("status") or "approved").upper().strip()
-    if status not in ("APPROVED", "REJECTED"):
-        status = "APPROVED"
+def admin_account_search():
+    """Autocomplete over technicians and businesses (name or email), one entry per account."""
+    q = (request.args.get("q") or "").strip()
+    role = (request.args.get("role") or "").upper() or None
+    if role not in (None, "TECHNICIAN", "BUSINESS"):
+        role = None
+    return jsonify([
+        {"name": r["name"], "email": r["email"], "role": r["role"], "request_id": r["request_id"]}
+        for r in search_accounts(q, role=role)
+        if r["request_id"]
+    ])
 
-    conn = get_db()
+    
 
-    rows = conn.execute(
-        """
+
+_BUSINESS_LISTING_SQL = """
         SELECT
           bp.user_id AS business_user_id,
           bp.company_name AS business_name,
@@ -374,9 +502,19 @@ def admin_businesses():
           AND u.is_active = 1
           AND vr.status = ?
         ORDER BY bp.company_name ASC
-        """,
-        (status,),
-    ).fetchall()
+"""
+
+
+@bp.get("/businesses")
+@admin_required
+def admin_businesses():
+    status = (request.args.get("status") or "approved").upper().strip()
+    if status not in ("APPROVED", "REJECTED"):
+        status = "APPROVED"
+
+    conn = get_db()
+
+    rows = conn.execute(_BUSINESS_LISTING_SQL, (status,)).fetchall()
 
     return render_template("admin/businesses.html", businesses=rows, status=status.lower(), fmt_ts=_fmt_ts)
 
@@ -492,6 +630,96 @@ def audit_logs():
 
 
 
+# =========================
+# Streaming exports (CSV / NDJSON), same filters as the pages above
+# =========================
+
+# jobs / job_applications store ISO strings, admin_actions epoch seconds.
+_EPOCH = "CASE WHEN typeof({col}) = 'integer' THEN {col} ELSE CAST(strftime('%s', {col}) AS INTEGER) END"
+
+_AUDIT_SOURCES = {
+    "admin": f"""
+        SELECT {_EPOCH.format(col="aa.timestamp")} AS ts, 'ADMIN' AS actor_role, u.email AS actor_name,
+               aa.action_type AS action, aa.target_verification_request_id AS target_id, aa.notes AS details
+        FROM admin_actions aa
+        LEFT JOIN users u ON u.id = aa.admin_user_id
+    """,
+    "business": f"""
+        SELECT {_EPOCH.format(col="j.created_at")} AS ts, 'BUSINESS' AS actor_role, bp.company_name AS actor_name,
+               'JOB_CREATED' AS action, j.id AS target_id, j.title AS details
+        FROM jobs j
+        LEFT JOIN business_profiles bp ON bp.user_id = j.business_id
+        UNION ALL
+        SELECT {_EPOCH.format(col="j.updated_at")}, 'BUSINESS', bp.company_name, 'JOB_UPDATED', j.id,
+               'status=' || j.status || ', assigned_technician_id=' || COALESCE(j.assigned_technician_id, 'NULL')
+        FROM jobs j
+        LEFT JOIN business_profiles bp ON bp.user_id = j.business_id
+        WHERE j.updated_at IS NOT NULL AND j.updated_at != j.created_at
+    """,
+    "technician": f"""
+        SELECT {_EPOCH.format(col="ja.applied_at")} AS ts, 'TECHNICIAN' AS actor_role, tp.full_name AS actor_name,
+               'JOB_APPLICATION_' || ja.status AS action, ja.job_id AS target_id, j.title AS details
+        FROM job_applications ja
+        LEFT JOIN technician_profiles tp ON tp.user_id = ja.technician_id
+        LEFT JOIN jobs j ON j.id = ja.job_id
+    """,
+}
+
+
+def _export_format(fmt: str) -> str:
+    if fmt not in FORMATS:
+        abort(404)
+    return fmt
+
+
+def _export_name(kind: str) -> str:
+    return f"{kind}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+
+
+@bp.get("/export/technicians.<fmt>")
+@admin_required
+def export_technicians(fmt):
+    """All technicians for ?status / ?q (as /admin/technicians, without paging)."""
+    fmt = _export_format(fmt)
+    status = (request.args.get("status") or "approved").lower().strip()
+    if status not in ("approved", "rejected"):
+        status = "approved"
+    sql, params = _technician_listing_query(status, (request.args.get("q") or "").strip())
+    return stream_export(
+        f"SELECT {_TECHNICIAN_LISTING_COLUMNS} {sql} ORDER BY tp.full_name ASC, tp.user_id ASC",
+        params, fmt, _export_name(f"technicians-{status}"),
+    )
+
+
+@bp.get("/export/businesses.<fmt>")
+@admin_required
+def export_businesses(fmt):
+    """All businesses for ?status (as /admin/businesses)."""
+    fmt = _export_format(fmt)
+    status = (request.args.get("status") or "approved").upper().strip()
+    if status not in ("APPROVED", "REJECTED"):
+        status = "APPROVED"
+    return stream_export(_BUSINESS_LISTING_SQL, [status], fmt, _export_name(f"businesses-{status.lower()}"))
+
+
+@bp.get("/export/audit-logs.<fmt>")
+@admin_required
+def export_audit_logs(fmt):
+    """Full audit history for ?actor (the page shows only the most recent events), newest first."""
+    fmt = _export_format(fmt)
+    actor = (request.args.get("actor") or "all").lower()
+    if actor not in ("all", "admin", "business", "technician"):
+        actor = "all"
+    sources = list(_AUDIT_SOURCES) if actor == "all" else [actor]
+    union = " UNION ALL ".join(_AUDIT_SOURCES[name] for name in sources)
+    sql = f"""
+        SELECT datetime(ts, 'unixepoch') AS time_utc, actor_role, actor_name, action, target_id, details
+        FROM ({union})
+        ORDER BY ts DESC
+    """
+    return stream_export(sql, [], fmt, _export_name(f"audit-{actor}"))
+
+
 @bp.get("/review-view/<int:request_id>")
 @admin_required
 def review_view(request_id: int):
@@ -547,3 +775,75 @@ def review_view(request_id: int):
         flags=flags,
         docs=docs,
     )
+
+
+@bp.get("/debug/sql")
+@admin_required
+def sql_stats():
+    """Per-endpoint SQL aggregates for this worker process (?reset=1 clears them)."""
+    from ..sql_instrumentation import endpoint_stats, reset_endpoint_stats
+
+    stats = endpoint_stats()
+    if request.args.get("reset") == "1":
+        reset_endpoint_stats()
+    return jsonify(stats)
+
+
+@bp.get("/profiler")
+@admin_required
+def profiler_page():
+    from ..profiler import list_profiles, profiler_dir, status
+
+    endpoints = sorted(ep for ep in current_app.view_functions if ep != "static")
+    return render_template(
+        "admin/profiler.html",
+        state=status(profiler_dir()),
+        profiles=list_profiles(profiler_dir()),
+        endpoints=endpoints,
+        default_interval=current_app.config["PROFILER_INTERVAL_MS"],
+        fmt_ts=_fmt_ts,
+    )
+
+
+@bp.post("/profiler/arm")
+@admin_required
+def profiler_arm():
+    from ..profiler import arm, profiler_dir
+
+    endpoint = (request.form.get("endpoint") or "").strip()
+    if endpoint not in current_app.view_functions:
+        flash("Unknown endpoint.", "error")
+        return redirect(url_for("admin.profiler_page"))
+    try:
+        arm(
+            profiler_dir(),
+            endpoint,
+            request.form.get("requests", type=int) or 0,
+            request.form.get("interval_ms", type=float) or float(current_app.config["PROFILER_INTERVAL_MS"]),
+        )
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin.profiler_page"))
+    flash(f"Profiler armed for {endpoint}.", "success")
+    return redirect(url_for("admin.profiler_page"))
+
+
+@bp.post("/profiler/disarm")
+@admin_required
+def profiler_disarm():
+    from ..profiler import disarm, profiler_dir
+
+    disarm(profiler_dir())
+    flash("Profiler disarmed.", "success")
+    return redirect(url_for("admin.profiler_page"))
+
+
+@bp.get("/profiler/profiles/<path:name>")
+@admin_required
+def profiler_download(name):
+    from flask import send_from_directory
+    from ..profiler import PROFILE_SUFFIX, profiler_dir
+
+    if not name.endswith(PROFILE_SUFFIX):
+        abort(404)
+    return send_from_directory(profiler_dir(), name, as_attachment=True, mimetype="text/plain")
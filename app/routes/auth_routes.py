@@ -1,10 +1,28 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from ..services.user_service import get_user_by_email, verify_password, update_last_login
+from ..services.user_service import get_user_by_email, verify_password, update_last_login, rehash_password_if_needed
+from ..services.password_service import login_attempt_allowed, PasswordHashingBusy
 from ..services.verification_service import get_latest_request_for_user, is_cooldown_active_for_request
 from ..auth.session import login_user, logout_user, current_user_role
 
 bp = Blueprint("auth", __name__)
 
+# POST endpoints that hash or verify a password -> the GET form to send the user back to.
+_HASHING_FORM_ENDPOINTS = {
+    "auth.login_post": "auth.login_get",
+    "request.request_technician_post": "request.technician_signup_get",
+    "request.request_business_post": "request.business_signup_get",
+    "user.change_password_post": "user.change_password_get",
+    "user.profile_change_email_post": "user.profile_get",
+}
+
+
+@bp.app_errorhandler(PasswordHashingBusy)
+def password_hashing_busy(e):
+    # Signup, login and password change all hash; a full or slow pool is not a 500.
+    flash(str(e), "error")
+    return redirect(url_for(_HASHING_FORM_ENDPOINTS.get(request.endpoint, "auth.login_get")))
+
+
 @bp.get("/login")
 def login_get():
     # If already authenticated, never allow returning to public login page.
@@ -19,9 +37,21 @@ def login_get():
 def login_post():
     email = request.form.get("email", "").strip().lower()
     password = request.form.get("password", "")
+
+    if not login_attempt_allowed(request.remote_addr, email):
+        flash("Too many login attempts. Please wait a minute and try again.", "error")
+        return redirect(url_for("auth.login_get"))
+
     user = get_user_by_email(email)
+    try:
+        ok = user is not None and verify_password(user, password)
+        if ok:
+            rehash_password_if_needed(user, password)
+    except PasswordHashingBusy as e:
+        flash(str(e), "error")
+        return redirect(url_for("auth.login_get"))
 
-    if user is None or not verify_password(user, password):
+    if not ok:
         flash("Invalid credentials.", "error")
         return redirect(url_for("auth.login_get"))
 
@@ -4,16 +4,19 @@ from ..services.notification_service import list_notifications
 from ..services.jobs import (
     create_job as create_job_service,
     get_job_stats_for_business,
+    jobs_dashboard_version_for_business,
     get_jobs_by_business,
     get_job_details_for_business,
     add_job_task,
-    delete_job as delete_job_service,
     delete_task as delete_task_service,
-    approve_job_completion,
     get_applications_for_job,
-    approve_application,
     deny_application,
 )
+from ..services.job_state_service import (
+    approve_application,
+    approve_job_completion,
+    delete_job as delete_job_service,
+)
 
 bp = Blueprint("business", __name__, url_prefix="/business")
 
@@ -73,8 +76,11 @@ def download_own_cert(doc_id):
 def dashboard():
     """Business dashboard with job statistics and quick actions."""
     user_id = session["user_id"]
-    stats = get_job_stats_for_business(user_id)
-    return render_template("business/dashboard.html", stats=stats)
+    return render_template(
+        "business/dashboard.html",
+        jobs_version=jobs_dashboard_version_for_business(user_id),
+        load_stats=lambda: get_job_stats_for_business(user_id),
+    )
 
 
 @bp.get("/jobs")
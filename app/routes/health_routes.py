@@ -0,0 +1,35 @@
+import os
+
+from flask import Blueprint, current_app, jsonify
+
+from ..db import get_db
+
+bp = Blueprint("health", __name__)
+
+
+@bp.get("/healthz")
+def liveness():
+    """The process is up and serving requests."""
+    return jsonify({"status": "ok"})
+
+
+@bp.get("/readyz")
+def readiness():
+    """Ready for traffic: the database answers at the expected schema version and the
+    upload folder is writable.
+
+    Load balancers should route to a worker only while this returns 200.
+    """
+    checks = {}
+    try:
+        get_db().execute("SELECT 1 FROM users LIMIT 1").fetchall()
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+    outdated = current_app.extensions.get("schema_outdated")
+    checks["schema"] = f"error: v{outdated[0]}, code needs v{outdated[1]}" if outdated else "ok"
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    checks["uploads"] = "ok" if os.access(upload_folder, os.W_OK) else "error: not writable"
+
+    ready = all(v == "ok" for v in checks.values())
+    return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
@@ -0,0 +1,23 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+
+from .. import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>`.
+
+    With no token configured it is closed unless METRICS_PUBLIC is set.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {token}"):
+            abort(401)
+    elif not current_app.config.get("METRICS_PUBLIC"):
+        abort(403)
+    return Response(metrics.render_latest(), mimetype="text/plain", headers={"Cache-Control": "no-store"})
@@ -15,15 +15,13 @@ from ..services.profile_service import (
 )
 from ..services.verification_service import (
     create_verification_request,
-    attach_flag,
     get_latest_request_for_user,
     is_cooldown_active_for_request,
 )
 from ..services.document_service import save_uploaded_documents
-from ..services.flag_service import (
-    compute_common_flags,
-    compute_technician_flags,
-)
+from ..services.chunked_upload_service import completed_upload_files, release_uploads, upload_owner
+from ..services.flag_service import flag_verification_request
+from ..services.duplicate_service import flag_duplicates
 
 bp = Blueprint("request", __name__)
 
@@ -110,23 +108,26 @@ def request_technician_post():
     )
 
     files = request.files.getlist("cert_docs")
+    uploaded = []
     try:
+        # Large files arrive as finished chunked uploads (static/js/chunked_upload.js)
+        uploaded = completed_upload_files(upload_owner(), request.form.getlist("upload_id"))
         save_uploaded_documents(
-            files,
+            files + uploaded,
             verification_request_id=req_id,
             uploaded_by_user_id=user["id"],
             document_type="CERTIFICATION",
         )
-    except ValueError as e:
+    except (LookupError, ValueError) as e:
+        release_uploads(uploaded, delete=False)
         flash(str(e), "error")
         # Leave the account created, but keep the user on the signup page
         # so they can retry with a smaller file.
         return redirect(url_for("request.technician_signup_get"))
+    release_uploads(uploaded)
 
-    for ft, sev, desc in compute_common_flags(full_name):
-        attach_flag(req_id, ft, sev, desc)
-    for ft, sev, desc in compute_technician_flags(skills_list):
-        attach_flag(req_id, ft, sev, desc)
+    flag_verification_request(req_id, "TECHNICIAN", full_name, skills_list)
+    flag_duplicates(req_id)
 
     login_user(user)
     flash("Account created. Verification is pending admin approval.", "info")
@@ -198,19 +199,23 @@ def request_business_post():
     )
 
     files = request.files.getlist("support_docs")
+    uploaded = []
     try:
+        uploaded = completed_upload_files(upload_owner(), request.form.getlist("upload_id"))
         save_uploaded_documents(
-            files,
+            files + uploaded,
             verification_request_id=req_id,
             uploaded_by_user_id=user["id"],
             document_type="BUSINESS_SUPPORT",
         )
-    except ValueError as e:
+    except (LookupError, ValueError) as e:
+        release_uploads(uploaded, delete=False)
         flash(str(e), "error")
         return redirect(url_for("request.business_signup_get"))
+    release_uploads(uploaded)
 
-    for ft, sev, desc in compute_common_flags(company_name):
-        attach_flag(req_id, ft, sev, desc)
+    flag_verification_request(req_id, "BUSINESS", company_name)
+    flag_duplicates(req_id)
 
     login_user(user)
     flash("Account created. Verification is pending admin approval.", "info")
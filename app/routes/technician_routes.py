@@ -1,6 +1,5 @@
 import os
 import sqlite3
-from datetime import datetime
 from pathlib import Path
 
 from flask import (
@@ -15,10 +14,20 @@ from flask import (
     jsonify,
 )
 
+from ..db import connect
 from ..auth.decorators import login_required, role_required, verification_required
 from ..services.notification_service import list_notifications
 from ..services.profile_service import get_technician_profile
 from ..services.jobs_enum import JobStatus
+from ..services.jobs import (
+    AlreadyApplied,
+    DomainError,
+    JobNotFound,
+    apply_to_job as apply_to_job_service,
+    jobs_dashboard_version_for_technician,
+)
+from ..services.idempotency_service import idempotent
+from ..services.job_state_service import request_completion
 
 bp = Blueprint("technician", __name__, url_prefix="/technician")
 
@@ -35,7 +44,7 @@ def _db_path() -> str:
 
 
 def _conn():
-    conn = sqlite3.connect(_db_path())
+    conn = connect(_db_path())
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -94,17 +103,20 @@ def dashboard_page():
     tech = get_technician_profile(user_id)
     notifications = list_notifications(user_id, unread_only=True)
 
-    active_jobs = list_active_jobs_for_technician(user_id)
-    completed_jobs = list_completed_jobs_for_technician(user_id)
-    recommended_jobs = list_recommended_jobs_for_technician(user_id)
+    # Job sections are fragment-cached; they are only queried on a cache miss.
+    def load_job_sections():
+        return {
+            "active_jobs": list_active_jobs_for_technician(user_id),
+            "completed_jobs": list_completed_jobs_for_technician(user_id),
+            "recommended_jobs": list_recommended_jobs_for_technician(user_id),
+        }
 
     return render_template(
         "technician/dashboard.html",
         tech=tech,
         unread_notifications=notifications,
-        active_jobs=active_jobs,
-        completed_jobs=completed_jobs,
-        recommended_jobs=recommended_jobs,
+        jobs_version=jobs_dashboard_version_for_technician(user_id),
+        load_job_sections=load_job_sections,
     )
 
 
@@ -219,39 +231,17 @@ def download_own_skill_cert(doc_id):
 @login_required
 @verification_required
 @role_required("TECHNICIAN")
+@idempotent
 def apply_to_job(job_id):
-    technician_id = session["user_id"]
-    conn = _conn()
-    cur = conn.cursor()
     try:
-        # 1. Verify job exists and is still OUTGOING
-        cur.execute("SELECT status FROM jobs WHERE id = ?", (job_id,))
-        job = cur.fetchone()
-        if not job:
-            return jsonify({"error": "Job not found"}), 404
-        if job["status"] != JobStatus.OUTGOING.value:
-            return jsonify({"error": "Job is no longer accepting applications"}), 400
-
-        # 2. Insert application
-        created_at = datetime.utcnow().isoformat()
-        cur.execute(
-            """
-            INSERT INTO job_applications (job_id, technician_id, status, applied_at)
-            VALUES (?, ?, 'APPLIED', ?)
-            """,
-            (job_id, technician_id, created_at),
-        )
-        conn.commit()
-        return jsonify({"success": True}), 201
-
-    except sqlite3.IntegrityError as e:
-        # Likely duplicate (if you have a unique constraint)
+        application_id = apply_to_job_service(job_id=job_id, technician_id=session["user_id"])
+    except JobNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except AlreadyApplied:
         return jsonify({"error": "You have already applied to this job"}), 409
-    except Exception as e:
-        # Catch any other error and return it
-        return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
+    except DomainError:
+        return jsonify({"error": "Job is no longer accepting applications"}), 400
+    return jsonify({"success": True, "application_id": application_id}), 201
 
 
 # ======================================================
@@ -266,54 +256,15 @@ def apply_to_job(job_id):
 @role_required("TECHNICIAN")
 def mark_job_complete(job_id):
     """Mark an active job as complete (moves to PENDING_CONFIRMATION)."""
-    technician_id = session["user_id"]
-    conn = _conn()
-    cur = conn.cursor()
     try:
-        # Verify job exists, is ACTIVE, and assigned to this technician
-        cur.execute(
-            """
-            SELECT id, status, assigned_technician_id
-            FROM jobs
-            WHERE id = ?
-            """,
-            (job_id,),
-        )
-        job = cur.fetchone()
-        if not job:
-            return jsonify({"error": "Job not found"}), 404
-
-        if job["status"] != JobStatus.ACTIVE.value:
-            return jsonify({"error": "Job is not active"}), 400
-
-        if job["assigned_technician_id"] != technician_id:
-            return jsonify({"error": "You are not assigned to this job"}), 403
-
-        # Update job status
-        cur.execute(
-            """
-            UPDATE jobs
-            SET status = ?, updated_at = ?
-            WHERE id = ? AND status = ?
-            """,
-            (
-                JobStatus.PENDING_CONFIRMATION.value,
-                datetime.utcnow().isoformat(),
-                job_id,
-                JobStatus.ACTIVE.value,
-            ),
-        )
-
-        if cur.rowcount == 0:
-            return jsonify({"error": "Failed to update job status"}), 500
-
-        conn.commit()
-        return jsonify({"success": True}), 200
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
+        request_completion(job_id, session["user_id"])
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"success": True}), 200
 
 
 # ======================================================
@@ -350,24 +301,31 @@ def job_view(job_id: int):
 @verification_required
 def add_skill():
     from app.services.skill_service import create_skill_request, attach_skill_documents
+    from app.services.chunked_upload_service import completed_upload_files, release_uploads
 
     skill_name = (request.form.get("skill_name") or "").strip()
     skill_description = (request.form.get("skill_description") or "").strip() or None
 
     files = request.files.getlist("certs")
-    if not files or all((f is None or f.filename == "") for f in files):
+    upload_ids = [u for u in request.form.getlist("upload_id") if u.strip()]
+    if not upload_ids and (not files or all((f is None or f.filename == "") for f in files)):
         flash("Please upload at least one certificate file.", "error")
         return redirect(url_for("technician.homepage_page"))
 
+    uploaded = []
     try:
+        uploaded = completed_upload_files(session["user_id"], upload_ids)
         skill_item_id = create_skill_request(session["user_id"], skill_name, skill_description)
         upload_dir = current_app.config.get("UPLOAD_FOLDER") or (current_app.instance_path + "/uploads")
         os.makedirs(upload_dir, exist_ok=True)
-        attach_skill_documents(skill_item_id, files, upload_dir)
+        attach_skill_documents(skill_item_id, files + uploaded, upload_dir)
+        release_uploads(uploaded)
         flash("Skill submitted for approval.", "success")
     except ValueError as e:
+        release_uploads(uploaded, delete=False)
         flash(str(e), "error")
     except Exception:
+        release_uploads(uploaded, delete=False)
         flash("Upload failed. Please try again.", "error")
 
     return redirect(url_for("technician.homepage_page"))
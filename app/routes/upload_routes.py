@@ -0,0 +1,72 @@
+from flask import Blueprint, current_app, request, jsonify, session
+
+from ..services.chunked_upload_service import (
+    upload_owner,
+    init_upload,
+    put_chunk,
+    upload_status,
+    finalize_upload,
+    abort_upload,
+)
+from ..services.password_service import TokenBucketLimiter
+
+bp = Blueprint("uploads", __name__, url_prefix="/uploads")
+
+_guest_init_limiter = TokenBucketLimiter()
+
+
+def _error(e: Exception):
+    if isinstance(e, LookupError):
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"error": str(e)}), 400
+
+
+@bp.post("/init")
+def init():
+    # Guests (signup forms) get a session key; see chunked_upload_service.upload_owner().
+    cfg = current_app.config
+    if session.get("user_id") is None and not _guest_init_limiter.allow(
+        request.remote_addr or "", cfg["CHUNKED_UPLOAD_GUEST_INITS_PER_MINUTE"], cfg["CHUNKED_UPLOAD_GUEST_INIT_BURST"]
+    ):
+        return jsonify({"error": "Too many uploads started. Please try again shortly."}), 429
+    data = request.get_json(silent=True) or {}
+    try:
+        info = init_upload(upload_owner(create=True), data.get("filename"), data.get("size") or 0, data.get("sha256"))
+    except (LookupError, ValueError) as e:
+        return _error(e)
+    return jsonify(info), 201
+
+
+@bp.put("/<upload_id>/chunks/<int:index>")
+def put(upload_id, index):
+    try:
+        info = put_chunk(upload_id, upload_owner(), index, request.get_data(cache=False))
+    except (LookupError, ValueError) as e:
+        return _error(e)
+    return jsonify(info)
+
+
+@bp.get("/<upload_id>")
+def status(upload_id):
+    try:
+        return jsonify(upload_status(upload_id, upload_owner()))
+    except LookupError as e:
+        return _error(e)
+
+
+@bp.post("/<upload_id>/finalize")
+def finalize(upload_id):
+    try:
+        info = finalize_upload(upload_id, upload_owner())
+    except (LookupError, ValueError) as e:
+        return _error(e)
+    return jsonify(info)
+
+
+@bp.delete("/<upload_id>")
+def delete(upload_id):
+    try:
+        abort_upload(upload_id, upload_owner())
+    except LookupError as e:
+        return _error(e)
+    return jsonify({"success": True})
@@ -2,10 +2,12 @@ import time
 import json
 from flask import Blueprint, render_template, session, request, redirect, url_for, flash
 from ..auth.decorators import login_required, pending_only, verification_required, role_required, cooldown_guard, single_active_request_only
-from ..services.verification_service import get_latest_request_for_user, is_cooldown_active_for_request, create_verification_request, attach_flag
+from ..services.verification_service import get_latest_request_for_user, is_cooldown_active_for_request, create_verification_request
 from ..services.notification_service import list_notifications
 from ..services.document_service import save_uploaded_documents
-from ..services.flag_service import compute_common_flags
+from ..services.chunked_upload_service import completed_upload_files, release_uploads
+from ..services.flag_service import flag_verification_request
+from ..services.duplicate_service import flag_duplicates
 from ..db import get_db
 from ..services.profile_service import (
     get_technician_profile,
@@ -149,13 +151,17 @@ def profile_submit_verification_post():
             flash(str(e), "error")
             return redirect(url_for("user.pending"))
         files = request.files.getlist("cert_docs")
+        uploaded = []
         try:
-            save_uploaded_documents(files, req_id, user_id, "CERTIFICATION")
+            uploaded = completed_upload_files(user_id, request.form.getlist("upload_id"))
+            save_uploaded_documents(files + uploaded, req_id, user_id, "CERTIFICATION")
         except Exception as e:
+            release_uploads(uploaded, delete=False)
             flash(str(e), "error")
             return redirect(url_for("user.profile_get"))
-        for ft, sev, desc in compute_common_flags(tech["full_name"]):
-            attach_flag(req_id, ft, sev, desc)
+        release_uploads(uploaded)
+        flag_verification_request(req_id, "TECHNICIAN", tech["full_name"], json.loads(tech["skills_json"] or "[]"))
+        flag_duplicates(req_id)
 
     elif role == "BUSINESS":
         biz = get_business_profile(user_id)
@@ -168,13 +174,17 @@ def profile_submit_verification_post():
             flash(str(e), "error")
             return redirect(url_for("user.pending"))
         files = request.files.getlist("support_docs")
+        uploaded = []
         try:
-            save_uploaded_documents(files, req_id, user_id, "BUSINESS_SUPPORT")
+            uploaded = completed_upload_files(user_id, request.form.getlist("upload_id"))
+            save_uploaded_documents(files + uploaded, req_id, user_id, "BUSINESS_SUPPORT")
         except Exception as e:
+            release_uploads(uploaded, delete=False)
             flash(str(e), "error")
             return redirect(url_for("user.profile_get"))
-        for ft, sev, desc in compute_common_flags(biz["company_name"]):
-            attach_flag(req_id, ft, sev, desc)
+        release_uploads(uploaded)
+        flag_verification_request(req_id, "BUSINESS", biz["company_name"])
+        flag_duplicates(req_id)
     else:
         flash("Forbidden.", "error")
         return redirect(url_for("user.homepage"))
@@ -230,11 +240,15 @@ def technician_skill_submit_post():
     user_id = session["user_id"]
     skill_name = request.form.get("skill_name", "").strip()
     files = request.files.getlist("cert_docs")
+    uploaded = []
     try:
+        uploaded = completed_upload_files(user_id, request.form.getlist("upload_id"))
         skill_id = create_skill_request(user_id=user_id, skill_name=skill_name)
-        attach_skill_documents(skill_item_id=skill_id, files=files, upload_dir=current_app.config["UPLOAD_FOLDER"])
+        attach_skill_documents(skill_item_id=skill_id, files=files + uploaded, upload_dir=current_app.config["UPLOAD_FOLDER"])
     except Exception as e:
+        release_uploads(uploaded, delete=False)
         flash(str(e), "error")
         return redirect(url_for("user.profile_get"))
+    release_uploads(uploaded)
     flash("Skill submitted for admin approval.", "info")
     return redirect(url_for("user.profile_get"))
@@ -0,0 +1,300 @@
+"""Resumable chunked uploads for large certification files.
+
+Protocol (see routes/upload_routes.py):
+  1. init      -> upload_id, chunk_size, total_chunks
+  2. chunk PUT -> numbered chunks land in UPLOAD_FOLDER/_partial/<upload_id>/
+                  (re-sending a chunk simply overwrites it, so clients can resume)
+  3. finalize  -> chunks are joined, the SHA-256 is checked, upload becomes COMPLETE
+  4. the normal form POST sends `upload_id` values instead of files; the route
+     turns them into FileStorage objects and hands them to the existing
+     save_uploaded_documents / attach_skill_documents code.
+
+Signup forms use the same protocol before an account exists. Uploads are
+owned by an `owner`: a user id when logged in, otherwise a random guest key
+kept in the session (upload_owner()). Guest rows are stored with user_id = 0.
+Since nothing ties them to an account yet, guests are limited three ways:
+init calls per client IP (routes/upload_routes.py), uploads per session
+(CHUNKED_UPLOAD_GUEST_MAX_UPLOADS), and bytes actually received across all
+guests (CHUNKED_UPLOAD_GUEST_QUOTA_BYTES; declared sizes do not count, so
+empty inits cannot exhaust it). A refused init makes the browser fall back to
+a plain multipart post.
+
+Abandoned uploads (never finalized or never used) are removed by
+cleanup_abandoned_uploads(), run by the sweeper (`flask sweep run`) and
+opportunistically on init.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+import shutil
+import time
+import uuid
+
+from flask import current_app, session
+from werkzeug.datastructures import FileStorage
+
+from ..db import get_db
+from .. import metrics
+
+
+def _partial_root() -> str:
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], "_partial")
+
+
+def _upload_dir(upload_id: str) -> str:
+    return os.path.join(_partial_root(), upload_id)
+
+
+def _chunk_path(upload_id: str, index: int) -> str:
+    return os.path.join(_upload_dir(upload_id), f"{int(index):06d}.part")
+
+
+def _assembled_path(upload_id: str) -> str:
+    return os.path.join(_upload_dir(upload_id), "assembled")
+
+
+def _received_chunks(upload_id: str) -> list[int]:
+    folder = _upload_dir(upload_id)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(int(n.split(".", 1)[0]) for n in os.listdir(folder) if n.endswith(".part"))
+
+
+GUEST_USER_ID = 0
+
+
+def upload_owner(create: bool = False) -> int | str | None:
+    """The session's upload owner: its user id, else its guest key (made if create)."""
+    if session.get("user_id") is not None:
+        return int(session["user_id"])
+    if create and not session.get("upload_guest_key"):
+        session["upload_guest_key"] = secrets.token_hex(16)
+    return session.get("upload_guest_key")
+
+
+def _owner_clause(owner: int | str) -> tuple[str, tuple]:
+    if isinstance(owner, str):
+        return "user_id = ? AND guest_key = ?", (GUEST_USER_ID, owner)
+    return "user_id = ?", (int(owner),)
+
+
+def get_upload(upload_id: str, owner: int | str):
+    where, params = _owner_clause(owner)
+    db = get_db()
+    return db.execute(
+        f"SELECT * FROM chunked_uploads WHERE id = ? AND {where}",
+        (str(upload_id), *params),
+    ).fetchone()
+
+
+def _require_upload(upload_id: str, owner: int | str | None, status: str | None = None):
+    row = get_upload(upload_id, owner) if owner is not None else None
+    if row is None:
+        raise LookupError("Upload not found.")
+    if status and row["status"] != status:
+        raise ValueError(f"Upload is {row['status'].lower()}.")
+    return row
+
+
+# =========================
+# Protocol steps
+# =========================
+
+def _check_guest_quota(guest_key: str, total_size: int) -> None:
+    cfg = current_app.config
+    db = get_db()
+    mine = db.execute(
+        "SELECT COUNT(1) FROM chunked_uploads WHERE user_id = ? AND guest_key = ?", (GUEST_USER_ID, guest_key)
+    ).fetchone()[0]
+    if mine >= int(cfg["CHUNKED_UPLOAD_GUEST_MAX_UPLOADS"]):
+        raise ValueError("Too many uploads in progress. Please submit the form or try again later.")
+    held = db.execute(
+        "SELECT COALESCE(SUM(received_bytes), 0) FROM chunked_uploads WHERE user_id = ?", (GUEST_USER_ID,)
+    ).fetchone()[0]
+    if held + total_size > int(cfg["CHUNKED_UPLOAD_GUEST_QUOTA_BYTES"]):
+        raise ValueError("The server is busy with other uploads. Please try again later.")
+
+
+def init_upload(owner: int | str, filename: str, total_size: int, sha256: str) -> dict:
+    filename = (filename or "").strip()
+    ext = os.path.splitext(filename.lower())[1]
+    if not filename or ext not in current_app.config["ALLOWED_EXTENSIONS"]:
+        raise ValueError("Invalid file extension. Only .pdf and .docx are allowed.")
+    total_size = int(total_size)
+    if total_size <= 0:
+        raise ValueError("Empty file.")
+    if total_size > int(current_app.config["MAX_FILE_SIZE_BYTES"]):
+        raise ValueError("File too large.")
+    sha256 = (sha256 or "").strip().lower()
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise ValueError("A SHA-256 hex digest of the file is required.")
+
+    cleanup_abandoned_uploads()
+    if isinstance(owner, str):
+        _check_guest_quota(owner, total_size)
+    user_id, guest_key = (GUEST_USER_ID, owner) if isinstance(owner, str) else (int(owner), None)
+
+    chunk_size = int(current_app.config["CHUNKED_UPLOAD_CHUNK_BYTES"])
+    total_chunks = (total_size + chunk_size - 1) // chunk_size
+    upload_id = uuid.uuid4().hex
+    now = int(time.time())
+
+    os.makedirs(_upload_dir(upload_id), exist_ok=True)
+    db = get_db()
+    db.execute(
+        """
+        INSERT INTO chunked_uploads
+          (id, user_id, guest_key, original_filename, file_extension, total_size, chunk_size, total_chunks,
+           sha256, status, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'OPEN', ?, ?)
+        """,
+        (upload_id, user_id, guest_key, filename, ext.lstrip("."), total_size, chunk_size, total_chunks, sha256, now, now),
+    )
+    db.commit()
+    return {"upload_id": upload_id, "chunk_size": chunk_size, "total_chunks": total_chunks}
+
+
+def put_chunk(upload_id: str, owner: int | str | None, index: int, data: bytes) -> dict:
+    row = _require_upload(upload_id, owner, status="OPEN")
+    index = int(index)
+    if index < 0 or index >= int(row["total_chunks"]):
+        raise ValueError("Chunk index out of range.")
+    if index == int(row["total_chunks"]) - 1:
+        expected = int(row["total_size"]) - index * int(row["chunk_size"])
+    else:
+        expected = int(row["chunk_size"])
+    if len(data) != expected:
+        raise ValueError(f"Chunk {index} must be {expected} bytes.")
+
+    dest = _chunk_path(upload_id, index)
+    resent = os.path.exists(dest)
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, dest)
+    metrics.inc("upload_bytes_total", len(data), kind="chunk")
+
+    db = get_db()
+    db.execute(
+        "UPDATE chunked_uploads SET updated_at = ?, received_bytes = MIN(total_size, received_bytes + ?) WHERE id = ?",
+        (int(time.time()), 0 if resent else len(data), str(upload_id)),
+    )
+    db.commit()
+    return upload_status(upload_id, owner)
+
+
+def upload_status(upload_id: str, owner: int | str | None) -> dict:
+    row = _require_upload(upload_id, owner)
+    return {
+        "upload_id": row["id"],
+        "status": row["status"],
+        "chunk_size": int(row["chunk_size"]),
+        "total_chunks": int(row["total_chunks"]),
+        "received": _received_chunks(row["id"]),
+    }
+
+
+def finalize_upload(upload_id: str, owner: int | str | None) -> dict:
+    row = _require_upload(upload_id, owner, status="OPEN")
+    total = int(row["total_chunks"])
+    missing = sorted(set(range(total)) - set(_received_chunks(upload_id)))
+    if missing:
+        raise ValueError(f"Missing chunks: {missing[:20]}")
+
+    digest = hashlib.sha256()
+    assembled = _assembled_path(upload_id)
+    with open(assembled, "wb") as out:
+        for i in range(total):
+            with open(_chunk_path(upload_id, i), "rb") as part:
+                for block in iter(lambda: part.read(1024 * 1024), b""):
+                    digest.update(block)
+                    out.write(block)
+
+    if digest.hexdigest() != row["sha256"]:
+        os.remove(assembled)
+        raise ValueError("Checksum mismatch. Please re-send the file.")
+
+    for i in range(total):
+        os.remove(_chunk_path(upload_id, i))
+
+    db = get_db()
+    db.execute(
+        "UPDATE chunked_uploads SET status = 'COMPLETE', updated_at = ? WHERE id = ?",
+        (int(time.time()), str(upload_id)),
+    )
+    db.commit()
+    return upload_status(upload_id, owner)
+
+
+def abort_upload(upload_id: str, owner: int | str | None) -> None:
+    _require_upload(upload_id, owner)
+    _delete_upload(upload_id)
+
+
+# =========================
+# Attaching finished uploads
+# =========================
+
+def completed_upload_files(owner: int | str | None, upload_ids) -> list[FileStorage]:
+    """FileStorage objects for finalized uploads owned by owner (see upload_owner()).
+
+    Pass the result to save_uploaded_documents / attach_skill_documents just like
+    request.files. Call release_uploads() after the documents are saved. If any
+    upload_id is invalid, the streams opened so far are closed before raising.
+    """
+    files = []
+    try:
+        for upload_id in upload_ids or []:
+            upload_id = (upload_id or "").strip()
+            if not upload_id:
+                continue
+            row = _require_upload(upload_id, owner, status="COMPLETE")
+            stream = open(_assembled_path(upload_id), "rb")
+            files.append(FileStorage(stream=stream, filename=row["original_filename"], name="upload_id"))
+    except BaseException:
+        release_uploads(files, delete=False)
+        raise
+    return files
+
+
+def release_uploads(files, delete: bool = True) -> None:
+    """Close upload streams; delete the uploads once they are attached to a document row.
+
+    Use delete=False when the form submission failed so the client can retry
+    with the same upload_id.
+    """
+    for f in files or []:
+        f.stream.close()
+        if delete:
+            _delete_upload(os.path.basename(os.path.dirname(f.stream.name)))
+
+
+def _delete_upload(upload_id: str) -> None:
+    shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
+    db = get_db()
+    db.execute("DELETE FROM chunked_uploads WHERE id = ?", (str(upload_id),))
+    db.commit()
+
+
+def cleanup_abandoned_uploads(max_age_seconds: int | None = None) -> int:
+    """Remove uploads with no activity for CHUNKED_UPLOAD_TTL_SECONDS."""
+    if max_age_seconds is None:
+        max_age_seconds = int(current_app.config["CHUNKED_UPLOAD_TTL_SECONDS"])
+    cutoff = int(time.time()) - int(max_age_seconds)
+    db = get_db()
+    stale = db.execute("SELECT id FROM chunked_uploads WHERE updated_at < ?", (cutoff,)).fetchall()
+    for row in stale:
+        _delete_upload(row["id"])
+
+    # Orphaned folders (e.g. row removed while a chunk was being written)
+    root = _partial_root()
+    if os.path.isdir(root):
+        known = {r["id"] for r in db.execute("SELECT id FROM chunked_uploads").fetchall()}
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name not in known and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+    return len(stale)
@@ -2,6 +2,8 @@ import os, time, uuid
 from werkzeug.utils import secure_filename
 from flask import current_app
 from ..db import get_db
+from .. import metrics
+from .duplicate_service import file_sha256, index_document
 
 def _allowed_ext(filename: str) -> bool:
     _, ext = os.path.splitext(filename.lower())
@@ -29,17 +31,22 @@ def save_uploaded_documents(files, verification_request_id: int, uploaded_by_use
         token = uuid.uuid4().hex
         stored = secure_filename(f"{token}{ext}")
         dest = os.path.join(current_app.config["UPLOAD_FOLDER"], stored)
+        sha256 = file_sha256(f.stream)
         f.save(dest)
+        metrics.inc("upload_bytes_total", size, kind="verification")
 
         db = get_db()
         now = int(time.time())
-        db.execute(
+        cur = db.execute(
             """INSERT INTO uploaded_documents
-            (verification_request_id, uploaded_by_user_id, document_type, original_filename, stored_filename, file_extension, file_size, uploaded_at)
-            VALUES (?,?,?,?,?,?,?,?)""",
-            (int(verification_request_id), int(uploaded_by_user_id), document_type, orig, stored, ext.lstrip("."), int(size), now),
+            (verification_request_id, uploaded_by_user_id, document_type, original_filename, stored_filename, file_extension, file_size, uploaded_at, sha256)
+            VALUES (?,?,?,?,?,?,?,?,?)""",
+            (int(verification_request_id), int(uploaded_by_user_id), document_type, orig, stored, ext.lstrip("."), int(size), now, sha256),
         )
+        index_document(db, uploaded_by_user_id, sha256)
         db.commit()
+        from .preview_service import queue_document_preview  # lazy: pulls in zipfile/zlib parsing
+        queue_document_preview("verification", cur.lastrowid)
         saved.append(stored)
     if not saved:
         raise ValueError("No valid documents uploaded.")
@@ -58,7 +65,9 @@ def get_document_by_id(doc_id: int):
     return db.execute("SELECT * FROM uploaded_documents WHERE id = ?", (int(doc_id),)).fetchone()
 
 import os
-from flask import current_app, send_file, abort
+from urllib.parse import quote as url_quote
+from flask import current_app, request, send_file, abort
+from werkzeug.utils import send_file as werkzeug_send_file
 from ..db import get_db
 
 def list_my_verification_docs(user_id: int):
@@ -87,12 +96,93 @@ def download_my_verification_doc(user_id: int, doc_id: int):
     ).fetchone()
     if not row:
         abort(404)
-    # Keep downloads consistent with where we save uploads.
+    return send_stored_document(row, as_attachment=True)
+
+def document_etag(doc, path: str) -> str:
+    """Strong ETag for a stored upload.
+
+    Stored filenames are random tokens that are never reused or rewritten, so
+    the name plus size and mtime identifies the exact bytes on disk.
+    """
+    st = os.stat(path)
+    return f"{doc['stored_filename']}-{st.st_size}-{int(st.st_mtime)}"
+
+def _iter_file_chunks(path: str, chunk_size: int):
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def _offload_headers_response(doc, path: str, mimetype: str | None, as_attachment: bool):
+    # Build the usual download headers (type, disposition, length, ETag) without a body;
+    # the caller decides who streams the bytes. Range handling is left to that party.
+    rv = werkzeug_send_file(
+        path,
+        request.environ,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=doc["original_filename"],
+        conditional=False,
+        etag=document_etag(doc, path),
+        use_x_sendfile=True,
+        response_class=current_app.response_class,
+    )
+    rv.headers.pop("X-Sendfile", None)
+    return rv.make_conditional(request.environ)
+
+def send_stored_document(doc, *, mimetype: str | None = None, as_attachment: bool = False):
+    """Serve an uploaded document after the caller has authorized access.
+
+    DOCUMENT_DELIVERY_MODE picks who moves the bytes:
+      - direct:     Flask send_file with Range, ETag and 304 support
+      - stream:     chunked generator (no Range), for servers without wsgi.file_wrapper
+      - x-sendfile: Apache/lighttpd stream the file from the X-Sendfile path
+      - x-accel:    nginx streams it from DOCUMENT_ACCEL_PREFIX (an `internal` location)
+
+    Uploads are immutable once stored, so the response carries a private
+    cache policy instead of the global no-store applied to logged-in pages.
+    """
     upload_dir = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.instance_path, "uploads")
-    path = os.path.join(upload_dir, row["stored_filename"])
+    path = os.path.join(upload_dir, doc["stored_filename"])
     if not os.path.exists(path):
         abort(404)
-    return send_file(path, as_attachment=True, download_name=row["original_filename"])
+
+    mode = (current_app.config.get("DOCUMENT_DELIVERY_MODE") or "direct").lower()
+    if mode == "x-accel":
+        rv = _offload_headers_response(doc, path, mimetype, as_attachment)
+        if rv.status_code != 304:
+            prefix = current_app.config["DOCUMENT_ACCEL_PREFIX"].rstrip("/")
+            rv.headers["X-Accel-Redirect"] = f"{prefix}/{url_quote(doc['stored_filename'])}"
+    elif mode == "x-sendfile":
+        rv = _offload_headers_response(doc, path, mimetype, as_attachment)
+        if rv.status_code != 304:
+            rv.headers["X-Sendfile"] = os.path.abspath(path)
+    elif mode == "stream":
+        rv = _offload_headers_response(doc, path, mimetype, as_attachment)
+        if rv.status_code != 304:
+            chunk_size = int(current_app.config["DOCUMENT_STREAM_CHUNK_BYTES"])
+            rv.response = _iter_file_chunks(path, chunk_size)
+            rv.direct_passthrough = True
+    else:
+        rv = send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=doc["original_filename"],
+            conditional=True,
+            etag=document_etag(doc, path),
+        )
+
+    max_age = int(current_app.config["DOCUMENT_CACHE_MAX_AGE_SECONDS"])
+    rv.cache_control.public = None
+    rv.cache_control.no_cache = None
+    rv.cache_control.private = True
+    rv.cache_control.immutable = True
+    rv.cache_control.max_age = max_age
+    rv.expires = int(time.time() + max_age)
+    return rv
 
 def list_my_skill_docs(user_id: int):
     db = get_db()
@@ -120,8 +210,4 @@ def download_my_skill_doc(user_id: int, doc_id: int):
     ).fetchone()
     if not row:
         abort(404)
-    upload_dir = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.instance_path, "uploads")
-    path = os.path.join(upload_dir, row["stored_filename"])
-    if not os.path.exists(path):
-        abort(404)
-    return send_file(path, as_attachment=True, download_name=row["original_filename"])
+    return send_stored_document(row, as_attachment=True)
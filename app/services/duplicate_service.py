@@ -0,0 +1,195 @@
+"""Duplicate account / document detection for verification.
+
+identity_keys holds normalized keys per account, looked up by (kind, key)
+through its primary key:
+
+  REGISTRATION_ID  business registration identifier, upper-cased with
+                   separators removed ("2019-1234 5k" -> "201912345K")
+  NAME             name fingerprint: case, accents, punctuation, word order
+                   and company suffixes (Pte, Ltd, ...) ignored
+  DOCUMENT         SHA-256 of an uploaded verification document
+
+Profile create/update and document upload keep the keys current (in the
+caller's transaction). flag_duplicates() runs when a verification request is
+submitted and attaches a flag for each key also held by another account.
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+
+from ..db import get_db
+
+_COMPANY_WORDS = frozenset(
+    "pte pvt ltd limited private llp llc inc incorporated co company corp corporation "
+    "sdn bhd plc gmbh enterprise enterprises the and".split()
+)
+
+# kind -> (flag_type, severity for TECHNICIAN, severity for BUSINESS, what matched)
+_FLAGS = {
+    "REGISTRATION_ID": ("DUPLICATE_REGISTRATION_ID", "HIGH", "HIGH", "Registration identifier"),
+    "NAME": ("DUPLICATE_NAME", "LOW", "MEDIUM", "Name"),
+    "DOCUMENT": ("DUPLICATE_DOCUMENT", "HIGH", "HIGH", "An uploaded document"),
+}
+
+MAX_LISTED_ACCOUNTS = 3
+
+
+def registration_key(value: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKC", value or "").upper() if c.isalnum())
+
+
+def name_fingerprint(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name or "").casefold()
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = set(re.findall(r"[^\W_]+", text))
+    tokens = (tokens - _COMPANY_WORDS) or tokens
+    return " ".join(sorted(tokens))
+
+
+def file_sha256(stream, block_size: int = 1024 * 1024) -> str:
+    """Hash a file-like object from the start and rewind it."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(block_size), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _replace_keys(db, user_id: int, kind: str, keys) -> None:
+    db.execute("DELETE FROM identity_keys WHERE user_id = ? AND kind = ?", (int(user_id), kind))
+    db.executemany(
+        "INSERT OR IGNORE INTO identity_keys (kind, key, user_id) VALUES (?,?,?)",
+        [(kind, k, int(user_id)) for k in keys if k],
+    )
+
+
+def index_account(db, user_id: int) -> None:
+    """Recompute the NAME / REGISTRATION_ID keys of one account (no commit)."""
+    row = db.execute(
+        """
+        SELECT tp.full_name, bp.company_name, bp.registration_identifier
+        FROM users u
+        LEFT JOIN technician_profiles tp ON tp.user_id = u.id
+        LEFT JOIN business_profiles bp ON bp.user_id = u.id
+        WHERE u.id = ?
+        """,
+        (int(user_id),),
+    ).fetchone()
+    if row is None:
+        return
+    _replace_keys(db, user_id, "NAME", [name_fingerprint(n) for n in (row[0], row[1]) if n])
+    _replace_keys(db, user_id, "REGISTRATION_ID", [registration_key(row[2])] if row[2] else [])
+
+
+def index_document(db, user_id: int, sha256: str) -> None:
+    db.execute(
+        "INSERT OR IGNORE INTO identity_keys (kind, key, user_id) VALUES ('DOCUMENT', ?, ?)",
+        (sha256, int(user_id)),
+    )
+
+
+def find_duplicates(db, user_id: int, keys) -> dict:
+    """{kind: (other_account_count, [(other_user_id, email), ...])} for keys also held by other accounts.
+
+    Only the first MAX_LISTED_ACCOUNTS accounts are listed, so a very common
+    key (a popular name, a template document) stays a bounded index scan.
+    """
+    by_kind = {}
+    for kind, key in keys:
+        by_kind.setdefault(kind, []).append(key)
+    out = {}
+    for kind, kind_keys in by_kind.items():
+        marks = ",".join("?" * len(kind_keys))
+        where = f"ik.kind = ? AND ik.key IN ({marks}) AND ik.user_id != ?"
+        params = [kind, *kind_keys, int(user_id)]
+        count = db.execute(f"SELECT COUNT(DISTINCT ik.user_id) FROM identity_keys ik WHERE {where}", params).fetchone()[0]
+        if not count:
+            continue
+        listed = db.execute(
+            f"""
+            SELECT DISTINCT ik.user_id, u.email FROM identity_keys ik
+            JOIN users u ON u.id = ik.user_id
+            WHERE {where}
+            ORDER BY ik.user_id
+            LIMIT ?
+            """,
+            params + [MAX_LISTED_ACCOUNTS],
+        ).fetchall()
+        out[kind] = (count, [(r[0], r[1]) for r in listed])
+    return out
+
+
+def duplicate_flags(db, request_id: int) -> list[tuple[str, str, str]]:
+    """Flags for a verification request whose account shares keys with other accounts."""
+    req = db.execute("SELECT user_id, user_role FROM verification_requests WHERE id = ?", (int(request_id),)).fetchone()
+    if req is None:
+        return []
+    user_id, role = req[0], req[1]
+    keys = [tuple(r) for r in db.execute(
+        "SELECT kind, key FROM identity_keys WHERE user_id = ? AND kind IN ('NAME', 'REGISTRATION_ID')", (user_id,)
+    ).fetchall()]
+    keys += [("DOCUMENT", r[0]) for r in db.execute(
+        "SELECT DISTINCT sha256 FROM uploaded_documents WHERE verification_request_id = ? AND sha256 IS NOT NULL",
+        (int(request_id),),
+    ).fetchall()]
+    flags = []
+    for kind, (count, others) in find_duplicates(db, user_id, keys).items():
+        flag_type, tech_severity, biz_severity, what = _FLAGS[kind]
+        listed = ", ".join(f"{email} (#{uid})" for uid, email in others)
+        more = f" and {count - len(others)} more" if count > len(others) else ""
+        flags.append((
+            flag_type,
+            tech_severity if role == "TECHNICIAN" else biz_severity,
+            f"{what} also used by {count} other account(s): {listed}{more}.",
+        ))
+    return flags
+
+
+def flag_duplicates(request_id: int) -> list:
+    """Attach duplicate flags to a just-submitted verification request."""
+    from .verification_service import attach_flags
+
+    flags = duplicate_flags(get_db(), request_id)
+    attach_flags(request_id, flags)
+    return flags
+
+
+def rebuild_identity_keys(db) -> int:
+    """Recompute NAME / REGISTRATION_ID keys for every account (documents are indexed on upload)."""
+    db.execute("DELETE FROM identity_keys WHERE kind IN ('NAME', 'REGISTRATION_ID')")
+    rows = db.execute(
+        """
+        SELECT user_id, full_name, NULL FROM technician_profiles
+        UNION ALL
+        SELECT user_id, company_name, registration_identifier FROM business_profiles
+        """
+    ).fetchall()
+    keys = []
+    for user_id, name, registration_identifier in rows:
+        if name and name_fingerprint(name):
+            keys.append(("NAME", name_fingerprint(name), user_id))
+        if registration_identifier and registration_key(registration_identifier):
+            keys.append(("REGISTRATION_ID", registration_key(registration_identifier), user_id))
+    db.executemany("INSERT OR IGNORE INTO identity_keys (kind, key, user_id) VALUES (?,?,?)", keys)
+    return len(keys)
+
+
+def hash_missing_documents(db, upload_folder: str, limit: int | None = None) -> int:
+    """Hash and index verification documents uploaded before sha256 was recorded."""
+    sql = "SELECT id, uploaded_by_user_id, stored_filename FROM uploaded_documents WHERE sha256 IS NULL ORDER BY id"
+    rows = db.execute(sql + (f" LIMIT {int(limit)}" if limit else "")).fetchall()
+    done = 0
+    for doc_id, user_id, stored in rows:
+        path = os.path.join(upload_folder, stored)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as fh:
+            sha256 = file_sha256(fh)
+        db.execute("UPDATE uploaded_documents SET sha256 = ? WHERE id = ?", (sha256, doc_id))
+        index_document(db, user_id, sha256)
+        db.commit()
+        done += 1
+    return done
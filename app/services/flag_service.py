@@ -1,22 +1,245 @@
+"""Signup risk flags: a small declarative rule engine.
+
+Each Rule names the flag it raises and reads one subject field ("name" =
+technician full name / business company name, "skills" = the technician's
+skills list), either matching a regex `pattern` anywhere in it or comparing a
+FEATURES extractor against `at_least`.
+
+A RuleSet compiles all regex rules over the same field into one pattern: a
+lookahead alternation that lets search() skip (in C) to the next position
+where any rule matches, followed by one optional capturing lookahead per rule
+to tell which ones match there. Each search continues with a pattern for the
+rules not seen yet, so overlapping matches are all found. Patterns must use
+named groups only, since numbered groups shift when combined.
+
+flag_verification_request() evaluates a new request and inserts its flags in
+one batch. rescore() re-runs the rules over every historical verification
+request after RULES change (`flask flags rescore`).
+"""
+
+from __future__ import annotations
+
+import json
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .. import metrics
+
+
+@dataclass(frozen=True)
+class Rule:
+    flag_type: str
+    severity: str
+    description: str
+    field: str
+    pattern: str | None = None
+    feature: str | None = None
+    at_least: float | None = None
+    roles: tuple = ("TECHNICIAN", "BUSINESS")
+
+
+def _skills_text(skills) -> str:
+    return " ".join(skills or []).lower()
+
+
+FIELDS = {
+    "name": lambda subject: subject.get("name") or "",
+    "skills": lambda subject: _skills_text(subject.get("skills")),
+}
+
+FEATURES = {
+    "name_length": lambda subject: len((subject.get("name") or "").strip()),
+    "skill_count": lambda subject: len(subject.get("skills") or []),
+    "repair_mentions": lambda subject: _skills_text(subject.get("skills")).count("repair"),
+}
+
+RULES = (
+    Rule("SUSPICIOUS_NAME_FORMAT", "MEDIUM", "Repeated characters pattern detected.",
+         "name", pattern=r"(?P<repeated_char>.)(?P=repeated_char){3}"),
+    Rule("SUSPICIOUS_NAME_FORMAT", "HIGH", "Contains disallowed characters.",
+         "name", pattern=r"[^A-Za-z\s\-\']"),
+    Rule("SUSPICIOUS_NAME_FORMAT", "LOW", "Unusually long name/company string.",
+         "name", feature="name_length", at_least=51),
+    Rule("UNUSUALLY_LONG_SKILLS_LIST", "LOW", "Very large skills list.",
+         "skills", feature="skill_count", at_least=12, roles=("TECHNICIAN",)),
+    Rule("REPEATED_PHRASES", "LOW", "Repeated phrases in skills detected.",
+         "skills", feature="repair_mentions", at_least=5, roles=("TECHNICIAN",)),
+)
+
+# Flag types owned by the engine; rescore() replaces only these.
+RULE_FLAG_TYPES = tuple(sorted({r.flag_type for r in RULES}))
+
+
+_NAMED_GROUP = re.compile(r"\(\?P(<|=)(\w+)")
+
+
+def _scoped(pattern: str, prefix: str) -> str:
+    """Rename the pattern's named groups so several copies can share one regex."""
+    return _NAMED_GROUP.sub(lambda m: f"(?P{m.group(1)}{prefix}_{m.group(2)}", pattern)
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self._fields = {}
+        for field in {r.field for r in self.rules if r.pattern}:
+            self._fields[field] = {f"rule{i}": r.pattern for i, r in enumerate(self.rules) if r.pattern and r.field == field}
+        self._compiled = {}
+
+    def _regex(self, field: str, groups: frozenset):
+        key = (field, groups)
+        regex = self._compiled.get(key)
+        if regex is None:
+            patterns = {g: p for g, p in self._fields[field].items() if g in groups}
+            gate = "|".join(_scoped(p, f"{g}_any") for g, p in patterns.items())
+            captures = "".join(f"(?=(?P<{g}>{_scoped(p, g)}))?" for g, p in patterns.items())
+            regex = self._compiled[key] = re.compile(f"(?=(?:{gate})){captures}")
+        return regex
+
+    def _matched_patterns(self, subject) -> set:
+        hits = set()
+        for field, patterns in self._fields.items():
+            text = FIELDS[field](subject)
+            remaining = frozenset(patterns)
+            pos = 0
+            while remaining:
+                m = self._regex(field, remaining).search(text, pos)
+                if m is None:
+                    break
+                found = {g for g in remaining if m.group(g) is not None}
+                hits |= found
+                remaining -= found
+                pos = m.start() + 1
+        return hits
+
+    def evaluate(self, subject) -> list[tuple[str, str, str]]:
+        """[(flag_type, severity, description)] for subject {"role", "name", "skills"}, in rule order."""
+        role = subject.get("role")
+        hits = self._matched_patterns(subject)
+        flags = []
+        for i, rule in enumerate(self.rules):
+            if role and role not in rule.roles:
+                continue
+            if rule.pattern:
+                matched = f"rule{i}" in hits
+            else:
+                matched = FEATURES[rule.feature](subject) >= rule.at_least
+            if matched:
+                flags.append((rule.flag_type, rule.severity, rule.description))
+        return flags
+
+
+DEFAULT_RULES = RuleSet(RULES)
+_NAME_RULES = RuleSet(r for r in RULES if r.field == "name")
+_SKILL_RULES = RuleSet(r for r in RULES if r.field == "skills")
+
 
 def compute_common_flags(name_or_company: str):
-    flags = []
-    # Suspicious formatting: too many repeated chars, or lots of punctuation
-    if re.search(r"(.)\1\1\1", name_or_company):
-        flags.append(("SUSPICIOUS_NAME_FORMAT", "MEDIUM", "Repeated characters pattern detected."))
-    if re.search(r"[^A-Za-z\s\-\']", name_or_company):
-        flags.append(("SUSPICIOUS_NAME_FORMAT", "HIGH", "Contains disallowed characters."))
-    if len(name_or_company.strip()) > 50:
-        flags.append(("SUSPICIOUS_NAME_FORMAT", "LOW", "Unusually long name/company string."))
-    return flags
+    return _NAME_RULES.evaluate({"name": name_or_company})
+
 
 def compute_technician_flags(skills_list):
-    flags = []
-    if len(skills_list) >= 12:
-        flags.append(("UNUSUALLY_LONG_SKILLS_LIST", "LOW", "Very large skills list."))
-    # repeated phrases
-    joined = " ".join(skills_list).lower()
-    if joined.count("repair") >= 5:
-        flags.append(("REPEATED_PHRASES", "LOW", "Repeated phrases in skills detected."))
+    return _SKILL_RULES.evaluate({"skills": list(skills_list)})
+
+
+def flag_verification_request(request_id: int, role: str, name: str, skills=None) -> list:
+    """Evaluate the signup rules for a new request and store its flags in one batch."""
+    from .verification_service import attach_flags
+
+    started = time.perf_counter()
+    flags = DEFAULT_RULES.evaluate({"role": role, "name": name, "skills": skills or []})
+    metrics.observe("signup_rule_eval_seconds", time.perf_counter() - started, role=role)
+    for flag_type, severity, _desc in flags:
+        metrics.inc("signup_flags_total", flag_type=flag_type, severity=severity)
+    attach_flags(request_id, flags)
     return flags
+
+
+# =========================
+# Backfill
+# =========================
+
+_SUBJECTS_SQL = """
+    SELECT vr.id, vr.user_role, COALESCE(tp.full_name, bp.company_name, ''), tp.skills_json
+    FROM verification_requests vr
+    LEFT JOIN technician_profiles tp ON tp.user_id = vr.user_id AND vr.user_role = 'TECHNICIAN'
+    LEFT JOIN business_profiles bp ON bp.user_id = vr.user_id AND vr.user_role = 'BUSINESS'
+    WHERE vr.id > ?
+    ORDER BY vr.id
+    LIMIT ?
+"""
+
+
+def _score_chunk(rows) -> list[tuple]:
+    """(request_id, role, name, skills_json) rows -> flag rows for verification_flags."""
+    out = []
+    for request_id, role, name, skills_json in rows:
+        try:
+            skills = json.loads(skills_json) if skills_json else []
+        except ValueError:
+            skills = []
+        for flag_type, severity, desc in DEFAULT_RULES.evaluate({"role": role, "name": name, "skills": skills}):
+            out.append((request_id, flag_type, severity, desc))
+    return out
+
+
+def rescore(db_path: str, workers: int = 1, chunk_size: int = 500) -> dict:
+    """Re-run RULES over every verification request, replacing engine-owned flags.
+
+    Rules see each account's current profile (the signup-time name is not
+    kept). Chunks are scored in `workers` processes while this process writes
+    the results, one transaction per chunk; other flag types (e.g. manual or
+    duplicate-detection flags) are left alone.
+    """
+    from ..db import connect
+
+    conn = connect(db_path, timeout=30)
+    stats = {"requests": 0, "flags": 0}
+    now = int(time.time())
+    type_marks = ",".join("?" * len(RULE_FLAG_TYPES))
+
+    def write(chunk, flag_rows):
+        ids = [r[0] for r in chunk]
+        with conn:
+            conn.execute(
+                f"DELETE FROM verification_flags WHERE flag_type IN ({type_marks}) "
+                f"AND verification_request_id IN ({','.join('?' * len(ids))})",
+                list(RULE_FLAG_TYPES) + ids,
+            )
+            conn.executemany(
+                "INSERT INTO verification_flags (verification_request_id, flag_type, severity, description, created_at) VALUES (?,?,?,?,?)",
+                [row + (now,) for row in flag_rows],
+            )
+        stats["requests"] += len(chunk)
+        stats["flags"] += len(flag_rows)
+
+    def chunks():
+        # Keyset pages, each read completely, so no read cursor stays open across the writes.
+        last_id = 0
+        while True:
+            rows = [tuple(r) for r in conn.execute(_SUBJECTS_SQL, (last_id, chunk_size)).fetchall()]
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield rows
+
+    try:
+        if workers <= 1:
+            for chunk in chunks():
+                write(chunk, _score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a bounded number of chunks in flight; write them back in order.
+                pending = []
+                for chunk in chunks():
+                    pending.append((chunk, pool.submit(_score_chunk, chunk)))
+                    if len(pending) >= workers * 2:
+                        done_chunk, future = pending.pop(0)
+                        write(done_chunk, future.result())
+                for done_chunk, future in pending:
+                    write(done_chunk, future.result())
+    finally:
+        conn.close()
+    return stats
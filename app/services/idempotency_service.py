@@ -0,0 +1,116 @@
+"""Idempotency keys for JSON POST endpoints.
+
+A client that may retry a POST (double click, timeout, flaky network) sends
+the same `Idempotency-Key` header on every attempt. The first attempt claims
+the key (per user) and its response is stored; later attempts get the stored
+response back, marked with `Idempotent-Replayed: true`, without running the
+view again. A retry arriving while the first attempt still runs gets 409 with
+Retry-After. 5xx responses and exceptions release the key so the client can
+try again. A claim still without a response after
+IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS is treated as abandoned (the worker died
+mid-request) and the next retry takes it over.
+
+Requests without the header behave as before. Stored keys are purged after
+IDEMPOTENCY_KEY_TTL_SECONDS by the sweeper (services/sweeper_service.py).
+"""
+
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request, session
+
+from ..db import get_db
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+
+
+def _release(db, user_id: int, key: str) -> None:
+    with db:
+        db.execute("DELETE FROM idempotency_keys WHERE user_id = ? AND key = ?", (user_id, key))
+
+
+def _take_over(db, user_id: int, key: str, scope: str) -> bool:
+    """Re-claim an in-flight key whose claim is older than the timeout. created_at is the claim time."""
+    now = int(time.time())
+    cutoff = now - int(current_app.config["IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS"])
+    with db:
+        return db.execute(
+            "UPDATE idempotency_keys SET created_at = ? "
+            "WHERE user_id = ? AND key = ? AND scope = ? AND status_code IS NULL AND created_at < ?",
+            (now, user_id, key, scope, cutoff),
+        ).rowcount == 1
+
+
+def idempotent(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER, "").strip()
+        user_id = session.get("user_id")
+        if not key or user_id is None:
+            return fn(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} is longer than {MAX_KEY_LENGTH} characters"}), 400
+
+        db = get_db()
+        scope = f"{request.method} {request.path}"
+        with db:
+            claimed = db.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (user_id, key, scope, created_at) VALUES (?,?,?,?)",
+                (int(user_id), key, scope, int(time.time())),
+            ).rowcount == 1
+        if not claimed:
+            row = db.execute(
+                "SELECT scope, status_code, response_body FROM idempotency_keys WHERE user_id = ? AND key = ?",
+                (int(user_id), key),
+            ).fetchone()
+            if row is None:  # released between the two statements
+                return jsonify({"error": "Please retry the request."}), 409
+            if row["scope"] != scope:
+                return jsonify({"error": f"{HEADER} was already used for a different request"}), 422
+            if row["status_code"] is None:
+                if not _take_over(db, int(user_id), key, scope):
+                    resp = jsonify({"error": "This request is still being processed."})
+                    resp.status_code = 409
+                    resp.headers["Retry-After"] = "1"
+                    return resp
+            else:
+                resp = make_response(row["response_body"], row["status_code"])
+                resp.mimetype = "application/json"
+                resp.headers["Idempotent-Replayed"] = "true"
+                return resp
+
+        try:
+            resp = make_response(fn(*args, **kwargs))
+        except Exception:
+            _release(db, int(user_id), key)
+            raise
+        if resp.status_code >= 500:
+            _release(db, int(user_id), key)
+            return resp
+        with db:
+            db.execute(
+                "UPDATE idempotency_keys SET status_code = ?, response_body = ? WHERE user_id = ? AND key = ?",
+                (resp.status_code, resp.get_data(as_text=True), int(user_id), key),
+            )
+        return resp
+    return wrapper
+
+
+def purge_expired_keys(db, ttl_seconds: int, batch_size: int) -> int:
+    """Delete keys older than ttl_seconds, batch_size rows per transaction. Returns rows deleted."""
+    cutoff = int(time.time()) - int(ttl_seconds)
+    done = 0
+    while True:
+        with db:
+            n = db.execute(
+                """
+                DELETE FROM idempotency_keys WHERE (user_id, key) IN (
+                    SELECT user_id, key FROM idempotency_keys WHERE created_at < ? LIMIT ?
+                )
+                """,
+                (cutoff, int(batch_size)),
+            ).rowcount
+        done += n
+        if n < batch_size:
+            return done
@@ -0,0 +1,191 @@
+"""Job state machine with optimistic concurrency.
+
+Every job row carries a `version` that each state change increments. A
+transition reads the job, checks the caller may make it, then writes with a
+compare-and-swap:
+
+    UPDATE jobs SET status = ?, version = version + 1, ... WHERE id = ? AND version = ?
+
+If another writer got there first the UPDATE matches nothing; the whole
+transaction is rolled back and run again from the read, which then sees the
+new state and either succeeds or fails with the usual message ("Job is not
+waiting for approval"). SQLITE_BUSY (the write lock not obtained within the
+connection's busy timeout) is retried the same way. Retries back off
+exponentially with jitter, up to JOB_TRANSITION_ATTEMPTS attempts in all.
+
+LEGAL_TRANSITIONS lists every status change; writers outside this module
+(services/sweeper_service.py) guard on status and bump `version` too.
+`flask bench job-race` hammers these functions from many threads and checks
+the invariants.
+"""
+
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from .. import metrics
+from ..db import connect
+from .jobs_enum import JobStatus
+from .technician_state_service import refresh_technician_state
+
+LEGAL_TRANSITIONS = {
+    JobStatus.OUTGOING.value: {JobStatus.ACTIVE.value, JobStatus.CANCELLED.value},
+    JobStatus.ACTIVE.value: {JobStatus.PENDING_CONFIRMATION.value},
+    JobStatus.PENDING_CONFIRMATION.value: {JobStatus.COMPLETED.value},
+}
+
+
+class JobConflict(ValueError):
+    """The job kept changing (or the database stayed busy) for every attempt."""
+
+
+class _VersionMismatch(Exception):
+    pass
+
+
+def _conn():
+    conn = connect(current_app.config["DATABASE"])
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc)
+    return "locked" in message or "busy" in message
+
+
+def run_transition(name: str, op):
+    """Run op(conn) in its own transaction, retrying on version mismatch and SQLITE_BUSY."""
+    attempts = max(1, int(current_app.config["JOB_TRANSITION_ATTEMPTS"]))
+    backoff = current_app.config["JOB_TRANSITION_BACKOFF_MS"] / 1000.0
+    for attempt in range(attempts):
+        conn = _conn()
+        try:
+            result = op(conn)
+            conn.commit()
+            return result
+        except _VersionMismatch:
+            conn.rollback()
+            metrics.inc("job_transition_conflicts_total", transition=name)
+        except sqlite3.OperationalError as exc:
+            conn.rollback()
+            if not _is_busy(exc):
+                raise
+            metrics.inc("db_busy_retries_total")
+        finally:
+            conn.close()
+        if attempt + 1 < attempts:
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+    raise JobConflict("This job is being changed by someone else. Please try again.")
+
+
+def _load(conn, job_id: int):
+    return conn.execute(
+        "SELECT id, business_id, status, assigned_technician_id, version FROM jobs WHERE id = ?",
+        (int(job_id),),
+    ).fetchone()
+
+
+def _cas(conn, job, to_status: str, **columns) -> None:
+    """Move `job` (a row read in this transaction) to to_status if nobody changed it since."""
+    if to_status not in LEGAL_TRANSITIONS.get(job["status"], ()):
+        raise ValueError(f"Illegal job transition {job['status']} -> {to_status}.")
+    columns["updated_at"] = datetime.utcnow().isoformat()
+    assignments = "".join(f", {column} = ?" for column in columns)
+    cur = conn.execute(
+        f"UPDATE jobs SET status = ?, version = version + 1{assignments} WHERE id = ? AND version = ?",
+        [to_status, *columns.values(), job["id"], job["version"]],
+    )
+    if cur.rowcount != 1:
+        raise _VersionMismatch()
+
+
+def approve_application(job_id: int, application_id: int, business_id: int) -> None:
+    """Approve a technician's application, set job to ACTIVE and assign technician."""
+    def op(conn):
+        job = _load(conn, job_id)
+        if job is None or job["business_id"] != int(business_id):
+            raise PermissionError("Job not found or not owned by you")
+        app = conn.execute(
+            "SELECT id, technician_id, status FROM job_applications WHERE id = ? AND job_id = ?",
+            (int(application_id), int(job_id)),
+        ).fetchone()
+        if not app:
+            raise ValueError("Application not found")
+        if app["status"] != "APPLIED":
+            raise ValueError("Application is no longer pending")
+        if job["status"] != JobStatus.OUTGOING.value:
+            raise ValueError("Job is no longer open")
+
+        _cas(conn, job, JobStatus.ACTIVE.value, assigned_technician_id=app["technician_id"])
+        cur = conn.execute(
+            "UPDATE job_applications SET status = 'APPROVED' WHERE id = ? AND status = 'APPLIED'", (app["id"],)
+        )
+        if cur.rowcount != 1:  # withdrawn meanwhile
+            raise _VersionMismatch()
+        # Deny all other applications for this job
+        conn.execute(
+            "UPDATE job_applications SET status = 'DENIED' WHERE job_id = ? AND id != ? AND status = 'APPLIED'",
+            (int(job_id), app["id"]),
+        )
+        refresh_technician_state(conn, app["technician_id"])
+
+    run_transition("approve-application", op)
+
+
+def request_completion(job_id: int, technician_id: int) -> None:
+    """Technician marks their ACTIVE job complete (-> PENDING_CONFIRMATION).
+
+    Raises LookupError if the job does not exist, PermissionError if it is not
+    assigned to technician_id.
+    """
+    def op(conn):
+        job = _load(conn, job_id)
+        if job is None:
+            raise LookupError("Job not found")
+        if job["status"] != JobStatus.ACTIVE.value:
+            raise ValueError("Job is not active")
+        if job["assigned_technician_id"] != int(technician_id):
+            raise PermissionError("You are not assigned to this job")
+        _cas(conn, job, JobStatus.PENDING_CONFIRMATION.value)
+        refresh_technician_state(conn, technician_id)
+
+    run_transition("request-completion", op)
+
+
+def approve_job_completion(job_id: int, business_id: int) -> None:
+    """Change job status from PENDING_CONFIRMATION to COMPLETED."""
+    def op(conn):
+        job = _load(conn, job_id)
+        if job is None or job["business_id"] != int(business_id):
+            raise PermissionError("Job not found")
+        if job["status"] != JobStatus.PENDING_CONFIRMATION.value:
+            raise ValueError("Job is not waiting for approval")
+        _cas(conn, job, JobStatus.COMPLETED.value)
+        if job["assigned_technician_id"] is not None:
+            refresh_technician_state(conn, job["assigned_technician_id"])
+
+    run_transition("approve-completion", op)
+
+
+def delete_job(job_id: int, business_id: int) -> None:
+    """Delete a job and its tasks. Only allowed if status is OUTGOING."""
+    def op(conn):
+        job = _load(conn, job_id)
+        if job is None or job["business_id"] != int(business_id):
+            raise PermissionError("Job not found or not owned by you.")
+        if job["status"] != JobStatus.OUTGOING.value:
+            raise ValueError("Only open jobs can be deleted.")
+        cur = conn.execute(
+            "DELETE FROM jobs WHERE id = ? AND version = ? AND status = ?",
+            (job["id"], job["version"], JobStatus.OUTGOING.value),
+        )
+        if cur.rowcount != 1:
+            raise _VersionMismatch()
+        conn.execute("DELETE FROM job_tasks WHERE job_id = ?", (job["id"],))
+        conn.execute("DELETE FROM job_applications WHERE job_id = ?", (job["id"],))
+
+    run_transition("delete", op)
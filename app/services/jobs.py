@@ -4,14 +4,24 @@ from typing import Optional, List
 from flask import current_app
 
 from .jobs_enum import JobStatus, ApplicationStatus
+from ..db import connect
+from ..template_cache import version_stamp
 
 
 class DomainError(Exception):
     pass
 
 
+class JobNotFound(DomainError):
+    pass
+
+
+class AlreadyApplied(DomainError):
+    pass
+
+
 def _conn():
-    conn = sqlite3.connect(current_app.config["DATABASE"])
+    conn = connect(current_app.config["DATABASE"])
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -99,52 +109,46 @@ def list_open_jobs() -> List[dict]:
 # APPLY TO JOB
 # =====================================================
 
-def apply_to_job(*, job_id: int, technician_id: int):
-    conn = _conn()
-    cur = conn.cursor()
-
-    cur.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
-    job = cur.fetchone()
-    if not job:
-        raise DomainError("Job not found.")
+def apply_to_job(*, job_id: int, technician_id: int) -> int:
+    """Apply to an OUTGOING job, or re-apply after withdrawing. Returns the application id.
 
-    if job["status"] != JobStatus.OUTGOING.value:
-        raise DomainError("Job is not accepting applications.")
-
-    cur.execute(
-        """
-        SELECT * FROM job_applications
-        WHERE job_id = ? AND technician_id = ?
-        """,
-        (job_id, technician_id),
-    )
-    existing = cur.fetchone()
-
-    now = datetime.utcnow().isoformat()
-
-    if existing and existing["status"] != ApplicationStatus.WITHDRAWN.value:
-        raise DomainError("Already applied.")
-
-    if existing:
-        cur.execute(
-            """
-            UPDATE job_applications
-            SET status = ?, applied_at = ?
-            WHERE id = ?
-            """,
-            (ApplicationStatus.APPLIED.value, now, existing["id"]),
-        )
-    else:
-        cur.execute(
+    One statement: the SELECT only yields a row while the job is open, and
+    UNIQUE(job_id, technician_id) turns a second application into an update
+    that only revives a WITHDRAWN one. A duplicate click therefore changes
+    nothing and raises AlreadyApplied.
+    """
+    conn = _conn()
+    try:
+        row = conn.execute(
             """
             INSERT INTO job_applications (job_id, technician_id, status, applied_at)
-            VALUES (?, ?, ?, ?)
+            SELECT id, ?, ?, ? FROM jobs WHERE id = ? AND status = ?
+            ON CONFLICT(job_id, technician_id) DO UPDATE
+                SET status = excluded.status, applied_at = excluded.applied_at
+                WHERE job_applications.status = ?
+            RETURNING id
             """,
-            (job_id, technician_id, ApplicationStatus.APPLIED.value, now),
-        )
-
-    conn.commit()
-    conn.close()
+            (
+                technician_id,
+                ApplicationStatus.APPLIED.value,
+                datetime.utcnow().isoformat(),
+                job_id,
+                JobStatus.OUTGOING.value,
+                ApplicationStatus.WITHDRAWN.value,
+            ),
+        ).fetchone()
+        conn.commit()
+        if row is not None:
+            return row["id"]
+        # Nothing written: find out why.
+        job = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not job:
+            raise JobNotFound("Job not found.")
+        if job["status"] != JobStatus.OUTGOING.value:
+            raise DomainError("Job is not accepting applications.")
+        raise AlreadyApplied("Already applied.")
+    finally:
+        conn.close()
 
 
 # =====================================================
@@ -213,6 +217,49 @@ def get_job_stats_for_business(business_id: int) -> dict:
     return dict(row) if row else {}
 
 
+# =====================================================
+# DASHBOARD VERSION STAMPS (fragment cache keys)
+# =====================================================
+# Every job status change also writes jobs.updated_at, so COUNT/MAX(id)/
+# MAX(updated_at) changes whenever a job is created, deleted or moves state.
+# The business stamp reads only idx_jobs_business_updated (id is its rowid).
+
+def jobs_dashboard_version_for_business(business_id: int) -> str:
+    conn = _conn()
+    row = conn.execute(
+        "SELECT COUNT(*), MAX(id), MAX(updated_at) FROM jobs WHERE business_id = ?",
+        (business_id,),
+    ).fetchone()
+    conn.close()
+    return version_stamp(row)
+
+
+def jobs_dashboard_version_for_technician(technician_id: int) -> str:
+    """Stamp for the technician dashboard job sections.
+
+    Covers all jobs (recommendations read every OUTGOING job), the technician's
+    applications (apply/withdraw do not touch jobs) and the tasks of jobs they
+    were approved for.
+    """
+    conn = _conn()
+    row = conn.execute(
+        """
+        SELECT
+          (SELECT COUNT(*) || ':' || IFNULL(MAX(id), 0) || ':' || IFNULL(MAX(updated_at), '') FROM jobs),
+          (SELECT group_concat(x, ',') FROM (
+              SELECT id || status AS x FROM job_applications WHERE technician_id = ? ORDER BY id
+          )),
+          (SELECT COUNT(*) || ':' || IFNULL(MAX(t.id), 0) || ':' || IFNULL(SUM(t.is_completed), 0)
+             FROM job_tasks t
+             JOIN job_applications ja ON ja.job_id = t.job_id
+            WHERE ja.technician_id = ? AND ja.status = 'APPROVED')
+        """,
+        (technician_id, technician_id),
+    ).fetchone()
+    conn.close()
+    return version_stamp(row)
+
+
 def get_jobs_by_business(business_id: int, status: Optional[str] = None) -> list[dict]:
     """Return jobs created by this business, optionally filtered by status."""
     conn = _conn()
@@ -280,32 +327,6 @@ def add_job_task(job_id: int, business_id: int, title: str) -> int:
     return task_id
 
 
-def approve_job_completion(job_id: int, business_id: int) -> None:
-    """Change job status from PENDING_CONFIRMATION to COMPLETED."""
-    conn = _conn()
-    cur = conn.cursor()
-    # Verify ownership and current status
-    cur.execute("""
-        SELECT id, status FROM jobs
-        WHERE id = ? AND business_id = ?
-    """, (job_id, business_id))
-    job = cur.fetchone()
-    if not job:
-        conn.close()
-        raise PermissionError("Job not found")
-    if job["status"] != "PENDING_CONFIRMATION":
-        conn.close()
-        raise ValueError("Job is not waiting for approval")
-    now = datetime.utcnow().isoformat()
-    cur.execute("""
-        UPDATE jobs
-        SET status = 'COMPLETED', updated_at = ?
-        WHERE id = ?
-    """, (now, job_id))
-    conn.commit()
-    conn.close()
-
-
 def get_applications_for_job(job_id: int, business_id: int) -> list[dict]:
     """Return all pending applications for a job, verifying the job belongs to the business."""
     conn = _conn()
@@ -329,74 +350,6 @@ def get_applications_for_job(job_id: int, business_id: int) -> list[dict]:
     return rows
 
 
-def approve_application(job_id: int, application_id: int, business_id: int) -> None:
-    """Approve a technician's application, set job to ACTIVE and assign technician."""
-    conn = _conn()
-    cur = conn.cursor()
-    try:
-        # Verify job ownership
-        cur.execute("SELECT id FROM jobs WHERE id = ? AND business_id = ?", (job_id, business_id))
-        if not cur.fetchone():
-            raise PermissionError("Job not found or not owned by you")
-
-        # Get the application and verify it's for this job and still APPLIED
-        cur.execute("""
-            SELECT id, technician_id, status
-            FROM job_applications
-            WHERE id = ? AND job_id = ?
-        """, (application_id, job_id))
-        app = cur.fetchone()
-        if not app:
-            raise ValueError("Application not found")
-        if app["status"] != "APPLIED":
-            raise ValueError("Application is no longer pending")
-
-        # Update application to APPROVED
-        cur.execute("""
-            UPDATE job_applications
-            SET status = 'APPROVED'
-            WHERE id = ?
-        """, (application_id,))
-
-        # Update job status to ACTIVE and assign technician
-        now = datetime.utcnow().isoformat()
-        cur.execute("""
-            UPDATE jobs
-            SET status = 'ACTIVE', assigned_technician_id = ?, updated_at = ?
-            WHERE id = ?
-        """, (app["technician_id"], now, job_id))
-
-        # Deny all other applications for this job
-        cur.execute("""
-            UPDATE job_applications
-            SET status = 'DENIED'
-            WHERE job_id = ? AND id != ? AND status = 'APPLIED'
-        """, (job_id, application_id))
-
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def delete_job(job_id: int, business_id: int) -> None:
-    """Delete a job and its tasks. Only allowed if status is OUTGOING."""
-    conn = _conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id, status FROM jobs WHERE id = ? AND business_id = ?", (job_id, business_id))
-        job = cur.fetchone()
-        if not job:
-            raise PermissionError("Job not found or not owned by you.")
-        if job["status"] != JobStatus.OUTGOING.value:
-            raise ValueError("Only open jobs can be deleted.")
-        cur.execute("DELETE FROM job_tasks WHERE job_id = ?", (job_id,))
-        cur.execute("DELETE FROM job_applications WHERE job_id = ?", (job_id,))
-        cur.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
-        conn.commit()
-    finally:
-        conn.close()
-
-
 def delete_task(task_id: int, job_id: int, business_id: int) -> None:
     """Delete a single task. Business must own the parent job."""
     conn = _conn()
@@ -1,5 +1,6 @@
 import time
 from ..db import get_db
+from .. import metrics
 
 def create_notification(user_id: int, type_: str, message: str):
     db = get_db()
@@ -9,6 +10,46 @@ def create_notification(user_id: int, type_: str, message: str):
         (int(user_id), type_, message, 0, now),
     )
     db.commit()
+    metrics.inc("notifications_created_total", type=type_)
+    metrics.observe("notification_fanout_recipients", 1)
+
+def create_notifications(user_ids, type_: str, message: str, commit: bool = True) -> int:
+    """Send the same notification to many users with one executemany."""
+    user_ids = sorted({int(u) for u in user_ids})
+    if not user_ids:
+        return 0
+    db = get_db()
+    now = int(time.time())
+    db.executemany(
+        "INSERT INTO notifications (user_id, type, message, is_read, created_at) VALUES (?,?,?,?,?)",
+        [(uid, type_, message, 0, now) for uid in user_ids],
+    )
+    if commit:
+        db.commit()
+    metrics.inc("notifications_created_total", len(user_ids), type=type_)
+    metrics.observe("notification_fanout_recipients", len(user_ids))
+    return len(user_ids)
+
+def create_notification_rows(rows, commit: bool = True) -> int:
+    """Insert (user_id, type, message) rows with one executemany (per-user messages)."""
+    rows = [(int(uid), type_, message) for uid, type_, message in rows]
+    if not rows:
+        return 0
+    db = get_db()
+    now = int(time.time())
+    db.executemany(
+        "INSERT INTO notifications (user_id, type, message, is_read, created_at) VALUES (?,?,?,?,?)",
+        [(uid, type_, message, 0, now) for uid, type_, message in rows],
+    )
+    if commit:
+        db.commit()
+    by_type: dict[str, int] = {}
+    for _uid, type_, _message in rows:
+        by_type[type_] = by_type.get(type_, 0) + 1
+    for type_, n in by_type.items():
+        metrics.inc("notifications_created_total", n, type=type_)
+    metrics.observe("notification_fanout_recipients", len(rows))
+    return len(rows)
 
 def list_notifications(user_id: int, unread_only: bool = False):
     db = get_db()
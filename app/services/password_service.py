@@ -0,0 +1,146 @@
+"""Password hashing off the request thread, plus login throttling.
+
+Werkzeug's scrypt/pbkdf2 hashing is CPU-heavy on purpose. hashlib releases the
+GIL while it works, so a small dedicated thread pool gives real parallelism and
+caps how many hashes run at once; the rest of the worker keeps serving other
+routes. When the pool's queue is full, or a hash does not finish within
+PASSWORD_HASH_TIMEOUT_SECONDS, we fail fast with PasswordHashingBusy instead of
+piling up requests; routes turn it into a "server is busy" flash (auth_routes).
+A slot is held until its hash has actually finished, so jobs abandoned after a
+timeout still count against PASSWORD_HASH_MAX_PENDING.
+
+The token-bucket limiters are per process, one keyed by client IP and one by
+email, so brute-force traffic is turned away before it ever reaches the hashing
+pool. Client IPs are only meaningful behind a proxy when TRUSTED_PROXY_COUNT is
+set (see app/__init__.py).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from .. import metrics
+
+
+class PasswordHashingBusy(RuntimeError):
+    pass
+
+
+_pool: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            cfg = current_app.config
+            workers = int(cfg["PASSWORD_HASH_WORKERS"])
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pw-hash")
+            _slots = threading.BoundedSemaphore(workers + int(cfg["PASSWORD_HASH_MAX_PENDING"]))
+        return _pool, _slots
+
+
+def _run(fn, *args):
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Server is busy. Please try again shortly.")
+    metrics.gauge_add("background_queue_depth", 1, queue="password_hash")
+
+    def _done(_future):
+        metrics.gauge_add("background_queue_depth", -1, queue="password_hash")
+        slots.release()
+
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        _done(None)
+        raise
+    # Released when the hash finishes, not when we stop waiting for it.
+    future.add_done_callback(_done)
+    try:
+        return future.result(timeout=float(current_app.config["PASSWORD_HASH_TIMEOUT_SECONDS"]))
+    except FutureTimeout:
+        raise PasswordHashingBusy("Server is busy. Please try again shortly.") from None
+
+
+def hash_password(password: str) -> str:
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    return _run(generate_password_hash, password, method)
+
+
+def check_password(password_hash: str, password: str) -> bool:
+    return bool(_run(check_password_hash, password_hash, password))
+
+
+@lru_cache(maxsize=8)
+def _hash_prefix(method: str) -> str:
+    # "scrypt" -> "scrypt:32768:8:1", "pbkdf2" -> "pbkdf2:sha256:600000", etc.
+    return generate_password_hash("x", method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if the stored hash was made with other parameters than PASSWORD_HASH_METHOD."""
+    current = _hash_prefix(current_app.config["PASSWORD_HASH_METHOD"])
+    return (password_hash or "").split("$", 1)[0] != current
+
+
+# =========================
+# Login throttling
+# =========================
+
+class TokenBucketLimiter:
+    """Per-key token bucket: `rate_per_minute` refill, up to `burst` tokens.
+
+    Use one limiter per kind of key so every bucket shares a rate and burst.
+    Buckets are kept in least-recently-used order: refilled ones are dropped
+    from the old end as calls come in, and beyond `max_keys` the oldest are
+    evicted regardless.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def allow(self, key: str, rate_per_minute: float, burst: int) -> bool:
+        now = time.monotonic()
+        rate = float(rate_per_minute) / 60.0
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - last) * rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+            self._expire(now, float(burst) / rate if rate > 0 else float("inf"))
+            return allowed
+
+    def _expire(self, now: float, full_after: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets))
+            if len(buckets) <= self._max_keys and now - buckets[oldest][1] < full_after:
+                break
+            del buckets[oldest]
+
+
+_ip_limiter = TokenBucketLimiter()
+_email_limiter = TokenBucketLimiter()
+
+
+def login_attempt_allowed(ip: str | None, email: str | None) -> bool:
+    cfg = current_app.config
+    if ip and not _ip_limiter.allow(ip, cfg["LOGIN_IP_RATE_PER_MINUTE"], cfg["LOGIN_IP_BURST"]):
+        return False
+    if email and not _email_limiter.allow(email, cfg["LOGIN_EMAIL_RATE_PER_MINUTE"], cfg["LOGIN_EMAIL_BURST"]):
+        return False
+    return True
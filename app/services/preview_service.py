@@ -0,0 +1,230 @@
+"""Document preview metadata for the admin review pages.
+
+For every uploaded PDF/DOCX we record:
+ - page_count
+ - text_length (approximate number of extractable characters)
+ - thumbnail_filename (first-page image stored next to the upload, if one can be made)
+
+Extraction runs on a small background thread pool right after the upload is
+committed, so signup and skill submission never wait on it. Workers use their
+own sqlite connection and never touch Flask request state.
+
+PDF and DOCX parsing is pure Python (zlib/zipfile). First-page rendering of a PDF
+needs PyMuPDF (requirements-optional.txt, a self-contained wheel); without it PDFs
+still get page count and text length, just no thumbnail. DOCX files use the
+preview picture Word embeds in docProps/ when present.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+
+from ..db import get_db
+from .. import metrics
+
+
+# kind -> table holding the document rows
+PREVIEW_TABLES = {
+    "verification": "uploaded_documents",
+    "skill": "technician_skill_documents",
+}
+
+_MAX_STREAM_BYTES = 4 * 1024 * 1024
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_COUNT_RE = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b", re.S)
+_PDF_STRING_RE = re.compile(rb"\((?:\\.|[^\\)])*\)\s*(?:Tj|')|\[(?:[^\]]*)\]\s*TJ", re.S)
+_PDF_LITERAL_RE = re.compile(rb"\((?:\\.|[^\\)])*\)", re.S)
+_DOCX_TEXT_RE = re.compile(r"<w:t(?:\s[^>]*)?>([^<]*)</w:t>")
+_DOCX_PAGES_RE = re.compile(r"<Pages>(\d+)</Pages>")
+
+
+# =========================
+# Extraction (pure functions)
+# =========================
+
+def _pdf_streams(raw: bytes):
+    """Yield decoded content of every Flate stream (plus the raw file itself)."""
+    yield raw
+    for m in _STREAM_RE.finditer(raw):
+        body = m.group(1)
+        try:
+            d = zlib.decompressobj()
+            out = d.decompress(body, _MAX_STREAM_BYTES)
+        except zlib.error:
+            continue
+        if out:
+            yield out
+
+
+def extract_pdf_metadata(path: str) -> dict:
+    with open(path, "rb") as fh:
+        raw = fh.read()
+
+    page_objects = 0
+    declared = 0
+    text_length = 0
+    for chunk in _pdf_streams(raw):
+        page_objects += len(_PAGE_RE.findall(chunk))
+        for a, b in _COUNT_RE.findall(chunk):
+            declared = max(declared, int(a or b))
+        for op in _PDF_STRING_RE.findall(chunk):
+            for lit in _PDF_LITERAL_RE.findall(op):
+                text_length += max(len(lit) - 2, 0)
+
+    return {
+        "page_count": declared or page_objects or None,
+        "text_length": text_length,
+    }
+
+
+def extract_docx_metadata(path: str) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        xml = zf.read("word/document.xml").decode("utf-8", "replace") if "word/document.xml" in names else ""
+        app_xml = zf.read("docProps/app.xml").decode("utf-8", "replace") if "docProps/app.xml" in names else ""
+    m = _DOCX_PAGES_RE.search(app_xml)
+    return {
+        "page_count": int(m.group(1)) if m else None,
+        "text_length": sum(len(t) for t in _DOCX_TEXT_RE.findall(xml)),
+    }
+
+
+def render_pdf_thumbnail(path: str, dest_base: str, width: int) -> str | None:
+    """Render page 1 to PNG with PyMuPDF. Returns the written path, or None."""
+    try:
+        import fitz  # PyMuPDF (optional)
+    except ImportError:
+        return None
+    with fitz.open(path) as pdf:
+        if pdf.page_count < 1:
+            return None
+        page = pdf[0]
+        zoom = float(width) / max(page.rect.width, 1.0)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        dest = f"{dest_base}.png"
+        pix.save(dest)
+        return dest
+
+
+def copy_docx_thumbnail(path: str, dest_base: str) -> str | None:
+    """Copy the preview picture Word embeds (docProps/thumbnail.*), if any."""
+    with zipfile.ZipFile(path) as zf:
+        for name in zf.namelist():
+            lower = name.lower()
+            if lower.startswith("docprops/thumbnail.") and lower.rsplit(".", 1)[-1] in ("png", "jpeg", "jpg"):
+                dest = f"{dest_base}.{lower.rsplit('.', 1)[-1]}"
+                with open(dest, "wb") as out:
+                    out.write(zf.read(name))
+                return dest
+    return None
+
+
+# =========================
+# Worker
+# =========================
+
+def build_preview(db_path: str, upload_dir: str, table: str, doc_id: int, thumb_width: int = 240) -> None:
+    """Extract metadata for one document row and store it on that row."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(
+            f"SELECT stored_filename, file_extension FROM {table} WHERE id = ?", (int(doc_id),)
+        ).fetchone()
+        if row is None:
+            return
+        path = os.path.join(upload_dir, row["stored_filename"])
+        ext = (row["file_extension"] or "").lower()
+        dest_base = os.path.join(upload_dir, os.path.splitext(row["stored_filename"])[0] + ".thumb")
+
+        try:
+            if ext == "pdf":
+                meta = extract_pdf_metadata(path)
+                thumb = render_pdf_thumbnail(path, dest_base, thumb_width)
+            elif ext == "docx":
+                meta = extract_docx_metadata(path)
+                thumb = copy_docx_thumbnail(path, dest_base)
+            else:
+                meta, thumb = {"page_count": None, "text_length": None}, None
+        except Exception:
+            conn.execute(
+                f"UPDATE {table} SET preview_status = 'FAILED', preview_generated_at = ? WHERE id = ?",
+                (int(time.time()), int(doc_id)),
+            )
+            conn.commit()
+            return
+
+        conn.execute(
+            f"""
+            UPDATE {table}
+            SET preview_status = 'READY', page_count = ?, text_length = ?,
+                thumbnail_filename = ?, preview_generated_at = ?
+            WHERE id = ?
+            """,
+            (
+                meta["page_count"],
+                meta["text_length"],
+                os.path.basename(thumb) if thumb else None,
+                int(time.time()),
+                int(doc_id),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="doc-preview")
+        return _executor
+
+
+def queue_document_preview(kind: str, doc_id: int) -> None:
+    """Schedule preview extraction for a freshly committed upload."""
+    table = PREVIEW_TABLES[kind]
+    cfg = current_app.config
+    args = (cfg["DATABASE"], cfg["UPLOAD_FOLDER"], table, int(doc_id), int(cfg["PREVIEW_THUMB_WIDTH"]))
+    if not cfg.get("PREVIEW_ASYNC", True):
+        build_preview(*args)
+        return
+    metrics.gauge_add("background_queue_depth", 1, queue="preview")
+    _get_executor(int(cfg["PREVIEW_WORKERS"])).submit(_build_preview_queued, *args)
+
+
+def _build_preview_queued(*args) -> None:
+    try:
+        build_preview(*args)
+    finally:
+        metrics.gauge_add("background_queue_depth", -1, queue="preview")
+
+
+def build_missing_previews(limit: int | None = None) -> int:
+    """Synchronously fill in previews for rows uploaded before the pipeline existed."""
+    db = get_db()
+    cfg = current_app.config
+    done = 0
+    for kind, table in PREVIEW_TABLES.items():
+        sql = f"SELECT id FROM {table} WHERE preview_status IS NULL ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        for row in db.execute(sql).fetchall():
+            build_preview(cfg["DATABASE"], cfg["UPLOAD_FOLDER"], table, int(row["id"]), int(cfg["PREVIEW_THUMB_WIDTH"]))
+            done += 1
+    return done
@@ -1,5 +1,7 @@
 import time, json
 from ..db import get_db
+from .technician_state_service import refresh_technician_state
+from .duplicate_service import index_account
 
 def create_technician_profile(user_id: int, full_name: str, skills_list, bio: str | None):
     db = get_db()
@@ -8,6 +10,8 @@ def create_technician_profile(user_id: int, full_name: str, skills_list, bio: st
         "INSERT INTO technician_profiles (user_id, full_name, skills_json, bio, created_at) VALUES (?,?,?,?,?)",
         (int(user_id), full_name.strip(), json.dumps(skills_list), bio, now),
     )
+    refresh_technician_state(db, user_id)
+    index_account(db, user_id)
     db.commit()
 
 def create_business_profile(user_id: int, company_name: str, registration_identifier: str):
@@ -17,6 +21,7 @@ def create_business_profile(user_id: int, company_name: str, registration_identi
         "INSERT INTO business_profiles (user_id, company_name, registration_identifier, created_at) VALUES (?,?,?,?)",
         (int(user_id), company_name.strip(), registration_identifier.strip(), now),
     )
+    index_account(db, user_id)
     db.commit()
 
 def get_technician_profile(user_id: int):
@@ -34,6 +39,7 @@ def update_technician_profile(user_id: int, full_name: str, bio: str | None):
         "UPDATE technician_profiles SET full_name = ?, bio = ? WHERE user_id = ?",
         (full_name.strip(), bio, int(user_id)),
     )
+    index_account(db, user_id)
     db.commit()
 
 
@@ -43,4 +49,5 @@ def update_business_profile(user_id: int, company_name: str, registration_identi
         "UPDATE business_profiles SET company_name = ?, registration_identifier = ? WHERE user_id = ?",
         (company_name.strip(), registration_identifier.strip(), int(user_id)),
     )
+    index_account(db, user_id)
     db.commit()
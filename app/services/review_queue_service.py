@@ -0,0 +1,284 @@
+"""Admin review queue with claim leases.
+
+Pending verification requests and skill submissions are handed out to admins
+in batches: claim_next() leases the highest-priority unclaimed items to one
+admin until lease_expires, so two admins working the queue never get the same
+item. Approve/reject only succeed for the lease holder or once the lease has
+lapsed (see claim_guard()), and reviewing an item ends its lease.
+
+Priority is the stored `priority` column plus one point per
+REVIEW_QUEUE_AGE_STEP_SECONDS waited. For verification requests `priority`
+is the sum of SEVERITY_WEIGHTS over the request's flags, kept current by the
+triggers in REVIEW_QUEUE_SQL; skill submissions have no flags and are ordered
+by age alone.
+
+Ageing is baked into `sort_key = priority * step - submitted`: at any moment
+it orders items exactly like `priority + (now - submitted) / step`, but does
+not change as time passes, so it can be indexed. Triggers recompute it when
+`priority` or the submission time changes; the step is written into them, so
+after changing REVIEW_QUEUE_AGE_STEP_SECONDS run `flask db rebuild-review-queue`.
+
+Unclaimed items have lease_expires = 0. claim_next() first returns lapsed
+leases to that state, then reads the best unclaimed items straight off the
+(status, lease_expires, sort_key DESC) index without sorting.
+"""
+
+import time
+
+from flask import current_app, has_app_context
+
+from ..db import get_db
+
+# Used when migrating outside an app context (scratch benchmark databases).
+DEFAULT_AGE_STEP_SECONDS = 3600
+
+SEVERITY_WEIGHTS = {"HIGH": 100, "MEDIUM": 30, "LOW": 10}
+
+_SEVERITY_CASE = (
+    "CASE {sev} "
+    + " ".join(f"WHEN '{s}' THEN {w}" for s, w in SEVERITY_WEIGHTS.items())
+    + " ELSE 0 END"
+)
+
+QUEUES = {
+    "verification": {"table": "verification_requests", "submitted": "submitted_at"},
+    "skill": {"table": "technician_skill_items", "submitted": "created_at"},
+}
+
+REVIEW_QUEUE_SQL = f"""
+DROP INDEX IF EXISTS idx_verification_requests_queue;
+DROP INDEX IF EXISTS idx_skill_items_queue;
+CREATE INDEX IF NOT EXISTS idx_verification_requests_claim
+    ON verification_requests(status, lease_expires, sort_key DESC);
+CREATE INDEX IF NOT EXISTS idx_skill_items_claim
+    ON technician_skill_items(status, lease_expires, sort_key DESC);
+CREATE INDEX IF NOT EXISTS idx_verification_flags_request ON verification_flags(verification_request_id);
+
+CREATE TRIGGER IF NOT EXISTS verification_flags_priority_ai AFTER INSERT ON verification_flags BEGIN
+    UPDATE verification_requests SET priority = priority + {_SEVERITY_CASE.format(sev="NEW.severity")}
+    WHERE id = NEW.verification_request_id;
+END;
+CREATE TRIGGER IF NOT EXISTS verification_flags_priority_ad AFTER DELETE ON verification_flags BEGIN
+    UPDATE verification_requests SET priority = priority - {_SEVERITY_CASE.format(sev="OLD.severity")}
+    WHERE id = OLD.verification_request_id;
+END;
+"""
+
+# sort_key triggers; {step} is the age step in seconds at install time.
+SORT_KEY_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS {table}_sort_key_ai;
+DROP TRIGGER IF EXISTS {table}_sort_key_au;
+CREATE TRIGGER {table}_sort_key_ai AFTER INSERT ON {table} BEGIN
+    UPDATE {table} SET sort_key = NEW.priority * {step} - NEW.{submitted} WHERE id = NEW.id;
+END;
+CREATE TRIGGER {table}_sort_key_au AFTER UPDATE OF priority, {submitted} ON {table} BEGIN
+    UPDATE {table} SET sort_key = NEW.priority * {step} - NEW.{submitted} WHERE id = NEW.id;
+END;
+"""
+
+
+def _age_step() -> int:
+    if has_app_context():
+        return max(1, int(current_app.config["REVIEW_QUEUE_AGE_STEP_SECONDS"]))
+    return DEFAULT_AGE_STEP_SECONDS
+
+
+def install_review_queue(db, age_step_seconds: int | None = None) -> None:
+    """Indexes and priority/sort_key triggers (columns are added by db._migrate).
+
+    Recomputes priorities and sort keys, so it also serves to apply a new age step.
+    """
+    step = max(1, int(age_step_seconds or _age_step()))
+    db.executescript(REVIEW_QUEUE_SQL)
+    db.execute(
+        f"""
+        UPDATE verification_requests SET priority = COALESCE((
+            SELECT SUM({_SEVERITY_CASE.format(sev="f.severity")})
+            FROM verification_flags f WHERE f.verification_request_id = verification_requests.id
+        ), 0)
+        """
+    )
+    for q in QUEUES.values():
+        db.executescript(SORT_KEY_TRIGGERS_SQL.format(table=q["table"], submitted=q["submitted"], step=step))
+        db.execute(f"UPDATE {q['table']} SET sort_key = priority * ? - {q['submitted']}", (step,))
+
+
+def _queue(name: str) -> dict:
+    if name not in QUEUES:
+        raise ValueError(f"Unknown review queue {name!r}.")
+    return QUEUES[name]
+
+
+def claim_guard() -> str:
+    """SQL fragment for review UPDATEs: only the lease holder, or anyone once it lapsed.
+
+    Binds (now, admin_id).
+    """
+    return "AND (lease_expires <= ? OR claimed_by_admin_id = ?)"
+
+
+def _chunks(ids, size: int):
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    size = max(1, int(size))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def bulk_review(queue: str, item_ids, chunk_size: int, outcome: str, columns: str, update_sql: str,
+                update_params: tuple, guard_params: tuple, record) -> dict:
+    """Apply update_sql (`... WHERE id=? AND status='PENDING' <claim guard>`) to each id.
+
+    Each chunk is one transaction, kept small so the write lock is released
+    between them. record(db, reviewed_rows) writes the side effects for the
+    items that were actually moved (rows carry id, status and `columns`).
+    Returns {id: outcome | 'CLAIMED' (leased to another admin) | 'NOT_PENDING' | 'NOT_FOUND'}.
+    """
+    table = _queue(queue)["table"]
+    db = get_db()
+    results = {}
+    for chunk in _chunks(item_ids, chunk_size):
+        with db:
+            rows = db.execute(
+                f"SELECT id, status, {columns} FROM {table} WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            reviewed = [r for r in rows if db.execute(update_sql, update_params + (r["id"],) + guard_params).rowcount == 1]
+            if reviewed:
+                record(db, reviewed)
+        found = {r["id"]: r["status"] for r in rows}
+        done = {r["id"] for r in reviewed}
+        for item_id in chunk:
+            if item_id in done:
+                results[item_id] = outcome
+            elif item_id not in found:
+                results[item_id] = "NOT_FOUND"
+            else:
+                results[item_id] = "CLAIMED" if found[item_id] == "PENDING" else "NOT_PENDING"
+    return results
+
+
+def claim_next(queue: str, admin_id: int, n: int, lease_seconds: int) -> list[int]:
+    """Renew this admin's live claims and top them up to n items. Returns the claimed ids.
+
+    The first statement is a write, so the whole claim runs under SQLite's
+    write lock and concurrent claims are serialized.
+    """
+    q = _queue(queue)
+    db = get_db()
+    now = int(time.time())
+    expires = now + int(lease_seconds)
+    with db:
+        db.execute(
+            f"UPDATE {q['table']} SET lease_expires = ? "
+            f"WHERE status = 'PENDING' AND claimed_by_admin_id = ? AND lease_expires > ?",
+            (expires, int(admin_id), now),
+        )
+        held = [r[0] for r in db.execute(
+            f"SELECT id FROM {q['table']} WHERE status = 'PENDING' AND claimed_by_admin_id = ? AND lease_expires = ?",
+            (int(admin_id), expires),
+        ).fetchall()]
+        need = int(n) - len(held)
+        if need > 0:
+            # Lapsed leases go back to the unclaimed pool (lease_expires = 0) ...
+            db.execute(
+                f"UPDATE {q['table']} SET claimed_by_admin_id = NULL, lease_expires = 0 "
+                f"WHERE status = 'PENDING' AND lease_expires BETWEEN 1 AND ?",
+                (now,),
+            )
+            # ... so the pick is an equality prefix on the claim index, already in sort_key order.
+            fresh = [r[0] for r in db.execute(
+                f"""
+                SELECT id FROM {q['table']}
+                WHERE status = 'PENDING' AND lease_expires = 0
+                ORDER BY sort_key DESC, id ASC
+                LIMIT ?
+                """,
+                (need,),
+            ).fetchall()]
+            if fresh:
+                db.execute(
+                    f"UPDATE {q['table']} SET claimed_by_admin_id = ?, lease_expires = ? "
+                    f"WHERE id IN ({','.join('?' * len(fresh))})",
+                    [int(admin_id), expires] + fresh,
+                )
+            held += fresh
+    return held
+
+
+def claim_item(queue: str, item_id: int, admin_id: int, lease_seconds: int):
+    """Lease one item to admin_id unless another admin holds a live lease.
+
+    Returns None on success, else the (claimed_by_admin_id, lease_expires) row
+    of the current holder. Non-pending items are left alone.
+    """
+    q = _queue(queue)
+    db = get_db()
+    now = int(time.time())
+    with db:
+        cur = db.execute(
+            f"UPDATE {q['table']} SET claimed_by_admin_id = ?, lease_expires = ? "
+            f"WHERE id = ? AND status = 'PENDING' {claim_guard()}",
+            (int(admin_id), now + int(lease_seconds), int(item_id), now, int(admin_id)),
+        )
+    if cur.rowcount == 1:
+        return None
+    row = db.execute(
+        f"SELECT claimed_by_admin_id, lease_expires FROM {q['table']} "
+        f"WHERE id = ? AND status = 'PENDING' AND lease_expires > ?",
+        (int(item_id), now),
+    ).fetchone()
+    return row
+
+
+def release_claim(queue: str, item_id: int, admin_id: int) -> bool:
+    q = _queue(queue)
+    db = get_db()
+    with db:
+        cur = db.execute(
+            f"UPDATE {q['table']} SET claimed_by_admin_id = NULL, lease_expires = 0 "
+            f"WHERE id = ? AND claimed_by_admin_id = ?",
+            (int(item_id), int(admin_id)),
+        )
+    return cur.rowcount == 1
+
+
+def list_claims(admin_id: int) -> dict:
+    """This admin's live claims per queue, highest priority first."""
+    db = get_db()
+    now = int(time.time())
+    return {
+        "verification": db.execute(
+            """
+            SELECT vr.id, vr.user_role, vr.submitted_at, vr.priority, vr.lease_expires, u.email,
+                   (SELECT COUNT(1) FROM verification_flags f WHERE f.verification_request_id = vr.id) AS flag_count
+            FROM verification_requests vr
+            JOIN users u ON u.id = vr.user_id
+            WHERE vr.status = 'PENDING' AND vr.claimed_by_admin_id = ? AND vr.lease_expires > ?
+            ORDER BY vr.priority DESC, vr.submitted_at ASC
+            """,
+            (int(admin_id), now),
+        ).fetchall(),
+        "skill": db.execute(
+            """
+            SELECT s.id, s.skill_name, s.created_at, s.lease_expires, u.email
+            FROM technician_skill_items s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.status = 'PENDING' AND s.claimed_by_admin_id = ? AND s.lease_expires > ?
+            ORDER BY s.created_at ASC
+            """,
+            (int(admin_id), now),
+        ).fetchall(),
+    }
+
+
+def queue_depths() -> dict:
+    """{queue: (pending, currently leased)}."""
+    db = get_db()
+    now = int(time.time())
+    out = {}
+    for name, q in QUEUES.items():
+        row = db.execute(
+            f"SELECT COUNT(1), COALESCE(SUM(lease_expires > ?), 0) FROM {q['table']} WHERE status = 'PENDING'",
+            (now,),
+        ).fetchone()
+        out[name] = (row[0], row[1])
+    return out
@@ -0,0 +1,179 @@
+"""Name/email lookup for admins over technicians and businesses.
+
+account_search is an FTS5 table with the trigram tokenizer (SQLite 3.34+),
+one row per technician/business keyed by user id (rowid), holding the
+technician full name or business company name plus the email. Triggers on
+users / technician_profiles / business_profiles keep it current (see
+ACCOUNT_SEARCH_SQL, installed by db._migrate). Substring queries of 3+
+characters use the trigram index; shorter ones fall back to a scan.
+
+Autocomplete results are kept in a small per-process TTL cache
+(SEARCH_CACHE_TTL_SECONDS), so repeated keystrokes do not query at all.
+When FTS5/trigram is not available the same functions use LIKE on the base
+tables.
+"""
+
+import sqlite3
+
+from flask import current_app
+
+from ..db import get_db
+from ..template_cache import FragmentCache
+
+ACCOUNT_SEARCH_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS account_search USING fts5(
+    name, email, role UNINDEXED, tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS account_search_users_ai AFTER INSERT ON users
+WHEN NEW.role IN ('TECHNICIAN', 'BUSINESS') BEGIN
+    INSERT INTO account_search (rowid, name, email, role) VALUES (
+        NEW.id,
+        COALESCE((SELECT full_name FROM technician_profiles WHERE user_id = NEW.id),
+                 (SELECT company_name FROM business_profiles WHERE user_id = NEW.id), ''),
+        NEW.email, NEW.role);
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_users_au AFTER UPDATE OF email ON users BEGIN
+    UPDATE account_search SET email = NEW.email WHERE rowid = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_users_ad AFTER DELETE ON users BEGIN
+    DELETE FROM account_search WHERE rowid = OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_tp_ai AFTER INSERT ON technician_profiles BEGIN
+    UPDATE account_search SET name = NEW.full_name WHERE rowid = NEW.user_id;
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_tp_au AFTER UPDATE OF full_name ON technician_profiles BEGIN
+    UPDATE account_search SET name = NEW.full_name WHERE rowid = NEW.user_id;
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_bp_ai AFTER INSERT ON business_profiles BEGIN
+    UPDATE account_search SET name = NEW.company_name WHERE rowid = NEW.user_id;
+END;
+CREATE TRIGGER IF NOT EXISTS account_search_bp_au AFTER UPDATE OF company_name ON business_profiles BEGIN
+    UPDATE account_search SET name = NEW.company_name WHERE rowid = NEW.user_id;
+END;
+"""
+
+MIN_TRIGRAM_QUERY = 3
+
+_cache = FragmentCache(1024)
+
+
+def install_account_search(db) -> bool:
+    """Create the FTS table and triggers if this SQLite supports them; backfill when new.
+
+    Returns False when FTS5 or the trigram tokenizer is missing.
+    """
+    existed = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'account_search'").fetchone() is not None
+    try:
+        db.executescript(ACCOUNT_SEARCH_SQL)
+    except sqlite3.OperationalError:
+        return False
+    if not existed:
+        rebuild_account_search(db)
+    return True
+
+
+def rebuild_account_search(db) -> int:
+    db.execute("DELETE FROM account_search")
+    db.execute(
+        """
+        INSERT INTO account_search (rowid, name, email, role)
+        SELECT u.id, COALESCE(tp.full_name, bp.company_name, ''), u.email, u.role
+        FROM users u
+        LEFT JOIN technician_profiles tp ON tp.user_id = u.id
+        LEFT JOIN business_profiles bp ON bp.user_id = u.id
+        WHERE u.role IN ('TECHNICIAN', 'BUSINESS')
+        """
+    )
+    return db.execute("SELECT COUNT(*) FROM account_search").fetchone()[0]
+
+
+def _fts_available(db) -> bool:
+    return db.execute("SELECT 1 FROM sqlite_master WHERE name = 'account_search'").fetchone() is not None
+
+
+def _phrase(q: str) -> str:
+    # One quoted phrase: the trigram tokenizer then matches it as a substring.
+    return '"' + q.replace('"', '""') + '"'
+
+
+def _escape_like(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def matching_user_ids(q: str, role: str | None = None, name_only: bool = False):
+    """(sql, params) for a subquery selecting user ids whose name (or email) contains q.
+
+    For use as `... WHERE x.user_id IN (<sql>)`.
+    """
+    db = get_db()
+    if _fts_available(db):
+        role_sql = " AND role = ?" if role else ""
+        role_params = [role] if role else []
+        if len(q) >= MIN_TRIGRAM_QUERY:
+            column = "name" if name_only else "{name email}"
+            return (f"SELECT rowid FROM account_search WHERE account_search MATCH ?{role_sql}",
+                    [f"{column} : {_phrase(q)}"] + role_params)
+        where = "name LIKE ? ESCAPE '\\'" if name_only else "(name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')"
+        pattern = f"%{_escape_like(q)}%"
+        return (f"SELECT rowid FROM account_search WHERE {where}{role_sql}",
+                [pattern] * (1 if name_only else 2) + role_params)
+    pattern = f"%{_escape_like(q)}%"
+    role_sql = " AND u.role = ?" if role else ""
+    name_sql = "COALESCE(tp.full_name, bp.company_name, '') LIKE ? ESCAPE '\\'"
+    where = name_sql if name_only else f"({name_sql} OR u.email LIKE ? ESCAPE '\\')"
+    return (
+        "SELECT u.id FROM users u "
+        "LEFT JOIN technician_profiles tp ON tp.user_id = u.id "
+        "LEFT JOIN business_profiles bp ON bp.user_id = u.id "
+        f"WHERE {where}{role_sql}",
+        [pattern] * (1 if name_only else 2) + ([role] if role else []),
+    )
+
+
+def search_accounts(q: str, role: str | None = None, limit: int = 8) -> list[dict]:
+    """Autocomplete: up to `limit` distinct technicians/businesses matching q.
+
+    Ranked: name starts with q, then name contains q, then email-only matches;
+    ties by name. Each result carries the user's latest verification
+    request id (the admin review link).
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    key = (q.lower(), role, int(limit))
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    db = get_db()
+    ids_sql, params = matching_user_ids(q, role)
+    lowered = q.lower()
+    rows = db.execute(
+        f"""
+        SELECT u.id AS user_id, u.email, u.role,
+               COALESCE(tp.full_name, bp.company_name, '') AS name,
+               (SELECT vr.id FROM verification_requests vr WHERE vr.user_id = u.id
+                ORDER BY vr.submitted_at DESC, vr.id DESC LIMIT 1) AS request_id
+        FROM users u
+        LEFT JOIN technician_profiles tp ON tp.user_id = u.id
+        LEFT JOIN business_profiles bp ON bp.user_id = u.id
+        WHERE u.id IN ({ids_sql})
+        ORDER BY
+          CASE
+            WHEN lower(COALESCE(tp.full_name, bp.company_name, '')) LIKE ? ESCAPE '\\' THEN 0
+            WHEN instr(lower(COALESCE(tp.full_name, bp.company_name, '')), ?) > 0 THEN 1
+            ELSE 2
+          END,
+          name COLLATE NOCASE, u.id
+        LIMIT ?
+        """,
+        params + [f"{_escape_like(lowered)}%", lowered, int(limit)],
+    ).fetchall()
+    results = [dict(r) for r in rows]
+    _cache.set(key, results, float(current_app.config["SEARCH_CACHE_TTL_SECONDS"]))
+    return results
+
+
+def clear_search_cache() -> None:
+    _cache.clear()
@@ -19,6 +19,8 @@ from werkzeug.utils import secure_filename
 from flask import current_app
 
 from ..db import get_db
+from .. import metrics
+from .review_queue_service import bulk_review, claim_guard
 
 
 PENDING_LIMIT = 3
@@ -100,7 +102,7 @@ def attach_skill_documents(skill_item_id: int, files: Iterable, upload_dir: str
     os.makedirs(upload_dir, exist_ok=True)
 
     db = get_db()
-    saved_any = False
+    saved_ids = []
     now = int(time.time())
 
     for f in files:
@@ -120,8 +122,9 @@ def attach_skill_documents(skill_item_id: int, files: Iterable, upload_dir: str
         stored = secure_filename(f"{token}{ext}")
         dest = os.path.join(upload_dir, stored)
         f.save(dest)
+        metrics.inc("upload_bytes_total", size, kind="skill")
 
-        db.execute(
+        cur = db.execute(
             """
             INSERT INTO technician_skill_documents
               (skill_item_id, original_filename, stored_filename, file_extension, file_size, uploaded_at)
@@ -129,12 +132,15 @@ def attach_skill_documents(skill_item_id: int, files: Iterable, upload_dir: str
             """,
             (int(skill_item_id), orig, stored, ext.lstrip("."), int(size), now),
         )
-        saved_any = True
+        saved_ids.append(cur.lastrowid)
 
-    if not saved_any:
+    if not saved_ids:
         raise ValueError("No valid documents uploaded.")
 
     db.commit()
+    from .preview_service import queue_document_preview  # lazy: pulls in zipfile/zlib parsing
+    for doc_id in saved_ids:
+        queue_document_preview("skill", doc_id)
 
 
 # =========================
@@ -178,33 +184,71 @@ def get_skill_document_by_id(doc_id: int):
     ).fetchone()
 
 
-def approve_skill_request(skill_id: int, admin_id: int) -> None:
+# Review updates only apply to PENDING items this admin may review: the lease
+# holder, or anyone once the lease lapsed (services/review_queue_service.py).
+_APPROVE_SQL = f"""
+    UPDATE technician_skill_items
+    SET status='APPROVED', reviewed_at=?, reviewed_by_admin_id=?, rejection_reason=NULL,
+        claimed_by_admin_id=NULL, lease_expires=0
+    WHERE id=? AND status='PENDING' {claim_guard()}
+"""
+
+_REJECT_SQL = f"""
+    UPDATE technician_skill_items
+    SET status='REJECTED', rejection_reason=?, reviewed_at=?, reviewed_by_admin_id=?,
+        claimed_by_admin_id=NULL, lease_expires=0
+    WHERE id=? AND status='PENDING' {claim_guard()}
+"""
+
+
+def _review_skill(sql: str, params: tuple, skill_id: int) -> None:
     db = get_db()
-    now = int(time.time())
-    db.execute(
-        """
-        UPDATE technician_skill_items
-        SET status='APPROVED', reviewed_at=?, reviewed_by_admin_id=?, rejection_reason=NULL
-        WHERE id=? AND status='PENDING'
-        """,
-        (now, int(admin_id), int(skill_id)),
-    )
+    cur = db.execute(sql, params)
     db.commit()
+    if cur.rowcount != 1:
+        row = get_skill_request(skill_id)
+        if row is not None and row["status"] == "PENDING":
+            raise ValueError("This skill request is claimed by another admin.")
+        raise ValueError("Skill request is no longer pending.")
+
+
+def approve_skill_request(skill_id: int, admin_id: int) -> None:
+    now = int(time.time())
+    _review_skill(_APPROVE_SQL, (now, int(admin_id), int(skill_id), now, int(admin_id)), skill_id)
 
 
 def reject_skill_request(skill_id: int, admin_id: int, reason: str) -> None:
     reason = (reason or "").strip() or "Rejected"
-    db = get_db()
     now = int(time.time())
-    db.execute(
-        """
-        UPDATE technician_skill_items
-        SET status='REJECTED', rejection_reason=?, reviewed_at=?, reviewed_by_admin_id=?
-        WHERE id=? AND status='PENDING'
-        """,
-        (reason, now, int(admin_id), int(skill_id)),
+    _review_skill(_REJECT_SQL, (reason, now, int(admin_id), int(skill_id), now, int(admin_id)), skill_id)
+
+
+def _notify_reviewed(notification_type: str, message):
+    """record callback for bulk_review: message(skill_row) builds each user's notification text."""
+    from .notification_service import create_notification_rows
+
+    def record(db, reviewed):
+        create_notification_rows([(r["user_id"], notification_type, message(r)) for r in reviewed], commit=False)
+    return record
+
+
+def bulk_approve_skill_requests(skill_ids: Iterable[int], admin_id: int, chunk_size: int = 100) -> dict:
+    now = int(time.time())
+    return bulk_review(
+        "skill", skill_ids, chunk_size, "APPROVED", "user_id, skill_name",
+        _APPROVE_SQL, (now, int(admin_id)), (now, int(admin_id)),
+        _notify_reviewed("SKILL_APPROVED", lambda r: f"✅ Skill approved: {r['skill_name']}"),
+    )
+
+
+def bulk_reject_skill_requests(skill_ids: Iterable[int], admin_id: int, reason: str, chunk_size: int = 100) -> dict:
+    reason = (reason or "").strip() or "Rejected"
+    now = int(time.time())
+    return bulk_review(
+        "skill", skill_ids, chunk_size, "REJECTED", "user_id, skill_name",
+        _REJECT_SQL, (reason, now, int(admin_id)), (now, int(admin_id)),
+        _notify_reviewed("SKILL_REJECTED", lambda r: f"❌ Skill rejected: {r['skill_name']}. Reason: {reason}"),
     )
-    db.commit()
 
 
 # =========================
@@ -1,5 +1,3 @@
-import difflib
-
 # =========================
 # CANONICAL SKILL LIST
 # =========================
@@ -20,6 +18,8 @@ CANONICAL_SKILLS = [
 # Skill suggestion logic
 # =========================
 def suggest_skills(query: str, limit: int = 6):
+    import difflib  # only the suggestion endpoint needs it; keep it off the boot path
+
     query = (query or "").strip().lower()
 
     scored = []
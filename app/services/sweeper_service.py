@@ -0,0 +1,222 @@
+"""Time-based state transitions, run periodically by `flask sweep` (cron or --loop).
+
+  cooldown-expiry      REJECTED requests whose cooldown_until has passed: tell
+                       the user they may resubmit (once, via cooldown_notified_at)
+  stale-outgoing       OUTGOING jobs with no job update and no application for
+                       STALE_OUTGOING_JOB_SECONDS -> CANCELLED, open applications
+                       DENIED
+  auto-confirm         PENDING_CONFIRMATION jobs left unconfirmed for
+                       AUTO_CONFIRM_GRACE_SECONDS -> COMPLETED
+  idempotency-keys     stored POST responses older than IDEMPOTENCY_KEY_TTL_SECONDS
+                       are deleted
+  chunked-uploads      resumable uploads idle for CHUNKED_UPLOAD_TTL_SECONDS are
+                       deleted with their partial files
+
+Each transition walks its candidates through an index in batches of
+SWEEP_BATCH_SIZE, one transaction per batch. The UPDATE re-checks the
+candidate's state, so a row changed by a user between the SELECT and the
+UPDATE is left alone. A duration of 0 disables a transition.
+
+jobs.updated_at / job_applications.applied_at are UTC ISO strings, so job
+cutoffs are compared as strings in the same format.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ..db import get_db
+from .. import metrics
+from .notification_service import create_notification_rows
+from .technician_state_service import refresh_technician_state
+
+
+def _iso_cutoff(seconds: int) -> str:
+    return (datetime.utcnow() - timedelta(seconds=int(seconds))).isoformat()
+
+
+def _marks(ids) -> str:
+    return ",".join("?" * len(ids))
+
+
+def notify_expired_cooldowns(db, batch_size: int) -> int:
+    """Notify users whose rejection cooldown has ended. Returns requests processed."""
+    now = int(time.time())
+    done = 0
+    while True:
+        rows = db.execute(
+            """
+            SELECT vr.id, vr.user_id,
+                   NOT EXISTS (
+                       SELECT 1 FROM verification_requests newer
+                       WHERE newer.user_id = vr.user_id AND newer.submitted_at > vr.submitted_at
+                   ) AS is_latest
+            FROM verification_requests vr
+            WHERE vr.status = 'REJECTED' AND vr.cooldown_notified_at IS NULL AND vr.cooldown_until <= ?
+            ORDER BY vr.cooldown_until
+            LIMIT ?
+            """,
+            (now, int(batch_size)),
+        ).fetchall()
+        if not rows:
+            return done
+        ids = [r["id"] for r in rows]
+        with db:
+            # Only rows this sweep marked: a concurrent sweep (cron + --loop) notifies the rest.
+            marked = {x[0] for x in db.execute(
+                f"UPDATE verification_requests SET cooldown_notified_at = ? "
+                f"WHERE id IN ({_marks(ids)}) AND cooldown_notified_at IS NULL "
+                f"RETURNING id",
+                [now] + ids,
+            ).fetchall()}
+            # A user who already resubmitted does not need telling.
+            create_notification_rows(
+                [(r["user_id"], "COOLDOWN_EXPIRED",
+                  "Your rejection cooldown has ended. You may now resubmit your verification request.")
+                 for r in rows if r["id"] in marked and r["is_latest"]],
+                commit=False,
+            )
+        metrics.inc("sweeper_transitions_total", len(marked), transition="cooldown-expiry")
+        done += len(marked)
+
+
+def close_stale_outgoing_jobs(db, idle_seconds: int, batch_size: int) -> int:
+    """Cancel open jobs with no activity for idle_seconds. Returns jobs cancelled."""
+    cutoff = _iso_cutoff(idle_seconds)
+    now = datetime.utcnow().isoformat()
+    done = 0
+    last = ("", 0)
+    while True:
+        # Keyset over (updated_at, id): jobs kept open by a recent application stay in range.
+        rows = db.execute(
+            """
+            SELECT id, updated_at, business_id, title FROM jobs
+            WHERE status = 'OUTGOING' AND updated_at <= ? AND (updated_at, id) > (?, ?)
+            ORDER BY updated_at, id
+            LIMIT ?
+            """,
+            (cutoff, last[0], last[1], int(batch_size)),
+        ).fetchall()
+        if not rows:
+            return done
+        last = (rows[-1]["updated_at"], rows[-1]["id"])
+        ids = [r["id"] for r in rows]
+        with db:
+            closed = {x[0] for x in db.execute(
+                f"""
+                UPDATE jobs SET status = 'CANCELLED', version = version + 1, updated_at = ?
+                WHERE id IN ({_marks(ids)}) AND status = 'OUTGOING' AND updated_at <= ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM job_applications ja WHERE ja.job_id = jobs.id AND ja.applied_at > ?
+                  )
+                RETURNING id
+                """,
+                [now] + ids + [cutoff, cutoff],
+            ).fetchall()}
+            if not closed:
+                continue
+            closed_ids = sorted(closed)
+            applicants = db.execute(
+                f"""
+                UPDATE job_applications SET status = 'DENIED'
+                WHERE job_id IN ({_marks(closed_ids)}) AND status = 'APPLIED'
+                RETURNING job_id, technician_id
+                """,
+                closed_ids,
+            ).fetchall()
+            titles = {r["id"]: r["title"] for r in rows}
+            notes = [(r["business_id"], "JOB_AUTO_CLOSED",
+                      f"Your job \"{r['title']}\" was closed after {idle_seconds // 86400} day(s) without activity.")
+                     for r in rows if r["id"] in closed]
+            notes += [(a["technician_id"], "JOB_AUTO_CLOSED",
+                       f"The job \"{titles[a['job_id']]}\" you applied to has been closed.")
+                      for a in applicants]
+            create_notification_rows(notes, commit=False)
+        metrics.inc("sweeper_transitions_total", len(closed), transition="stale-outgoing")
+        done += len(closed)
+
+
+def auto_confirm_completions(db, grace_seconds: int, batch_size: int) -> int:
+    """Complete jobs whose completion request went unconfirmed for grace_seconds. Returns jobs completed."""
+    cutoff = _iso_cutoff(grace_seconds)
+    now = datetime.utcnow().isoformat()
+    done = 0
+    while True:
+        rows = db.execute(
+            """
+            SELECT id, business_id, assigned_technician_id, title FROM jobs
+            WHERE status = 'PENDING_CONFIRMATION' AND updated_at <= ?
+            ORDER BY updated_at, id
+            LIMIT ?
+            """,
+            (cutoff, int(batch_size)),
+        ).fetchall()
+        if not rows:
+            return done
+        ids = [r["id"] for r in rows]
+        with db:
+            completed = {x[0] for x in db.execute(
+                f"""
+                UPDATE jobs SET status = 'COMPLETED', version = version + 1, updated_at = ?
+                WHERE id IN ({_marks(ids)}) AND status = 'PENDING_CONFIRMATION' AND updated_at <= ?
+                RETURNING id
+                """,
+                [now] + ids + [cutoff],
+            ).fetchall()}
+            notes = []
+            for r in rows:
+                if r["id"] not in completed:
+                    continue
+                notes.append((r["business_id"], "JOB_AUTO_COMPLETED",
+                              f"\"{r['title']}\" was marked completed automatically after the confirmation period."))
+                if r["assigned_technician_id"] is not None:
+                    refresh_technician_state(db, r["assigned_technician_id"])
+                    notes.append((r["assigned_technician_id"], "JOB_AUTO_COMPLETED",
+                                  f"\"{r['title']}\" has been confirmed as completed."))
+            create_notification_rows(notes, commit=False)
+        metrics.inc("sweeper_transitions_total", len(completed), transition="auto-confirm")
+        done += len(completed)
+
+
+def purge_idempotency_keys(db, ttl_seconds: int, batch_size: int) -> int:
+    """Drop stored idempotency keys (services/idempotency_service.py) older than ttl_seconds."""
+    from .idempotency_service import purge_expired_keys
+
+    n = purge_expired_keys(db, ttl_seconds, batch_size)
+    metrics.inc("sweeper_transitions_total", n, transition="idempotency-keys")
+    return n
+
+
+def purge_chunked_uploads(db, ttl_seconds: int) -> int:
+    """Delete abandoned chunked uploads (services/chunked_upload_service.py) idle for ttl_seconds."""
+    from .chunked_upload_service import cleanup_abandoned_uploads
+
+    n = cleanup_abandoned_uploads(ttl_seconds)
+    metrics.inc("sweeper_transitions_total", n, transition="chunked-uploads")
+    return n
+
+
+TRANSITIONS = {
+    # name -> (fn(db, batch_size, seconds), config key of its duration; 0 disables it)
+    "cooldown-expiry": (lambda db, batch, seconds: notify_expired_cooldowns(db, batch), None),
+    "stale-outgoing": (lambda db, batch, seconds: close_stale_outgoing_jobs(db, seconds, batch), "STALE_OUTGOING_JOB_SECONDS"),
+    "auto-confirm": (lambda db, batch, seconds: auto_confirm_completions(db, seconds, batch), "AUTO_CONFIRM_GRACE_SECONDS"),
+    "idempotency-keys": (lambda db, batch, seconds: purge_idempotency_keys(db, seconds, batch), "IDEMPOTENCY_KEY_TTL_SECONDS"),
+    "chunked-uploads": (lambda db, batch, seconds: purge_chunked_uploads(db, seconds), "CHUNKED_UPLOAD_TTL_SECONDS"),
+}
+
+
+def run_sweep(only=None) -> dict:
+    """Run every enabled transition, or just those named in `only`. Returns {transition: rows changed}."""
+    cfg = current_app.config
+    db = get_db()
+    out = {}
+    for name, (fn, seconds_key) in TRANSITIONS.items():
+        if only and name not in only:
+            continue
+        seconds = cfg[seconds_key] if seconds_key else None
+        if seconds_key and seconds <= 0:
+            continue
+        out[name] = fn(db, cfg["SWEEP_BATCH_SIZE"], seconds)
+    return out
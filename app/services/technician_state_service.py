@@ -0,0 +1,77 @@
+"""technician_current_state: one row per technician with their latest
+verification request and current (ACTIVE / PENDING_CONFIRMATION) job.
+
+The admin technician listing reads this table instead of running two
+correlated subqueries per technician. Every service that changes a
+verification request or a job's assignment/status calls
+refresh_technician_state() with its own connection, inside its own
+transaction, so the row changes atomically with the source rows.
+rebuild_technician_states() recomputes everything (migration backfill and
+`flask db rebuild-technician-state`).
+"""
+
+import time
+
+# Latest verification request per technician and their most recently updated
+# live job, both picked with ROW_NUMBER() in one pass over each table.
+_STATE_SELECT = """
+    WITH latest_vr AS (
+        SELECT user_id, id, status,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY submitted_at DESC, id DESC) AS rn
+        FROM verification_requests
+        WHERE user_role = 'TECHNICIAN' {vr_filter}
+    ),
+    current_job AS (
+        SELECT assigned_technician_id AS user_id, id, status,
+               ROW_NUMBER() OVER (PARTITION BY assigned_technician_id ORDER BY updated_at DESC, id DESC) AS rn
+        FROM jobs
+        WHERE status IN ('ACTIVE', 'PENDING_CONFIRMATION') AND assigned_technician_id IS NOT NULL {job_filter}
+    )
+    SELECT tp.user_id, vr.id, vr.status, cj.id, cj.status, ?
+    FROM technician_profiles tp
+    LEFT JOIN latest_vr vr ON vr.user_id = tp.user_id AND vr.rn = 1
+    LEFT JOIN current_job cj ON cj.user_id = tp.user_id AND cj.rn = 1
+    {tp_filter}
+"""
+
+_UPSERT = """
+    INSERT INTO technician_current_state
+        (user_id, verification_request_id, verification_status, current_job_id, current_job_status, updated_at)
+    {select}
+    ON CONFLICT(user_id) DO UPDATE SET
+        verification_request_id = excluded.verification_request_id,
+        verification_status = excluded.verification_status,
+        current_job_id = excluded.current_job_id,
+        current_job_status = excluded.current_job_status,
+        updated_at = excluded.updated_at
+"""
+
+
+def refresh_technician_state(conn, user_id: int) -> None:
+    """Recompute one technician's row (no commit; runs in the caller's transaction).
+
+    A no-op for users without a technician profile (businesses, admins).
+    """
+    select = _STATE_SELECT.format(
+        vr_filter="AND user_id = ?",
+        job_filter="AND assigned_technician_id = ?",
+        tp_filter="WHERE tp.user_id = ?",
+    )
+    conn.execute(_UPSERT.format(select=select), (int(user_id), int(user_id), int(time.time()), int(user_id)))
+
+
+def refresh_technician_state_for_request(conn, request_id: int) -> None:
+    row = conn.execute(
+        "SELECT user_id FROM verification_requests WHERE id = ? AND user_role = 'TECHNICIAN'", (int(request_id),)
+    ).fetchone()
+    if row is not None:
+        refresh_technician_state(conn, row[0])
+
+
+def rebuild_technician_states(conn) -> int:
+    """Recompute every technician's row. Returns the number of technicians."""
+    # An INSERT ... SELECT with an upsert clause needs a WHERE, or SQLite reads ON CONFLICT as a join constraint.
+    select = _STATE_SELECT.format(vr_filter="", job_filter="", tp_filter="WHERE true")
+    conn.execute("DELETE FROM technician_current_state")
+    conn.execute(_UPSERT.format(select=select), (int(time.time()),))
+    return conn.execute("SELECT COUNT(*) FROM technician_current_state").fetchone()[0]
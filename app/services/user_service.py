@@ -1,6 +1,7 @@
 import sqlite3
 from flask import current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..db import connect
+from .password_service import hash_password, check_password, needs_rehash
 from datetime import datetime
 
 
@@ -10,13 +11,13 @@ from datetime import datetime
 
 def create_user(email: str, password: str, role: str):
     email = email.strip().lower()
-    password_hash = generate_password_hash(password)
+    password_hash = hash_password(password)
     created_at = int(datetime.utcnow().timestamp())
 
     db_path = current_app.config["DATABASE"]
     print("CREATE_USER DB PATH:", db_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
 
@@ -50,7 +51,7 @@ def get_user_by_email(email: str):
     db_path = current_app.config["DATABASE"]
     print("GET_USER DB PATH:", db_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
 
@@ -68,7 +69,7 @@ def get_user_by_email(email: str):
 def get_user_by_id(user_id: int):
     db_path = current_app.config["DATABASE"]
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
 
@@ -86,7 +87,7 @@ def get_user_by_id(user_id: int):
 def update_last_login(user_id: int):
     db_path = current_app.config["DATABASE"]
     now = int(datetime.utcnow().timestamp())
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     cur = conn.cursor()
     cur.execute("UPDATE users SET last_login_at = ? WHERE id = ?", (now, int(user_id)))
     conn.commit()
@@ -116,7 +117,7 @@ def change_email(user_id: int, password: str, new_email: str) -> tuple[bool, str
         return False, "That email is already in use."
 
     db_path = current_app.config["DATABASE"]
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     cur = conn.cursor()
     cur.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, int(user_id)))
     conn.commit()
@@ -139,9 +140,9 @@ def change_password(user_id: int, old_password: str, new_password: str) -> tuple
         return False, "Current password is incorrect."
 
     db_path = current_app.config["DATABASE"]
-    new_hash = generate_password_hash(new_password)
+    new_hash = hash_password(new_password)
     now = int(datetime.utcnow().timestamp())
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     cur = conn.cursor()
     cur.execute(
         "UPDATE users SET password_hash = ?, force_password_change = 0, password_changed_at = ? WHERE id = ?",
@@ -154,7 +155,7 @@ def change_password(user_id: int, old_password: str, new_password: str) -> tuple
 
 def set_force_password_change(user_id: int, required: bool = True):
     db_path = current_app.config["DATABASE"]
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     cur = conn.cursor()
     cur.execute(
         "UPDATE users SET force_password_change = ? WHERE id = ?",
@@ -171,4 +172,21 @@ def set_force_password_change(user_id: int, required: bool = True):
 def verify_password(user_row, password: str) -> bool:
     if not user_row:
         return False
-    return check_password_hash(user_row["password_hash"], password)
\ No newline at end of file
+    return check_password(user_row["password_hash"], password)
+
+
+def rehash_password_if_needed(user_row, password: str) -> bool:
+    """Upgrade a stored hash to the current PASSWORD_HASH_METHOD after a successful login."""
+    if not needs_rehash(user_row["password_hash"]):
+        return False
+    new_hash = hash_password(password)
+    db_path = current_app.config["DATABASE"]
+    conn = connect(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+        (new_hash, int(user_row["id"]), user_row["password_hash"]),
+    )
+    conn.commit()
+    conn.close()
+    return True
\ No newline at end of file
@@ -1,5 +1,8 @@
 import time
 from ..db import get_db
+from .technician_state_service import refresh_technician_state, refresh_technician_state_for_request
+from ..template_cache import version_stamp
+from .review_queue_service import bulk_review, claim_guard
 
 def get_latest_request_for_user(user_id: int):
     db = get_db()
@@ -41,6 +44,8 @@ def create_verification_request(user_id: int, user_role: str):
         "INSERT INTO verification_requests (user_id, user_role, status, submitted_at) VALUES (?,?,?,?)",
         (int(user_id), user_role, "PENDING", now),
     )
+    if user_role == "TECHNICIAN":
+        refresh_technician_state(db, user_id)
     db.commit()
     return cur.lastrowid
 
@@ -53,6 +58,20 @@ def attach_flag(verification_request_id: int, flag_type: str, severity: str, des
     )
     db.commit()
 
+def attach_flags(verification_request_id: int, flags) -> int:
+    """Insert [(flag_type, severity, description)] for one request with a single executemany and commit."""
+    flags = list(flags)
+    if not flags:
+        return 0
+    db = get_db()
+    now = int(time.time())
+    db.executemany(
+        "INSERT INTO verification_flags (verification_request_id, flag_type, severity, description, created_at) VALUES (?,?,?,?,?)",
+        [(int(verification_request_id), ft, sev, desc, now) for ft, sev, desc in flags],
+    )
+    db.commit()
+    return len(flags)
+
 def list_flags(verification_request_id: int):
     db = get_db()
     return db.execute(
@@ -60,17 +79,28 @@ def list_flags(verification_request_id: int):
         (int(verification_request_id),),
     ).fetchall()
 
+# Reviewing ends the reviewer's lease (services/review_queue_service.py).
+_END_CLAIM = "claimed_by_admin_id=NULL, lease_expires=0"
+
+
+def _review_conflict(db, request_id: int, action: str) -> str:
+    row = db.execute("SELECT status FROM verification_requests WHERE id = ?", (int(request_id),)).fetchone()
+    if row is not None and row["status"] == "PENDING":
+        return "This request is claimed by another admin."
+    return f"Invalid request state for {action}"
+
 def approve_request(request_id: int, admin_id: int):
     db = get_db()
     now = int(time.time())
     # Transaction-safe approval
     with db:
         cur = db.execute(
-            "UPDATE verification_requests SET status='APPROVED', reviewed_at=?, reviewed_by_admin_id=? WHERE id=? AND status='PENDING'",
-            (now, int(admin_id), int(request_id)),
+            f"UPDATE verification_requests SET status='APPROVED', reviewed_at=?, reviewed_by_admin_id=?, {_END_CLAIM} "
+            f"WHERE id=? AND status='PENDING' {claim_guard()}",
+            (now, int(admin_id), int(request_id), now, int(admin_id)),
         )
         if cur.rowcount != 1:
-            raise ValueError("Invalid request state for approval")
+            raise ValueError(_review_conflict(db, request_id, "approval"))
 
         # Mark user verified for fast gating & UI consistency
         db.execute(
@@ -82,6 +112,7 @@ def approve_request(request_id: int, admin_id: int):
             "INSERT INTO admin_actions (admin_user_id, action_type, target_verification_request_id, timestamp) VALUES (?,?,?,?)",
             (int(admin_id), "APPROVE_VERIFICATION", int(request_id), now),
         )
+        refresh_technician_state_for_request(db, request_id)
 
 def reject_request(request_id: int, admin_id: int, reason: str, cooldown_seconds: int):
     db = get_db()
@@ -90,11 +121,12 @@ def reject_request(request_id: int, admin_id: int, reason: str, cooldown_seconds
     # Transaction-safe rejection
     with db:
         cur = db.execute(
-            "UPDATE verification_requests SET status='REJECTED', reviewed_at=?, reviewed_by_admin_id=?, rejection_reason=?, rejected_at=?, cooldown_until=? WHERE id=? AND status='PENDING'",
-            (now, int(admin_id), reason, now, cooldown_until, int(request_id)),
+            f"UPDATE verification_requests SET status='REJECTED', reviewed_at=?, reviewed_by_admin_id=?, rejection_reason=?, rejected_at=?, cooldown_until=?, {_END_CLAIM} "
+            f"WHERE id=? AND status='PENDING' {claim_guard()}",
+            (now, int(admin_id), reason, now, cooldown_until, int(request_id), now, int(admin_id)),
         )
         if cur.rowcount != 1:
-            raise ValueError("Invalid request state for rejection")
+            raise ValueError(_review_conflict(db, request_id, "rejection"))
 
         # Ensure user remains unverified
         db.execute(
@@ -106,6 +138,63 @@ def reject_request(request_id: int, admin_id: int, reason: str, cooldown_seconds
             "INSERT INTO admin_actions (admin_user_id, action_type, target_verification_request_id, timestamp, notes) VALUES (?,?,?,?,?)",
             (int(admin_id), "REJECT_VERIFICATION", int(request_id), now, reason),
         )
+        refresh_technician_state_for_request(db, request_id)
+
+# =========================
+# Bulk review
+# =========================
+# review_queue_service.bulk_review commits one transaction per chunk of ids:
+# status updates, users.is_verified, admin_actions and notifications are
+# written together.
+
+def _record_reviews(db, reviewed, admin_id: int, now: int, is_verified: int, action_type: str, notes,
+                    notification_type: str, message: str) -> None:
+    from .notification_service import create_notifications
+
+    user_ids = [r["user_id"] for r in reviewed]
+    db.execute(
+        f"UPDATE users SET is_verified = ? WHERE id IN ({','.join('?' * len(user_ids))})",
+        [is_verified] + user_ids,
+    )
+    db.executemany(
+        "INSERT INTO admin_actions (admin_user_id, action_type, target_verification_request_id, timestamp, notes) VALUES (?,?,?,?,?)",
+        [(int(admin_id), action_type, r["id"], now, notes) for r in reviewed],
+    )
+    for r in reviewed:
+        if r["user_role"] == "TECHNICIAN":
+            refresh_technician_state(db, r["user_id"])
+    create_notifications(user_ids, notification_type, message, commit=False)
+
+
+def bulk_approve_requests(request_ids, admin_id: int, chunk_size: int = 100) -> dict:
+    """Approve many PENDING verification requests and notify their users."""
+    now = int(time.time())
+    return bulk_review(
+        "verification", request_ids, chunk_size, "APPROVED", "user_id, user_role",
+        f"UPDATE verification_requests SET status='APPROVED', reviewed_at=?, reviewed_by_admin_id=?, {_END_CLAIM} "
+        f"WHERE id=? AND status='PENDING' {claim_guard()}",
+        (now, int(admin_id)), (now, int(admin_id)),
+        lambda db, reviewed: _record_reviews(
+            db, reviewed, admin_id, now, 1, "APPROVE_VERIFICATION", None,
+            "VERIFICATION_APPROVED", "🎉 Your account has been verified! You may now proceed.",
+        ),
+    )
+
+
+def bulk_reject_requests(request_ids, admin_id: int, reason: str, cooldown_seconds: int, chunk_size: int = 100) -> dict:
+    """Reject many PENDING verification requests (each starts its cooldown) and notify their users."""
+    now = int(time.time())
+    return bulk_review(
+        "verification", request_ids, chunk_size, "REJECTED", "user_id, user_role",
+        f"UPDATE verification_requests SET status='REJECTED', reviewed_at=?, reviewed_by_admin_id=?, rejection_reason=?, rejected_at=?, cooldown_until=?, {_END_CLAIM} "
+        f"WHERE id=? AND status='PENDING' {claim_guard()}",
+        (now, int(admin_id), reason, now, now + int(cooldown_seconds)), (now, int(admin_id)),
+        lambda db, reviewed: _record_reviews(
+            db, reviewed, admin_id, now, 0, "REJECT_VERIFICATION", reason,
+            "VERIFICATION_REJECTED", f"Your account verification was rejected. Reason: {reason}",
+        ),
+    )
+
 
 def get_request_by_id(request_id: int):
     db = get_db()
@@ -118,6 +207,32 @@ def list_pending_requests():
     ).fetchall()
 
 
+def review_queue_version() -> str:
+    """Stamp for the admin homepage counters and pending lists.
+
+    Changes when a verification or skill request is added or changes status,
+    when a user is added, or when a user with a pending request changes email.
+    """
+    db = get_db()
+    rows = db.execute(
+        """
+        SELECT 'vr', status, COUNT(1), MAX(id), MAX(COALESCE(reviewed_at, submitted_at))
+          FROM verification_requests GROUP BY status
+        UNION ALL
+        SELECT 'skill', status, COUNT(1), MAX(id), MAX(COALESCE(reviewed_at, created_at))
+          FROM technician_skill_items GROUP BY status
+        UNION ALL
+        SELECT 'user', role, COUNT(1), MAX(id), NULL FROM users GROUP BY role
+        UNION ALL
+        SELECT 'email', NULL, NULL, NULL, group_concat(u.email, ',')
+          FROM users u
+         WHERE u.id IN (SELECT user_id FROM verification_requests WHERE status = 'PENDING'
+                        UNION SELECT user_id FROM technician_skill_items WHERE status = 'PENDING')
+        """
+    ).fetchall()
+    return version_stamp(*rows)
+
+
 def list_requests_by_status(status: str):
     """List verification requests by status.
 
@@ -0,0 +1,276 @@
+"""Per-request SQL instrumentation.
+
+Every connection opened through db.connect() (get_db, the `_conn()` helpers
+and user_service) uses InstrumentedConnection. Its cursors record statement
+text, time spent in execute + fetch, and rows returned into flask.g for the
+current request. Outside a request (CLI, background threads) nothing is
+recorded.
+
+At the end of each request:
+ - a `Server-Timing: db;dur=..;desc="N queries", app;dur=..` header is added
+   when SQL_SERVER_TIMING is on (default: only in debug or for admin sessions,
+   so anonymous clients cannot read backend timings),
+ - statements slower than SQL_SLOW_QUERY_MS are logged with their
+   EXPLAIN QUERY PLAN,
+ - per-endpoint aggregates are updated (see endpoint_stats(), shown at
+   /admin/debug/sql),
+ - with SQL_DEBUG_PANEL on (default: app.debug), HTML pages get a panel listing
+   every statement, with repeated statements (N+1 patterns) grouped.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g, has_app_context, render_template, request, session
+
+from . import metrics
+
+
+class _QueryRecord:
+    __slots__ = ("sql", "params", "duration", "rows")
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.duration = 0.0
+        self.rows = 0
+
+
+def _current_log():
+    if not has_app_context():
+        return None
+    return g.get("sql_queries")
+
+
+def _counting_locked(method, cursor, sql, params):
+    try:
+        return method(cursor, sql, params)
+    except sqlite3.OperationalError as exc:
+        message = str(exc)
+        if "locked" in message or "busy" in message:
+            metrics.inc("db_locked_errors_total")
+        raise
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _record = None
+
+    def _run(self, method, sql, params):
+        log = _current_log()
+        if log is None:
+            return _counting_locked(method, self, sql, params)
+        record = _QueryRecord(sql, params)
+        start = time.perf_counter()
+        try:
+            return _counting_locked(method, self, sql, params)
+        finally:
+            record.duration = time.perf_counter() - start
+            if self.description is None and self.rowcount > 0:
+                record.rows = self.rowcount
+            self._record = record
+            log.append(record)
+
+    def execute(self, sql, params=()):
+        return self._run(sqlite3.Cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        # Parameters are an iterable of rows; record None so the slow log does not EXPLAIN it.
+        return self._run(lambda cur, sql, _params: sqlite3.Cursor.executemany(cur, sql, seq_of_params), sql, None)
+
+    def executescript(self, sql_script):
+        return self._run(lambda cur, sql, _params: sqlite3.Cursor.executescript(cur, sql), sql_script, None)
+
+    def _timed_fetch(self, method, *args):
+        record = self._record
+        if record is None:
+            return method(self, *args)
+        start = time.perf_counter()
+        try:
+            result = method(self, *args)
+        finally:
+            record.duration += time.perf_counter() - start
+        if isinstance(result, list):
+            record.rows += len(result)
+        elif result is not None:
+            record.rows += 1
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._timed_fetch(sqlite3.Cursor.fetchmany)
+        return self._timed_fetch(sqlite3.Cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed_fetch(sqlite3.Cursor.fetchall)
+
+    def __next__(self):
+        row = self._timed_fetch(sqlite3.Cursor.fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counted_open = True
+        metrics.inc("db_connections_opened_total")
+        metrics.gauge_add("db_connections_open", 1)
+
+    def close(self):
+        if getattr(self, "_counted_open", False):
+            self._counted_open = False
+            metrics.gauge_add("db_connections_open", -1)
+        super().close()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+# =========================
+# Per-endpoint aggregates (per worker process)
+# =========================
+
+_endpoint_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _record_endpoint(endpoint: str, queries: int, sql_seconds: float, slow: int) -> None:
+    with _stats_lock:
+        stats = _endpoint_stats.setdefault(
+            endpoint,
+            {"requests": 0, "queries": 0, "sql_ms": 0.0, "max_queries": 0, "max_sql_ms": 0.0, "slow_queries": 0},
+        )
+        stats["requests"] += 1
+        stats["queries"] += queries
+        stats["sql_ms"] += sql_seconds * 1000.0
+        stats["max_queries"] = max(stats["max_queries"], queries)
+        stats["max_sql_ms"] = max(stats["max_sql_ms"], sql_seconds * 1000.0)
+        stats["slow_queries"] += slow
+
+
+def endpoint_stats() -> list[dict]:
+    """Aggregates per endpoint, most total SQL time first."""
+    with _stats_lock:
+        rows = [dict(stats, endpoint=name) for name, stats in _endpoint_stats.items()]
+    for row in rows:
+        row["avg_queries"] = round(row["queries"] / row["requests"], 2)
+        row["avg_sql_ms"] = round(row["sql_ms"] / row["requests"], 3)
+        row["sql_ms"] = round(row["sql_ms"], 3)
+        row["max_sql_ms"] = round(row["max_sql_ms"], 3)
+    return sorted(rows, key=lambda r: r["sql_ms"], reverse=True)
+
+
+def reset_endpoint_stats() -> None:
+    with _stats_lock:
+        _endpoint_stats.clear()
+
+
+# =========================
+# Slow query log
+# =========================
+
+def _explain(sql: str, params) -> str:
+    words = sql.split(None, 1)
+    if params is None or not words or words[0].upper() not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+        return "(not explainable)"
+    try:
+        conn = sqlite3.connect(current_app.config["DATABASE"])
+        try:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as exc:
+        return f"(explain failed: {exc})"
+    return "\n".join(f"  {row[3]}" for row in plan)
+
+
+def _log_slow(records, threshold: float) -> int:
+    slow = [r for r in records if r.duration >= threshold]
+    for r in slow:
+        current_app.logger.warning(
+            "Slow SQL (%.1f ms, %d rows) on %s:\n%s\nPlan:\n%s",
+            r.duration * 1000.0, r.rows, request.endpoint, " ".join(r.sql.split()), _explain(r.sql, r.params),
+        )
+    return len(slow)
+
+
+# =========================
+# Debug panel
+# =========================
+
+def _grouped(records):
+    groups: dict[str, dict] = {}
+    for r in records:
+        key = " ".join(r.sql.split())
+        group = groups.setdefault(key, {"sql": key, "count": 0, "ms": 0.0, "rows": 0})
+        group["count"] += 1
+        group["ms"] += r.duration * 1000.0
+        group["rows"] += r.rows
+    return sorted(groups.values(), key=lambda grp: grp["ms"], reverse=True)
+
+
+def _inject_panel(response, records, sql_seconds: float) -> None:
+    html = response.get_data(as_text=True)
+    idx = html.rfind("</body>")
+    if idx == -1:
+        return
+    panel = render_template(
+        "debug/sql_panel.html",
+        queries=records,
+        groups=_grouped(records),
+        sql_ms=sql_seconds * 1000.0,
+        threshold_ms=float(current_app.config["SQL_SLOW_QUERY_MS"]),
+    )
+    response.set_data(html[:idx] + panel + html[idx:])
+
+
+def init_app(app):
+    if not app.config.get("SQL_INSTRUMENTATION", True):
+        return
+    # Both default to None = decide per request; app.debug is only final once app.run() has started.
+    panel_setting = app.config.get("SQL_DEBUG_PANEL")
+    timing_setting = app.config.get("SQL_SERVER_TIMING")
+
+    @app.before_request
+    def _start_sql_log():
+        g.sql_queries = []
+        g.sql_request_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_sql_log(response):
+        records = g.pop("sql_queries", None)
+        if records is None:
+            return response
+        total = time.perf_counter() - g.pop("sql_request_started", time.perf_counter())
+        sql_seconds = sum(r.duration for r in records)
+        slow = _log_slow(records, float(app.config["SQL_SLOW_QUERY_MS"]) / 1000.0)
+        _record_endpoint(request.endpoint or "<unmatched>", len(records), sql_seconds, slow)
+
+        send_timing = timing_setting
+        if send_timing is None:
+            send_timing = app.debug or session.get("role") == "ADMIN"
+        if send_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={sql_seconds * 1000.0:.2f};desc="{len(records)} queries", app;dur={total * 1000.0:.2f}',
+            )
+        show_panel = app.debug if panel_setting is None else panel_setting
+        if show_panel and response.mimetype == "text/html" and not response.is_streamed and not response.direct_passthrough:
+            _inject_panel(response, records, sql_seconds)
+        return response
@@ -0,0 +1,119 @@
+"""Template compilation cache and `{% cache %}` fragment caching.
+
+Bytecode cache: compiled templates are written to TEMPLATE_BYTECODE_CACHE_DIR,
+so new workers load bytecode instead of re-parsing every template on first hit.
+
+Fragment cache: wrap an expensive part of a template in
+
+    {% cache ("technician-jobs", user_id, jobs_version), 300 %}
+      ...
+    {% endcache %}
+
+The first argument is the key and the second is the TTL in seconds (optional,
+defaults to FRAGMENT_CACHE_TTL_SECONDS). The key must contain a version stamp
+of the data the fragment shows, e.g. jobs_dashboard_version_for_technician().
+When the data changes, the stamp changes and a new key is used, so a stale
+fragment is never served; the TTL only bounds memory. Keys are namespaced by
+template name and line, so two templates can use the same key.
+
+Anything the fragment needs should be loaded inside the block (the routes pass
+loader callables), so a cache hit skips the queries as well as the rendering.
+
+The store is in-process: each worker keeps its own copy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with a per-entry expiry."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = int(max_entries)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + float(ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_cache_ttl=300)
+
+    def parse(self, parser):
+        token = next(parser.stream)
+        lineno = token.lineno
+        args = [nodes.Const(f"{parser.name}:{lineno}"), parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render_cached", args), [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, namespace, key, ttl, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        full_key = (namespace, key if isinstance(key, (str, int)) else tuple(key))
+        value = cache.get(full_key)
+        if value is None:
+            value = caller()
+            cache.set(full_key, value, self.environment.fragment_cache_ttl if ttl is None else ttl)
+        return Markup(value)
+
+
+def version_stamp(*parts) -> str:
+    """Short digest of query results used as the version part of a fragment key."""
+    digest = hashlib.sha1()
+    for part in parts:
+        if hasattr(part, "keys"):
+            part = tuple(part)
+        digest.update(repr(part).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def init_app(app):
+    cache_dir = app.config.get("TEMPLATE_BYTECODE_CACHE_DIR")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config.get("FRAGMENT_CACHE_ENABLED", True):
+        app.jinja_env.fragment_cache = FragmentCache(app.config["FRAGMENT_CACHE_MAX_ENTRIES"])
+    app.jinja_env.fragment_cache_ttl = int(app.config["FRAGMENT_CACHE_TTL_SECONDS"])
@@ -3,15 +3,134 @@ import os
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-change-me")
     DATABASE = os.environ.get("DATABASE", os.path.join(os.getcwd(), "instance", "app.db"))
+    # Apply pending schema migrations at boot. Off by default: boot only checks the version and
+    # answers 503 until `flask db upgrade` has run. run.py turns it on for the dev server.
+    DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "0") == "1"
+    # Boot-time budget checked by `flask bench startup` (imports + create_app)
+    STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "400"))
 
     UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", os.path.join(os.getcwd(), "app", "uploads"))
     ALLOWED_EXTENSIONS = {".pdf", ".docx"}
     # Default to 15MB to reduce false failures during local testing.
     MAX_FILE_SIZE_BYTES = int(os.environ.get("MAX_FILE_SIZE_BYTES", str(15 * 1024 * 1024)))
 
+    # Browser cache lifetime for admin inline document views (uploads are immutable)
+    DOCUMENT_CACHE_MAX_AGE_SECONDS = int(os.environ.get("DOCUMENT_CACHE_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+
+    # Who streams document bytes once a route has authorized the download:
+    # direct (Flask send_file) | stream (chunked generator) | x-sendfile | x-accel (nginx)
+    DOCUMENT_DELIVERY_MODE = os.environ.get("DOCUMENT_DELIVERY_MODE", "direct")
+    # nginx `internal` location that aliases UPLOAD_FOLDER (x-accel mode)
+    DOCUMENT_ACCEL_PREFIX = os.environ.get("DOCUMENT_ACCEL_PREFIX", "/_protected_uploads/")
+    DOCUMENT_STREAM_CHUNK_BYTES = int(os.environ.get("DOCUMENT_STREAM_CHUNK_BYTES", str(256 * 1024)))
+
+    # Response compression (app/compression.py). Brotli needs the optional `brotli` package.
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BR_QUALITY = int(os.environ.get("COMPRESS_BR_QUALITY", "5"))
+    COMPRESS_MIMETYPES = {
+        "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+        "application/javascript", "application/json", "application/x-ndjson",
+        "application/xml", "image/svg+xml",
+    }
+
+    # Compiled-template cache shared by workers (empty string disables it)
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get(
+        "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(os.getcwd(), "instance", "jinja_cache")
+    )
+    # {% cache %} fragment cache (app/template_cache.py); keys carry data version stamps
+    FRAGMENT_CACHE_ENABLED = os.environ.get("FRAGMENT_CACHE_ENABLED", "1") == "1"
+    FRAGMENT_CACHE_TTL_SECONDS = int(os.environ.get("FRAGMENT_CACHE_TTL_SECONDS", "300"))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", "2048"))
+
+    # Admin name/email autocomplete: per-process result cache lifetime
+    SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "15"))
+
+    # Admin review queue: claim lease length, default batch size, and how fast waiting raises priority
+    # (one point per step; flag severities weigh HIGH 100 / MEDIUM 30 / LOW 10).
+    # The step is baked into stored sort keys: run `flask db rebuild-review-queue` after changing it.
+    REVIEW_LEASE_SECONDS = int(os.environ.get("REVIEW_LEASE_SECONDS", "900"))
+    REVIEW_QUEUE_CLAIM_SIZE = int(os.environ.get("REVIEW_QUEUE_CLAIM_SIZE", "10"))
+    REVIEW_QUEUE_AGE_STEP_SECONDS = int(os.environ.get("REVIEW_QUEUE_AGE_STEP_SECONDS", "3600"))
+
+    # Admin bulk approve/reject: requests updated per transaction (keeps write-lock hold time short)
+    BULK_REVIEW_CHUNK_SIZE = int(os.environ.get("BULK_REVIEW_CHUNK_SIZE", "100"))
+
+    # Admin CSV/NDJSON exports: rows fetched (and flushed to the client) per batch
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+
+    # Per-request SQL instrumentation (app/sql_instrumentation.py)
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "1") == "1"
+    SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", "100"))
+    # Query panel on HTML pages; unset = only when running with debug on
+    SQL_DEBUG_PANEL = (os.environ["SQL_DEBUG_PANEL"] == "1") if "SQL_DEBUG_PANEL" in os.environ else None
+    # Server-Timing header (query count, DB time); unset = only with debug on or for admin sessions
+    SQL_SERVER_TIMING = (os.environ["SQL_SERVER_TIMING"] == "1") if "SQL_SERVER_TIMING" in os.environ else None
+
+    # Prometheus /metrics. With several worker processes set METRICS_DIR to a directory
+    # shared by all workers (emptied on deploy); each worker writes its snapshot there.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_DIR = os.environ.get("METRICS_DIR") or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "1"))
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    # Without a token /metrics answers 403; set 1 to serve it unauthenticated (e.g. bound to a private network)
+    METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "0") == "1"
+
+    # Sampling profiler (app/profiler.py): armed state and collapsed-stack output
+    PROFILER_DIR = os.environ.get("PROFILER_DIR", os.path.join(os.getcwd(), "instance", "profiles"))
+    PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_POLL_SECONDS = float(os.environ.get("PROFILER_POLL_SECONDS", "1"))
+
+    # Resumable chunked uploads: chunk size and how long an idle upload is kept
+    CHUNKED_UPLOAD_CHUNK_BYTES = int(os.environ.get("CHUNKED_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    CHUNKED_UPLOAD_TTL_SECONDS = int(os.environ.get("CHUNKED_UPLOAD_TTL_SECONDS", str(24 * 60 * 60)))
+    # Signup forms upload before an account exists: per-session upload cap, bytes received and held
+    # for all guests, and upload inits per client IP (token bucket)
+    CHUNKED_UPLOAD_GUEST_MAX_UPLOADS = int(os.environ.get("CHUNKED_UPLOAD_GUEST_MAX_UPLOADS", "10"))
+    CHUNKED_UPLOAD_GUEST_QUOTA_BYTES = int(os.environ.get("CHUNKED_UPLOAD_GUEST_QUOTA_BYTES", str(1024 * 1024 * 1024)))
+    CHUNKED_UPLOAD_GUEST_INITS_PER_MINUTE = float(os.environ.get("CHUNKED_UPLOAD_GUEST_INITS_PER_MINUTE", "10"))
+    CHUNKED_UPLOAD_GUEST_INIT_BURST = int(os.environ.get("CHUNKED_UPLOAD_GUEST_INIT_BURST", "10"))
+
+    # Background preview extraction (page count, text length, thumbnail) for uploads
+    PREVIEW_ASYNC = os.environ.get("PREVIEW_ASYNC", "1") == "1"
+    PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS", "2"))
+    PREVIEW_THUMB_WIDTH = int(os.environ.get("PREVIEW_THUMB_WIDTH", "240"))
+
     # Cooldown duration after REJECTED
     COOLDOWN_DURATION_SECONDS = int(os.environ.get("COOLDOWN_DURATION_SECONDS", str(24 * 60 * 60)))  # 24h
 
+    # Job state transitions (services/job_state_service.py): attempts on version conflict / SQLITE_BUSY
+    JOB_TRANSITION_ATTEMPTS = int(os.environ.get("JOB_TRANSITION_ATTEMPTS", "5"))
+    JOB_TRANSITION_BACKOFF_MS = float(os.environ.get("JOB_TRANSITION_BACKOFF_MS", "10"))
+
+    # Periodic sweeper (`flask sweep run`, services/sweeper_service.py); 0 disables a transition
+    SWEEP_BATCH_SIZE = int(os.environ.get("SWEEP_BATCH_SIZE", "500"))
+    SWEEP_INTERVAL_SECONDS = int(os.environ.get("SWEEP_INTERVAL_SECONDS", "300"))
+    STALE_OUTGOING_JOB_SECONDS = int(os.environ.get("STALE_OUTGOING_JOB_SECONDS", str(60 * 24 * 60 * 60)))  # 60 days
+    AUTO_CONFIRM_GRACE_SECONDS = int(os.environ.get("AUTO_CONFIRM_GRACE_SECONDS", str(7 * 24 * 60 * 60)))  # 7 days
+
+    # How long a stored Idempotency-Key response is replayed (services/idempotency_service.py)
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 60 * 60)))
+    # An in-flight claim older than this is considered abandoned (worker died) and may be taken over
+    IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = int(os.environ.get("IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", "60"))
+
+    # Password hashing pool (see services/password_service.py)
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "16"))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.environ.get("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+
+    # Reverse proxies (nginx) in front of the app that set X-Forwarded-For/-Proto/-Host.
+    # 0 = none: request.remote_addr is the peer address, which behind a proxy is the proxy itself.
+    TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
+
+    # Login throttling (token buckets per client IP and per email)
+    LOGIN_IP_RATE_PER_MINUTE = float(os.environ.get("LOGIN_IP_RATE_PER_MINUTE", "30"))
+    LOGIN_IP_BURST = int(os.environ.get("LOGIN_IP_BURST", "10"))
+    LOGIN_EMAIL_RATE_PER_MINUTE = float(os.environ.get("LOGIN_EMAIL_RATE_PER_MINUTE", "6"))
+    LOGIN_EMAIL_BURST = int(os.environ.get("LOGIN_EMAIL_BURST", "5"))
+
     # Admin seed (for local demo)
     ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@techmatch.com")
     ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "Admin123")
@@ -0,0 +1,65 @@
+"""gunicorn settings for `gunicorn wsgi:app` (loaded automatically from the working directory).
+
+Every value can be overridden with an environment variable of the same meaning
+(WSGI_BIND, WEB_CONCURRENCY, WSGI_THREADS, ...), or on the command line.
+
+Worker model: gthread. Requests are mostly short SQLite reads plus template
+rendering, with some blocking I/O (uploads, document streaming, password
+hashing in its own pool), so a few processes with several threads each beat
+many single-threaded sync workers on memory and keep slow uploads from
+blocking a whole process. SQLite allows one writer at a time whatever the
+worker count, so adding processes past ~2 per core buys nothing.
+
+Reloading:
+  kill -HUP <master>   graceful restart of the workers (new config, same code
+                       while preload_app is on, since workers fork from the
+                       preloaded master)
+  kill -USR2 <master>  start a new master on the new code, then
+  kill -QUIT <old>     retire the old one once the new workers pass /readyz
+"""
+
+import multiprocessing
+import os
+import shutil
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get("WSGI_BIND", "0.0.0.0:8000")
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", str(min(2 * _cpus + 1, 9))))
+threads = int(os.environ.get("WSGI_THREADS", "4"))
+
+# Import the app (Flask, Jinja, services) once in the master; workers share those pages copy-on-write.
+preload_app = os.environ.get("WSGI_PRELOAD", "1") == "1"
+
+# Recycle workers to bound slow memory growth; jitter keeps them from restarting together.
+max_requests = int(os.environ.get("WSGI_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("WSGI_MAX_REQUESTS_JITTER", "200"))
+
+timeout = int(os.environ.get("WSGI_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("WSGI_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("WSGI_KEEPALIVE", "5"))
+
+accesslog = os.environ.get("WSGI_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    # Per-worker metric snapshots from the previous deploy would otherwise be merged into /metrics forever.
+    directory = os.environ.get("METRICS_DIR") or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory and os.path.isdir(directory):
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+
+
+def when_ready(server):
+    from app import metrics
+
+    # Values recorded while preloading belong to no worker.
+    metrics.reset()
+
+
+def post_fork(server, worker):
+    from app import metrics
+
+    metrics.reset()
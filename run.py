@@ -1,3 +1,10 @@
+import os
+
+if __name__ == "__main__":
+    # Only the dev server migrates at boot; wsgi.py and the flask CLI just check the version.
+    # Must be set before config.Config is loaded.
+    os.environ.setdefault("DB_AUTO_MIGRATE", "1")
+
 from app import create_app
 
 app = create_app()
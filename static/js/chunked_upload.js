@@ -0,0 +1,126 @@
+// Resumable chunked uploads for forms marked with data-chunked-upload.
+// Files are sent to /uploads in numbered chunks (retried individually), then the
+// form is submitted with hidden upload_id fields instead of the raw files.
+// If the server refuses to start an upload (guest limits, quota), the form is
+// posted the normal multipart way instead.
+
+(function () {
+  const MAX_RETRIES = 5;
+
+  async function sha256Hex(file) {
+    const buf = await file.arrayBuffer();
+    const digest = await crypto.subtle.digest('SHA-256', buf);
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+  }
+
+  async function jsonFetch(url, options) {
+    const r = await fetch(url, Object.assign({ credentials: 'same-origin' }, options));
+    const data = await r.json().catch(() => ({}));
+    if (!r.ok) {
+      const err = new Error(data.error || `Upload failed (${r.status})`);
+      err.status = r.status;
+      throw err;
+    }
+    return data;
+  }
+
+  async function withRetry(fn) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await fn();
+      } catch (err) {
+        if (attempt >= MAX_RETRIES) throw err;
+        await new Promise((res) => setTimeout(res, 500 * 2 ** attempt));
+      }
+    }
+  }
+
+  async function uploadFile(file, onProgress) {
+    const key = `tm-upload:${file.name}:${file.size}:${file.lastModified}`;
+    let info = null;
+
+    // Resume an earlier attempt for the same file if the server still has it.
+    const previous = localStorage.getItem(key);
+    if (previous) {
+      info = await jsonFetch(`/uploads/${previous}`).catch(() => null);
+      if (info && info.status === 'COMPLETE') return previous;
+      if (info && info.status !== 'OPEN') info = null;
+    }
+
+    let uploadId = previous;
+    let chunkSize;
+    if (!info) {
+      const sha256 = await sha256Hex(file);
+      const init = await jsonFetch('/uploads/init', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size, sha256 }),
+      }).catch((err) => {
+        err.initRefused = true;
+        throw err;
+      });
+      uploadId = init.upload_id;
+      chunkSize = init.chunk_size;
+      info = { total_chunks: init.total_chunks, received: [] };
+      localStorage.setItem(key, uploadId);
+    } else {
+      chunkSize = info.chunk_size;
+    }
+
+    const done = new Set(info.received);
+    for (let i = 0; i < info.total_chunks; i++) {
+      if (done.has(i)) continue;
+      const blob = file.slice(i * chunkSize, Math.min(file.size, (i + 1) * chunkSize));
+      await withRetry(() => jsonFetch(`/uploads/${uploadId}/chunks/${i}`, { method: 'PUT', body: blob }));
+      if (onProgress) onProgress((i + 1) / info.total_chunks);
+    }
+
+    await withRetry(() => jsonFetch(`/uploads/${uploadId}/finalize`, { method: 'POST' }));
+    localStorage.removeItem(key);
+    return uploadId;
+  }
+
+  document.addEventListener('submit', async (ev) => {
+    const form = ev.target;
+    if (!form.matches('form[data-chunked-upload]') || form.dataset.chunkedDone) return;
+    if (!window.crypto || !crypto.subtle) return; // fall back to a normal multipart post
+
+    const inputs = Array.from(form.querySelectorAll('input[type=file]')).filter((i) => i.files.length);
+    if (!inputs.length) return;
+    ev.preventDefault();
+
+    const button = form.querySelector('[type=submit]');
+    const label = button ? button.textContent : '';
+    const added = [];
+    try {
+      for (const input of inputs) {
+        for (const file of Array.from(input.files)) {
+          const id = await uploadFile(file, (p) => {
+            if (button) button.textContent = `Uploading ${file.name}… ${Math.round(p * 100)}%`;
+          });
+          const hidden = document.createElement('input');
+          hidden.type = 'hidden';
+          hidden.name = 'upload_id';
+          hidden.value = id;
+          form.appendChild(hidden);
+          added.push(hidden);
+        }
+        input.disabled = true;
+      }
+    } catch (err) {
+      if (button) button.textContent = label;
+      if (err.initRefused) {
+        // Send every file in the multipart body instead.
+        added.forEach((h) => h.remove());
+        inputs.forEach((i) => { i.disabled = false; });
+        form.dataset.chunkedDone = '1';
+        form.submit();
+        return;
+      }
+      alert(err.message);
+      return;
+    }
+    form.dataset.chunkedDone = '1';
+    form.submit();
+  });
+})();
@@ -0,0 +1,7 @@
+// Load inline PDF viewers only when their collapse panel is opened.
+document.addEventListener('show.bs.collapse', (ev) => {
+  ev.target.querySelectorAll('iframe[data-src]').forEach((frame) => {
+    frame.src = frame.getAttribute('data-src');
+    frame.removeAttribute('data-src');
+  });
+});
@@ -0,0 +1,27 @@
+"""Production entry point.
+
+Linux/macOS:  gunicorn wsgi:app          (settings in gunicorn.conf.py)
+Windows:      python wsgi.py             (waitress; gunicorn does not run on Windows)
+
+run.py stays the development server (debug + reloader).
+"""
+
+import os
+
+from app import create_app
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    from waitress import serve
+
+    # waitress is a single process; all concurrency comes from its thread pool.
+    threads = int(os.environ.get("WSGI_THREADS", str(max(4, (os.cpu_count() or 1) * 4))))
+    serve(
+        app,
+        listen=os.environ.get("WSGI_BIND", "0.0.0.0:8000"),
+        threads=threads,
+        connection_limit=int(os.environ.get("WSGI_CONNECTION_LIMIT", "200")),
+        channel_timeout=int(os.environ.get("WSGI_TIMEOUT", "60")),
+    )